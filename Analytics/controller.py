@@ -1,34 +1,73 @@
-class ControllerAnalytics:
-    def __init__(self, model_analytics, view_analytics):
-        self.model_analytics = model_analytics
-        self.view_analytics = view_analytics
-
-    def most_booked_venue(self):
-        # Отримати дані аналітики
-        most_booked_venue_data = self.model_analytics.most_booked_venue()
-
-        # Відобразити результати
-        if most_booked_venue_data:
-            self.view_analytics.display_most_booked_venue(most_booked_venue_data)
-        else:
-            print("Error With Most Booked Venue Analytics")
-
-    def user_activity(self):
-        # Отримати дані аналітики
-        user_activity_data = self.model_analytics.user_activity()
-
-        # Відобразити результати
-        if user_activity_data:
-            self.view_analytics.display_user_activity(user_activity_data)
-        else:
-            print("Error With User Activity Analytics")
-
-    def payment_analysis(self):
-        # Отримати дані аналітики
-        payment_analysis_data = self.model_analytics.payment_analysis()
-
-        # Відобразити результати
-        if payment_analysis_data:
-            self.view_analytics.display_payment_analysis(payment_analysis_data)
-        else:
-            print("Error With Payment Analytics")
\ No newline at end of file
+import datetime
+
+# Скільки закладів і об'єктів показувати у звітах за період
+PERIOD_REPORT_LIMIT = 10
+
+
+class ControllerAnalytics:
+    def __init__(self, model_analytics, view_analytics):
+        self.model_analytics = model_analytics
+        self.view_analytics = view_analytics
+
+    def most_booked_venue(self):
+        # Отримати дані аналітики
+        most_booked_venue_data = self.model_analytics.most_booked_venue()
+
+        # Відобразити результати
+        if most_booked_venue_data:
+            self.view_analytics.display_most_booked_venue(most_booked_venue_data)
+        else:
+            print("Error With Most Booked Venue Analytics")
+
+    def user_activity(self):
+        # Отримати дані аналітики
+        user_activity_data = self.model_analytics.user_activity()
+
+        # Відобразити результати
+        if user_activity_data:
+            self.view_analytics.display_user_activity(user_activity_data)
+        else:
+            print("Error With User Activity Analytics")
+
+    def payment_analysis(self):
+        # Отримати дані аналітики
+        payment_analysis_data = self.model_analytics.payment_analysis()
+
+        # Відобразити результати
+        if payment_analysis_data:
+            self.view_analytics.display_payment_analysis(payment_analysis_data)
+        else:
+            print("Error With Payment Analytics")
+
+    def period_analytics(self):
+        # Request the date range (both dates inclusive) and the revenue grouping
+        try:
+            start, end, period = self.view_analytics.get_period_input()
+        except ValueError as e:
+            self.view_analytics.show_analytics_message(f"Invalid Date: {e}")
+            return
+        end += datetime.timedelta(days=1)
+
+        reports = (
+            (self.model_analytics.revenue_by_period(start, end, period),
+             self.view_analytics.display_revenue_by_period),
+            (self.model_analytics.revenue_by_venue(start, end, PERIOD_REPORT_LIMIT),
+             self.view_analytics.display_revenue_by_venue),
+            (self.model_analytics.revenue_by_status(start, end),
+             self.view_analytics.display_revenue_by_status),
+            (self.model_analytics.facility_bookings(start, end, PERIOD_REPORT_LIMIT),
+             self.view_analytics.display_facility_bookings)
+        )
+        for data, display in reports:
+            print("-------------------------------------------------------------------------------")
+            if data:
+                display(data)
+            elif data is not None:
+                self.view_analytics.show_analytics_message("No Data For This Period")
+
+    def rebuild_summaries(self):
+        # Повний перерахунок зведених таблиць
+        if self.model_analytics.rebuild_summaries():
+            self.view_analytics.show_analytics_message("Analytics Summaries Successfully Rebuilt")
+        else:
+            self.view_analytics.show_analytics_message("Analytics Summaries Not Rebuilt")
\ No newline at end of file
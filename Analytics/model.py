@@ -1,96 +1,129 @@
-class ModelAnalytics:
-    def __init__(self, db_model):
-        self.conn = db_model.conn
-
-    def most_booked_venue(self):
-        """
-        Запит для визначення найпопулярнішого місця (Venue), 
-        на основі кількості бронювань (Booking).
-        """
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                SELECT 
-                    v."venue_id",
-                    v."name" AS venue_name,
-                    COUNT(b."booking_id") AS total_bookings
-                FROM 
-                    "venue" v
-                JOIN 
-                    "facility" f ON v."venue_id" = f."venue_id"
-                JOIN 
-                    "booking" b ON f."facility_id" = b."facility_id"
-                GROUP BY 
-                    v."venue_id",v."name"
-                ORDER BY 
-                    total_bookings DESC
-                LIMIT 1; -- Найпопулярніше місце
-            """)
-
-            data = c.fetchall()
-            self.conn.commit()
-            return data
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Analytics Of Most Booked Venue: {str(e)}")
-            return None
-
-    def user_activity(self):
-        """
-        Запит для визначення найактивніших користувачів (Users),
-        на основі кількості їхніх бронювань (Booking).
-        """
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                SELECT 
-                    u."user_id",
-                    u."first_name", 
-                    u."last_name", 
-                    COUNT(b."booking_id") AS total_bookings
-                FROM 
-                    "users" u
-                JOIN 
-                    "booking" b ON u."user_id" = b."user_id"
-                GROUP BY 
-                    u."user_id", u."first_name", u."last_name"
-                ORDER BY 
-                    total_bookings DESC
-                LIMIT 5; -- П'ять найактивніших користувачів
-            """)
-
-            data = c.fetchall()
-            self.conn.commit()
-            return data
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Analytics Of User Activity: {str(e)}")
-            return None
-
-    def payment_analysis(self):
-        """
-        Запит для аналізу платежів (Payment) за статусом, 
-        загальною сумою та кількістю.
-        """
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                SELECT 
-                    p."payment_status",
-                    COUNT(p."payment_id") AS total_payments,
-                    SUM(p."amount") AS total_revenue
-                FROM 
-                    "payment" p
-                GROUP BY 
-                    p."payment_status"
-                ORDER BY 
-                    total_revenue DESC;
-            """)
-
-            data = c.fetchall()
-            self.conn.commit()
-            return data
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Analytics Of Payments: {str(e)}")
-            return None
\ No newline at end of file
+import prepared
+from export import Exporter
+from model import REBUILD_SUMMARIES_SQL
+
+# Періоди, за якими групується виручка (аргумент date_trunc)
+REVENUE_PERIODS = ('day', 'week', 'month')
+
+
+class ModelAnalytics:
+    def __init__(self, db_model):
+        self.db_model = db_model
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def most_booked_venue(self):
+        """
+        Запит для визначення найпопулярнішого місця (Venue), 
+        на основі кількості бронювань (Booking).
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.most_booked_venue')
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Most Booked Venue: {str(e)}")
+            return None
+
+    def user_activity(self):
+        """
+        Запит для визначення найактивніших користувачів (Users),
+        на основі кількості їхніх бронювань (Booking).
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.user_activity')
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of User Activity: {str(e)}")
+            return None
+
+    def payment_analysis(self):
+        """
+        Запит для аналізу платежів (Payment) за статусом, 
+        загальною сумою та кількістю.
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.payment_analysis')
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Payments: {str(e)}")
+            return None
+
+    def revenue_by_period(self, start, end, period='day'):
+        """
+        Виручка (успішні платежі) з start включно до end невключно,
+        згрупована по днях, тижнях або місяцях: (початок періоду, кількість платежів, сума).
+        """
+        try:
+            if period not in REVENUE_PERIODS:
+                raise ValueError(f"period must be one of {', '.join(REVENUE_PERIODS)}")
+            return self.db_model.read(prepared.fetch_all, 'analytics.revenue_by_period', (period, start, end))
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Revenue By Period: {str(e)}")
+            return None
+
+    def revenue_by_venue(self, start, end, limit=None):
+        """
+        Виручка закладів за період [start, end): (venue_id, назва, кількість платежів, сума),
+        від найбільшої; limit=None - усі заклади.
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.revenue_by_venue', (start, end, limit))
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Revenue By Venue: {str(e)}")
+            return None
+
+    def revenue_by_status(self, start, end):
+        """
+        Аналіз платежів за статусом, як payment_analysis, але лише за період [start, end).
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.revenue_by_status', (start, end))
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Revenue By Status: {str(e)}")
+            return None
+
+    def facility_bookings(self, start, end, limit=None):
+        """
+        Кількість бронювань кожного об'єкта з датою бронювання в [start, end):
+        (facility_id, назва, venue_id, кількість), від найбільшої.
+        """
+        try:
+            return self.db_model.read(prepared.fetch_all, 'analytics.facility_bookings', (start, end, limit))
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Analytics Of Facility Bookings: {str(e)}")
+            return None
+
+    def export_report(self, report, path, file_format=None, start=None, end=None, period='day'):
+        """
+        Потоково вивантажує аналітичний звіт report (назва з EXPORT_REPORTS) у CSV або JSONL
+        файл через COPY TO STDOUT. Звіти за період вимагають start і end.
+        Повертає кількість вивантажених рядків.
+        """
+        try:
+            if period not in REVENUE_PERIODS:
+                raise ValueError(f"period must be one of {', '.join(REVENUE_PERIODS)}")
+            return Exporter().export_report(report, path, file_format, start, end, period)
+        except Exception as e:
+            print(f"Error With Exporting Analytics Report: {str(e)}")
+            return None
+
+    def rebuild_summaries(self):
+        """
+        Повністю перераховує зведені таблиці аналітики з таблиць booking, facility та payment.
+        """
+        c = self.conn.cursor()
+        try:
+            c.execute(REBUILD_SUMMARIES_SQL)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Rebuilding Analytics Summaries: {str(e)}")
+            return False
\ No newline at end of file
@@ -1,19 +1,53 @@
-class ViewAnalytics:
-    def display_most_booked_venue(self, most_booked_venue_data):
-        print("Найпопулярніше місце:")
-        for row in most_booked_venue_data:
-            venue_id, venue_name, total_bookings = row
-            print(f"ID: {venue_id}, Назва: {venue_name}, Кількість бронювань: {total_bookings}")
-
-    def display_user_activity(self, user_activity_data):
-        print("Найактивніші користувачі:")
-        for row in user_activity_data:
-            user_id, first_name, last_name, total_bookings = row
-            print(f"ID: {user_id}, Ім'я: {first_name} {last_name}, Кількість бронювань: {total_bookings}")
-
-    def display_payment_analysis(self, payment_analysis_data):
-        print("Аналіз платежів:")
-        for row in payment_analysis_data:
-            payment_status, total_amount, count_payments = row
-            status_text = "Успішні" if payment_status else "Неуспішні"
-            print(f"Статус: {status_text}, Загальна сума: {total_amount}, Кількість платежів: {count_payments}")
\ No newline at end of file
+import datetime
+
+
+class ViewAnalytics:
+    def display_most_booked_venue(self, most_booked_venue_data):
+        print("Найпопулярніше місце:")
+        for row in most_booked_venue_data:
+            venue_id, venue_name, total_bookings = row
+            print(f"ID: {venue_id}, Назва: {venue_name}, Кількість бронювань: {total_bookings}")
+
+    def display_user_activity(self, user_activity_data):
+        print("Найактивніші користувачі:")
+        for row in user_activity_data:
+            user_id, first_name, last_name, total_bookings = row
+            print(f"ID: {user_id}, Ім'я: {first_name} {last_name}, Кількість бронювань: {total_bookings}")
+
+    def display_payment_analysis(self, payment_analysis_data):
+        print("Аналіз платежів:")
+        for row in payment_analysis_data:
+            payment_status, total_amount, count_payments = row
+            status_text = "Успішні" if payment_status else "Неуспішні"
+            print(f"Статус: {status_text}, Загальна сума: {total_amount}, Кількість платежів: {count_payments}")
+
+    def get_period_input(self):
+        start = datetime.date.fromisoformat(input("Input start date (YYYY-MM-DD): ").strip())
+        end = datetime.date.fromisoformat(input("Input end date (YYYY-MM-DD): ").strip())
+        period = input("Group revenue by ([D]ay, [W]eek, [M]onth): ").strip().lower()
+        return start, end, {'w': 'week', 'm': 'month'}.get(period[:1], 'day')
+
+    def display_revenue_by_period(self, revenue_data):
+        print("Виручка за періодами:")
+        for period_start, count_payments, revenue in revenue_data:
+            print(f"Період: {period_start:%Y-%m-%d}, Кількість платежів: {count_payments}, Виручка: {revenue}")
+
+    def display_revenue_by_venue(self, revenue_data):
+        print("Виручка за закладами:")
+        for venue_id, venue_name, count_payments, revenue in revenue_data:
+            print(f"ID: {venue_id}, Назва: {venue_name}, Кількість платежів: {count_payments}, Виручка: {revenue}")
+
+    def display_revenue_by_status(self, revenue_data):
+        print("Платежі за статусом:")
+        for payment_status, count_payments, revenue in revenue_data:
+            status_text = "Успішні" if payment_status else "Неуспішні"
+            print(f"Статус: {status_text}, Кількість платежів: {count_payments}, Загальна сума: {revenue}")
+
+    def display_facility_bookings(self, bookings_data):
+        print("Бронювання за об'єктами:")
+        for facility_id, facility_name, venue_id, total_bookings in bookings_data:
+            print(f"ID: {facility_id}, Назва: {facility_name}, Заклад: {venue_id}, "
+                  f"Кількість бронювань: {total_bookings}")
+
+    def show_analytics_message(self, message):
+        print(message)
\ No newline at end of file
@@ -1,94 +1,122 @@
-class ControllerBooking:
-    def __init__(self, model_booking, view_booking):
-        self.model_booking = model_booking
-        self.view_booking = view_booking
-
-    def add_booking(self):
-        # Request the ID of the booking to be updated
-        booking_id = self.view_booking.get_booking_id()
-
-        user_id, facility_id, booking_date, start_time, end_time, status = (
-            self.view_booking.get_booking_input())
-
-        # Call a method from the Model class to add a booking
-        success = (self.model_booking.add_booking
-                   (booking_id, booking_date, start_time, end_time, status, user_id, facility_id))
-
-        # Display a message about the result of the operation
-        if success:
-            self.view_booking.show_booking_message("Successfully Added New Booking")
-        else:
-            self.view_booking.show_booking_message("Booking Not Added")
-
-    def view_bookings(self):
-        # Call a method from the Model class to retrieve all bookings
-        bookings = self.model_booking.get_all_bookings()
-
-        # Display bookings via a method from the View class
-        self.view_booking.show_booking(bookings)
-
-    def update_booking(self):
-        # Request the ID of the booking to be updated
-        booking_id = self.view_booking.get_booking_id()
-
-        # Check if there is a booking with the specified ID
-        booking_exists = self.model_booking.check_booking_existence(booking_id)
-
-        if booking_exists:
-            # Request updated booking details from the user
-            user_id, facility_id, booking_date, start_time, end_time, status = (
-                self.view_booking.get_booking_input())
-            # Call a method from the Model class to update the booking
-            success = (self.model_booking.update_booking
-                       (booking_id, user_id, facility_id, booking_date, start_time, end_time, status))
-
-            # Display a message about the result of the operation
-            if success:
-                self.view_booking.show_booking_message("Successfully Updated A Booking")
-            else:
-                self.view_booking.show_booking_message("Booking Not Updated")
-        else:
-            self.view_booking.show_booking_message("Booking With This ID Does Not Exist")
-
-    def delete_booking(self):
-        # Request the ID of the booking to be deleted
-        booking_id = self.view_booking.get_booking_id()
-
-        # Check if there is a booking with the specified ID
-        booking_exists = self.model_booking.check_booking_existence(booking_id)
-
-        if booking_exists:
-            # Call a method from the Model class to delete a booking
-            success = self.model_booking.delete_booking(booking_id)
-
-            # Display a message about the result of the operation
-            if success:
-                self.view_booking.show_booking_message("Successfully Deleted A Booking")
-            else:
-                self.view_booking.show_booking_message("Booking Not Deleted")
-        else:
-            self.view_booking.show_booking_message("Booking With The Specified ID Does Not Exist")
-
-    def create_booking_sequence(self):
-        # Call method create_booking_sequence from class Modelbooking
-        self.model_booking.create_booking_sequence()
-        self.view_booking.show_booking_message("Successfully Created Booking Sequence")
-
-    def generate_rand_booking_data(self, number_of_operations):
-        # Call method generate_rand_booking_data from class Modelbooking
-        success = self.model_booking.generate_rand_booking_data(number_of_operations)
-
-        if success:
-            self.view_booking.show_booking_message(
-                f"{number_of_operations} Bookings Successfully Created")
-        else:
-            self.view_booking.show_booking_message("Booking Not Created")
-
-    def truncate_booking_table(self):
-        # Call the method of the corresponding model
-        success = self.model_booking.truncate_booking_table()
-
-        if success:
-            self.view_booking.show_booking_message("All Bookings Data Successfully Deleted")
-        else:
+from model import PAGE_SIZE
+from pagination import ControllerPager
+
+
+class ControllerBooking:
+    def __init__(self, model_booking, view_booking):
+        self.model_booking = model_booking
+        self.view_booking = view_booking
+
+    def add_booking(self):
+        # Request the ID of the booking to be updated
+        booking_id = self.view_booking.get_booking_id()
+
+        user_id, facility_id, booking_date, start_time, end_time, status = (
+            self.view_booking.get_booking_input())
+
+        # Call a method from the Model class to add a booking
+        success = (self.model_booking.add_booking
+                   (booking_id, user_id, facility_id, booking_date, start_time, end_time, status))
+
+        # Display a message about the result of the operation
+        if success:
+            self.view_booking.show_booking_message("Successfully Added New Booking")
+        else:
+            self.view_booking.show_booking_message("Booking Not Added")
+
+    def view_bookings(self):
+        page_size = self.view_booking.get_page_size()
+
+        if page_size:
+            # Browse page by page using keyset pagination on the primary key
+            pager = ControllerPager(self.model_booking.get_bookings_page, self.view_booking.show_booking)
+            pager.browse(page_size)
+        else:
+            # Call a method from the Model class to stream bookings row by row
+            bookings = self.model_booking.iter_bookings()
+
+            # Display bookings via a method from the View class
+            self.view_booking.show_booking(bookings)
+
+    def view_user_bookings(self):
+        user_id, since, page_size, details = self.view_booking.get_user_bookings_input()
+        limit = page_size or PAGE_SIZE
+
+        # Call a method from the Model class to get the first page of the user's bookings
+        bookings = self.model_booking.get_user_bookings(user_id, since, limit=limit, details=details)
+        if bookings is None:
+            return
+        if not bookings:
+            self.view_booking.show_booking_message("No Bookings Found For This User")
+            return
+
+        while True:
+            self.view_booking.show_user_bookings(bookings)
+            if len(bookings) < limit or self.view_booking.get_history_action() != 'n':
+                break
+            # The next page starts after the (booking date, booking ID) of the last row shown
+            last = bookings[-1]
+            next_bookings = self.model_booking.get_user_bookings(
+                user_id, cursor=(last[3], last[0]), limit=limit, details=details)
+            if not next_bookings:
+                self.view_booking.show_booking_message("This Is The Last Page")
+                break
+            bookings = next_bookings
+
+    def update_booking(self):
+        # Request the ID of the booking to be updated
+        booking_id = self.view_booking.get_booking_id()
+
+        # Request updated booking details from the user
+        user_id, facility_id, booking_date, start_time, end_time, status = (
+            self.view_booking.get_booking_input())
+        # Call a method from the Model class to update the booking; None means there is no such booking
+        success = (self.model_booking.update_booking
+                   (booking_id, user_id, facility_id, booking_date, start_time, end_time, status))
+
+        # Display a message about the result of the operation
+        if success:
+            self.view_booking.show_booking_message("Successfully Updated A Booking")
+        elif success is None:
+            self.view_booking.show_booking_message("Booking With This ID Does Not Exist")
+        else:
+            self.view_booking.show_booking_message("Booking Not Updated")
+
+    def delete_booking(self):
+        # Request the ID of the booking to be deleted
+        booking_id = self.view_booking.get_booking_id()
+
+        # Call a method from the Model class to delete a booking; None means there is no such booking
+        success = self.model_booking.delete_booking(booking_id)
+
+        # Display a message about the result of the operation
+        if success:
+            self.view_booking.show_booking_message("Successfully Deleted A Booking")
+        elif success is None:
+            self.view_booking.show_booking_message("Booking With The Specified ID Does Not Exist")
+        else:
+            self.view_booking.show_booking_message("Booking Not Deleted")
+
+    def create_booking_sequence(self):
+        # Call method create_booking_sequence from class Modelbooking
+        self.model_booking.create_booking_sequence()
+        self.view_booking.show_booking_message("Successfully Created Booking Sequence")
+
+    def generate_rand_booking_data(self, number_of_operations):
+        # Call method generate_rand_booking_data from class Modelbooking
+        created = self.model_booking.generate_rand_booking_data(number_of_operations)
+
+        if created:
+            self.view_booking.show_booking_message(
+                f"{created} Bookings Successfully Created")
+        else:
+            self.view_booking.show_booking_message("Booking Not Created")
+
+    def truncate_booking_table(self):
+        # Call the method of the corresponding model
+        success = self.model_booking.truncate_booking_table()
+
+        if success:
+            self.view_booking.show_booking_message("All Bookings Data Successfully Deleted")
+        else:
             self.view_booking.show_booking_message("All Bookings Data Not Deleted")
\ No newline at end of file
@@ -1,177 +1,326 @@
-import alch
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Time
-from sqlalchemy.orm import relationship
-
-
-class Booking(alch.Base):
-    __tablename__ = 'booking'
-    booking_id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
-    facility_id = Column(Integer, ForeignKey('facility.facility_id'), nullable=False)
-    booking_date = Column(DateTime, nullable=False)
-    start_time = Column(Time, nullable=False)
-    end_time = Column(Time, nullable=False)
-    status = Column(String, nullable=False)
-
-    user = relationship("User", back_populates="bookings")
-    facility = relationship("Facility", back_populates="bookings")
-    payments = relationship("Payment", back_populates="booking", cascade="all, delete-orphan")
-
-class ModelBooking:
-    def __init__(self, db_model):
-        self.conn = db_model.conn
-        self.engine = alch.create_engine(alch.DATABASE_URL)
-        self.session = alch.Session.configure(bind=self.engine)
-        self.session = alch.Session()
-
-    def add_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
-        try:
-            user_exists = self.session.query(Booking).filter_by(user_id=user_id).first()
-            facility_exists = self.session.query(Booking).filter_by(facility_id=facility_id).first()
-            if not user_exists or not facility_exists:
-                print("Error: User ID or Facility ID does not exist.")
-                return False
-            new_booking = Booking(
-                booking_id=booking_id,
-                user_id=user_id,
-                facility_id=facility_id,
-                booking_date=booking_date,
-                start_time=start_time,
-                end_time=end_time,
-                status=status
-            )
-            self.session.add(new_booking)
-            self.session.commit()
-            return True
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Adding A Booking: {str(e)}")
-            return False
-
-    def get_all_bookings(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT * FROM "booking"')
-            return c.fetchall()
-        except Exception as e:
-            print(f"Error With Retrieving Bookings: {str(e)}")
-            return None
-
-    def update_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
-        try:
-            user_exists = self.session.query(Booking).filter_by(user_id=user_id).first()
-            facility_exists = self.session.query(Booking).filter_by(facility_id=facility_id).first()
-            if not user_exists or not facility_exists:
-                print("Error: User ID or Facility ID does not exist.")
-                return False
-            booking = self.session.query(Booking).filter(Booking.booking_id == booking_id).first()
-            if booking:
-                booking.user_id = user_id
-                booking.facility_id = facility_id
-                booking.booking_date = booking_date
-                booking.start_time = start_time
-                booking.end_time = end_time
-                booking.status = status
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Updating A Booking: {str(e)}")
-            return False
-
-    def delete_booking(self, booking_id):
-        try:
-            booking = self.session.query(Booking).filter(Booking.booking_id == booking_id).first()
-            if booking:
-                self.session.delete(booking)
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Deleting A Booking: {str(e)}")
-            return False
-
-    def check_booking_existence(self, booking_id):
-        c = self.conn.cursor()
-        try:
-            # Перевірка існування запису
-            c.execute('SELECT 1 FROM "booking" WHERE "booking_id" = %s', (booking_id,))
-            return bool(c.fetchone())
-        except Exception as e:
-            print(f"Error With Checking Booking Existence: {str(e)}")
-            return False
-
-    def create_booking_sequence(self):
-        c = self.conn.cursor()
-        try:
-            # Створення або оновлення послідовності для booking_id
-            c.execute("""
-                DO $$
-                DECLARE
-                    max_id INT;
-                BEGIN
-                    -- Знаходимо максимальний booking_id
-                    SELECT COALESCE(MAX(booking_id), 0) INTO max_id FROM "booking";
-
-                    -- Перевіряємо, чи існує послідовність
-                    IF NOT EXISTS (
-                        SELECT 1 
-                        FROM pg_sequences 
-                        WHERE schemaname = 'public' AND sequencename = 'booking_id_seq'
-                    ) THEN
-                        -- Створення нової послідовності
-                        EXECUTE 'CREATE SEQUENCE booking_id_seq START WITH ' || (max_id + 1);
-                    ELSE
-                        -- Оновлення існуючої послідовності
-                        EXECUTE 'ALTER SEQUENCE booking_id_seq RESTART WITH ' || (max_id + 1);
-                    END IF;
-                END $$;
-            """)
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Creating Booking Sequence: {str(e)}")
-            return False
-
-    def generate_rand_booking_data(self, number_of_operations):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-              INSERT INTO "booking" ("booking_id", "booking_date", "start_time", "end_time", "status", "user_id", "facility_id")
-            SELECT 
-                nextval('booking_id_seq'), 
-                -- Випадкова дата і час в межах 30 днів від сьогодні
-                (CURRENT_DATE + (random() * 30)::int * interval '1 day') + (random() * interval '12 hours')::time AS booking_date,
-                -- Випадковий час початку (з округленням до секунд)
-                (CURRENT_TIME + (random() * interval '10 hours'))::time(2) AS start_time,
-                -- Випадковий час завершення (на 2 години пізніше)
-                ((CURRENT_TIME + (random() * interval '10 hours')) + interval '2 hours')::time(2) AS end_time,
-                -- Випадковий статус
-                (random() > 0.5)::boolean AS status,
-                -- Випадковий user_id
-                floor(random() * (SELECT max("user_id") FROM "Users") + 1)::integer AS user_id,
-                -- Випадковий facility_id
-                floor(random() * (SELECT max("facility_id") FROM "Facility") + 1)::integer AS facility_id
-            FROM generate_series(1, %s);
-            """, (number_of_operations,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Generating Booking Data: {str(e)}")
-            return False
-
-    def truncate_booking_table(self):
-        c = self.conn.cursor()
-        try:
-            # Очищення таблиці booking
-            c.execute('DELETE FROM "booking"')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Truncating Booking Table: {str(e)}")
+import datetime
+import prepared
+import psycopg
+from bulk_import import BulkImporter
+from export import Exporter
+from model import PAGE_SIZE, delete_batch, execute_batch, fetch_page, fetch_rows, stream_rows
+
+# Колонки в порядку аргументів add_booking (для пакетних методів)
+BOOKING_COLUMNS = ('booking_id', 'user_id', 'facility_id', 'booking_date', 'start_time', 'end_time', 'status')
+
+
+def user_bookings_query(user_id, since=None, cursor=None, limit=PAGE_SIZE, details=False):
+    """
+    Назва запиту з prepared.py і його параметри для сторінки get_user_bookings.
+    """
+    name = 'booking.user_bookings_details' if details else 'booking.user_bookings'
+    if cursor is None:
+        # Без нижньої межі дати - з найдавнішого бронювання
+        return name, (user_id, since or datetime.datetime.min, limit)
+    return name + '_after', (user_id, *cursor, limit)
+
+
+class ModelBooking:
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.existence = db_model.existence
+        self.reference = db_model.reference
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def add_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
+        try:
+            # Користувач перевіряється через кеш існування, об'єкт - через кеш довідкових таблиць
+            user_exists = self.existence.exists('users', user_id)
+            if not user_exists or self.reference.get_facility(facility_id) is None:
+                print("Error: User ID or Facility ID does not exist.")
+                return False
+            prepared.execute(self.conn, 'booking.insert', (
+                booking_id, user_id, facility_id, booking_date, start_time, end_time, status))
+            self.conn.commit()
+            self.existence.invalidate('booking', booking_id, cascade=False)
+            return True
+        except psycopg.errors.ExclusionViolation:
+            # Обмеження booking_no_overlap: об'єкт уже заброньовано на цей час
+            self.db_model.rollback()
+            print("Error: Facility Is Already Booked For This Time.")
+            return False
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding A Booking: {str(e)}")
+            return False
+
+    def get_all_bookings(self):
+        try:
+            return self.db_model.read(fetch_rows, 'SELECT * FROM "booking"')
+        except Exception as e:
+            print(f"Error With Retrieving Bookings: {str(e)}")
+            return None
+
+    def get_bookings_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        """
+        Повертає сторінку таблиці booking, впорядковану за booking_id.
+        """
+        try:
+            return self.db_model.read(fetch_page, "booking", "booking_id", after_id=after_id,
+                                      before_id=before_id, limit=limit)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Bookings: {str(e)}")
+            return None
+
+    def get_user_bookings(self, user_id, since=None, cursor=None, limit=PAGE_SIZE, details=False):
+        """
+        Повертає сторінку бронювань користувача user_id з датою від since, впорядковану
+        за (booking_date, booking_id). cursor - (booking_date, booking_id) останнього рядка
+        попередньої сторінки; з ним since не потрібен. Сторінка читається лише з індексу
+        booking_user_id_booking_date_idx, тож час не залежить від кількості бронювань.
+        З details=True до колонок BOOKING_COLUMNS додаються назва об'єкта, ID і назва
+        закладу, кількість платежів і сума успішних.
+        """
+        try:
+            name, params = user_bookings_query(user_id, since, cursor, limit, details)
+            return self.db_model.read(prepared.fetch_all, name, params)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving User Bookings: {str(e)}")
+            return None
+
+    def iter_bookings(self, itersize=None):
+        """
+        Повертає рядки таблиці booking по одному через серверний курсор.
+        """
+        try:
+            yield from stream_rows(self.conn, 'SELECT * FROM "booking"', itersize=itersize)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Bookings: {str(e)}")
+
+    def update_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
+        """
+        Оновлює бронювання одним запитом UPDATE ... RETURNING.
+        Повертає True, None (бронювання з таким ID немає) або False (помилка).
+        """
+        try:
+            if self.reference.get_facility(facility_id) is None:
+                print("Error: User ID or Facility ID does not exist.")
+                return False
+            updated = prepared.execute(self.conn, 'booking.update', (
+                user_id, facility_id, booking_date, start_time, end_time, status, booking_id)).fetchone()
+            self.conn.commit()
+            return True if updated else None
+        except psycopg.errors.ForeignKeyViolation:
+            self.db_model.rollback()
+            print("Error: User ID or Facility ID does not exist.")
+            return False
+        except psycopg.errors.ExclusionViolation:
+            # Обмеження booking_no_overlap: об'єкт уже заброньовано на цей час
+            self.db_model.rollback()
+            print("Error: Facility Is Already Booked For This Time.")
+            return False
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating A Booking: {str(e)}")
+            return False
+
+    def delete_booking(self, booking_id):
+        """
+        Видаляє бронювання одним запитом DELETE ... RETURNING (платежі - каскадом).
+        Повертає True, None (бронювання з таким ID немає) або False (помилка).
+        """
+        try:
+            deleted = prepared.execute(self.conn, 'booking.delete', (booking_id,)).fetchone()
+            self.conn.commit()
+            if not deleted:
+                return None
+            self.existence.invalidate('booking', booking_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting A Booking: {str(e)}")
+            return False
+
+    def add_bookings(self, rows):
+        """
+        Додає пачку бронювань одним запитом. rows - кортежі в порядку аргументів
+        add_booking або словники. Повертає список True/False для кожного рядка
+        (False - дублікат ID, неіснуючий користувач чи об'єкт або перетин часу)
+        або None, якщо пачку не записано.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'booking.add_many', "booking_id", rows, BOOKING_COLUMNS)
+            self.existence.invalidate('booking', cascade=False)
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding Bookings: {str(e)}")
+            return None
+
+    def update_bookings(self, rows):
+        """
+        Оновлює пачку бронювань одним запитом; формат rows як у add_bookings.
+        Повертає список True/False (False - бронювання чи батьківський рядок не існує) або None.
+        """
+        try:
+            return execute_batch(self.conn, 'booking.update_many', "booking_id", rows, BOOKING_COLUMNS)
+        except psycopg.errors.ExclusionViolation:
+            # Один перетин скасовує всю пачку, як і будь-яка інша помилка запиту
+            self.db_model.rollback()
+            print("Error: Facility Is Already Booked For This Time. No Bookings Were Updated.")
+            return None
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating Bookings: {str(e)}")
+            return None
+
+    def delete_bookings(self, booking_ids):
+        """
+        Видаляє бронювання за списком ID; повертає список True/False або None.
+        """
+        try:
+            outcomes = delete_batch(self.conn, "booking", booking_ids)
+            self.existence.invalidate('booking')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting Bookings: {str(e)}")
+            return None
+
+    def import_bookings(self, path, file_format=None):
+        """
+        Масово завантажує CSV або JSONL файл у таблицю booking через COPY.
+        Повертає кортеж (імпортовано, відхилено).
+        """
+        try:
+            result = BulkImporter(self.conn, "booking").import_file(path, file_format)
+            self.existence.invalidate('booking', cascade=False)
+            return result
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Importing Bookings: {str(e)}")
+            return None
+
+    def export_bookings(self, path, file_format=None, start=None, end=None):
+        """
+        Потоково вивантажує таблицю booking у CSV або JSONL файл (path='-' - stdout, .gz - gzip)
+        через COPY TO STDOUT; start/end відбирають рядки за датою [start, end).
+        Повертає кількість вивантажених рядків.
+        """
+        try:
+            return Exporter().export_table("booking", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Bookings: {str(e)}")
+            return None
+
+    def check_booking_existence(self, booking_id):
+        try:
+            # Перевірка існування запису
+            return bool(self.db_model.read(prepared.fetch_one, 'booking.exists', (booking_id,)))
+        except Exception as e:
+            print(f"Error With Checking Booking Existence: {str(e)}")
+            return False
+
+    def create_booking_sequence(self):
+        c = self.conn.cursor()
+        try:
+            # Створення або оновлення послідовності для booking_id
+            c.execute("""
+                DO $$
+                DECLARE
+                    max_id INT;
+                BEGIN
+                    -- Знаходимо максимальний booking_id
+                    SELECT COALESCE(MAX(booking_id), 0) INTO max_id FROM "booking";
+
+                    -- Перевіряємо, чи існує послідовність
+                    IF NOT EXISTS (
+                        SELECT 1 
+                        FROM pg_sequences 
+                        WHERE schemaname = 'public' AND sequencename = 'booking_id_seq'
+                    ) THEN
+                        -- Створення нової послідовності
+                        EXECUTE 'CREATE SEQUENCE booking_id_seq START WITH ' || (max_id + 1);
+                    ELSE
+                        -- Оновлення існуючої послідовності
+                        EXECUTE 'ALTER SEQUENCE booking_id_seq RESTART WITH ' || (max_id + 1);
+                    END IF;
+                END $$;
+            """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Creating Booking Sequence: {str(e)}")
+            return False
+
+    def generate_rand_booking_data(self, number_of_operations, conn=None, part=0, parts=1):
+        """
+        Повертає кількість вставлених рядків (бронювання, що перетнулися з наявними,
+        пропускаються) або None при помилці. Транзакцію переданого conn фіксує викликач.
+        part/parts обмежують вибір об'єктів кожним parts-м за порядком facility_id, починаючи
+        з part: паралельні пакети з різними part не перевіряють booking_no_overlap на тих
+        самих об'єктах і тому не блокують один одного.
+        """
+        commit = conn is None
+        conn = conn or self.conn
+        c = conn.cursor()
+        try:
+            c.execute("""
+            WITH "parents" AS (
+                -- Бронювання посилаються лише на наявних користувачів і об'єкти (в ідентифікаторах можуть бути пропуски)
+                SELECT
+                    (SELECT array_agg("user_id") FROM "users") AS user_ids,
+                    -- Об'єкти діляться між частинами за позицією, а не за залишком ID: пропуски
+                    -- в ідентифікаторах не лишають частину без об'єктів
+                    (SELECT array_agg("facility_id") FROM (
+                        SELECT "facility_id", row_number() OVER (ORDER BY "facility_id") AS "position"
+                        FROM "facility"
+                    ) AS f WHERE ("position" - 1) %% %s = %s) AS facility_ids
+            )
+              INSERT INTO "booking" ("booking_id", "booking_date", "start_time", "end_time", "status", "user_id", "facility_id")
+            SELECT 
+                nextval('booking_id_seq'), 
+                -- Дата в межах 30 днів від сьогодні, що зростає з номером рядка (BRIN-індекс по
+                -- booking_date залишається вибірковим), і випадковий час
+                (CURRENT_DATE + floor((n - 1) * 31.0 / %s)::int * interval '1 day')
+                    + (random() * interval '12 hours')::time AS booking_date,
+                -- Випадковий час початку від 08:00 (з округленням до секунд); від часу запуску
+                -- він не залежить, тож після setseed() генерація відтворювана
+                (time '08:00' + (random() * interval '10 hours'))::time(2) AS start_time,
+                -- Випадковий час завершення (на 2 години пізніше)
+                ((time '08:00' + (random() * interval '10 hours')) + interval '2 hours')::time(2) AS end_time,
+                -- Випадковий статус
+                (random() > 0.5)::boolean AS status,
+                -- Випадковий user_id
+                user_ids[floor(random() * cardinality(user_ids)) + 1] AS user_id,
+                -- Випадковий facility_id
+                facility_ids[floor(random() * cardinality(facility_ids)) + 1] AS facility_id
+            FROM generate_series(1, %s) AS g(n), "parents"
+            WHERE user_ids IS NOT NULL AND facility_ids IS NOT NULL
+            -- Бронювання, що перетинаються з уже існуючими, пропускаються
+            ON CONFLICT DO NOTHING;
+            """, (parts, part, number_of_operations, number_of_operations))
+            if commit:
+                conn.commit()
+            self.existence.invalidate('booking', cascade=False)
+            return c.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error With Generating Booking Data: {str(e)}")
+            return None
+
+    def truncate_booking_table(self):
+        c = self.conn.cursor()
+        try:
+            # Очищення таблиці booking
+            c.execute('DELETE FROM "booking"')
+            self.conn.commit()
+            self.existence.invalidate('booking')
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Truncating Booking Table: {str(e)}")
             return False
\ No newline at end of file
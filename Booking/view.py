@@ -1,21 +1,50 @@
-class ViewBooking:
-    def show_booking(self, bookings):
-        print("Bookings:")
-        for booking in bookings:
-            print(
-                f"Booking ID: {booking[0]},User ID: {booking[1]}, Facility ID: {booking[2]} Booking date: {booking[3]}, Start time: {booking[4]}, End time: {booking[5]}, Status: {booking[6]} ")
-            
-    def get_booking_input(self):
-        booking_date = input("Input booking date(HH:MM:SS): ")
-        start_time = input("Input start time (HH:MM:SS): ")
-        end_time = input("Input end time (HH:MM:SS): ")
-        status = input("Input status: ")
-        user_id = int(input("Input User ID: "))
-        facility_id = int(input("Input Facility ID: "))
-        return booking_date, start_time, end_time, status, user_id, facility_id
-    
-    def get_booking_id(self):
-        return int(input("Input Booking ID: "))
-    
-    def show_booking_message(self, message):
+import datetime
+
+
+class ViewBooking:
+    def show_booking(self, bookings):
+        print("Bookings:")
+        for booking in bookings:
+            print(
+                f"Booking ID: {booking[0]},User ID: {booking[1]}, Facility ID: {booking[2]} Booking date: {booking[3]}, Start time: {booking[4]}, End time: {booking[5]}, Status: {booking[6]} ")
+            
+    def get_booking_input(self):
+        booking_date = input("Input booking date (YYYY-MM-DD): ")
+        start_time = input("Input start time (HH:MM:SS): ")
+        end_time = input("Input end time (HH:MM:SS): ")
+        status = input("Input status (true/false): ").strip().lower() in ('true', 't', 'yes', '1')
+        user_id = int(input("Input User ID: "))
+        facility_id = int(input("Input Facility ID: "))
+        return user_id, facility_id, booking_date, start_time, end_time, status
+    
+    def get_page_size(self):
+        page_size = input("Input page size (Enter to show all): ")
+        return int(page_size) if page_size else None
+
+    def show_user_bookings(self, bookings):
+        print("User Bookings:")
+        for booking in bookings:
+            line = (f"Booking ID: {booking[0]}, Facility ID: {booking[2]}, Booking date: {booking[3]}, "
+                    f"Start time: {booking[4]}, End time: {booking[5]}, Status: {booking[6]}")
+            if len(booking) > 7:
+                # Подробиці: об'єкт, заклад, кількість платежів і сума успішних
+                line += (f", Facility: {booking[7]}, Venue: {booking[9]} (ID {booking[8]}), "
+                         f"Payments: {booking[10]}, Paid: {booking[11] or 0}")
+            print(line)
+
+    def get_user_bookings_input(self):
+        user_id = int(input("Input User ID: "))
+        since = input("Show from date (YYYY-MM-DD, Enter for all): ").strip()
+        page_size = input("Input page size (Enter for default): ")
+        details = input("Show facility, venue and payment details (y/n): ").strip().lower() in ('y', 'yes')
+        return (user_id, datetime.datetime.fromisoformat(since) if since else None,
+                int(page_size) if page_size else None, details)
+
+    def get_history_action(self):
+        return input("[N]ext, [Q]uit: ").strip().lower()
+
+    def get_booking_id(self):
+        return int(input("Input Booking ID: "))
+    
+    def show_booking_message(self, message):
         print(message)
\ No newline at end of file
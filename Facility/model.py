@@ -1,170 +1,310 @@
-import alch
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
-
-
-class Facility(alch.Base):
-    __tablename__ = 'facility'
-    facility_id = Column(Integer, primary_key=True)
-    facility_name = Column(String, nullable=False)
-    facility_type = Column(String, nullable=False)
-    venue_id = Column(Integer, ForeignKey('venue.venue_id'), nullable=False)
-
-    bookings = relationship("Booking", back_populates="facility")
-
-
-class ModelFacility:
-    def __init__(self, db_model):
-        self.conn = db_model.conn
-        self.engine = alch.create_engine(alch.DATABASE_URL)
-        self.session = alch.Session.configure(bind=self.engine)
-        self.session = alch.Session()
-
-    def add_facility(self, facility_id, facility_name, facility_type, venue_id):
-        """
-        Додає новий об'єкт до таблиці Facility.
-        """
-        try:
-            venue_exists = self.session.query(Facility).filter_by(venue_id=venue_id).first()
-            if not venue_exists:
-                print("Error: Venue ID does not exist.")
-                return False
-
-            new_facility = Facility(
-                facility_id=facility_id,
-                facility_name=facility_name,
-                facility_type=facility_type,
-                venue_id=venue_id
-            )
-            self.session.add(new_facility)
-            self.session.commit()
-            return True 
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Adding A Facility: {str(e)}")
-            return False 
-
-    def get_all_facilities(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT * FROM "facility"')
-            return c.fetchall()
-        except Exception as e:
-            print(f"Error With Retrieving Facilities: {str(e)}")
-            return None
-
-    def update_facility(self, facility_id, facility_name, facility_type, venue_id):
-        """
-        Оновлює дані об'єкта Facility за його ID.
-        """
-        try:
-            venue_exists = self.session.query(Facility).filter_by(venue_id=venue_id).first()
-            if not venue_exists:
-                print("Error: Venue ID does not exist.")
-                return False
-
-            facility = self.session.query(Facility).filter(Facility.facility_id == facility_id).first()
-            if facility:
-                facility.facility_name = facility_name
-                facility.facility_type = facility_type
-                facility.venue_id = venue_id
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Updating A Facility: {str(e)}")
-            return False
-
-    def delete_facility(self, facility_id):
-        """
-        Видаляє об'єкт Facility за його ID.
-        """
-        try:
-            facility = self.session.query(Facility).filter(Facility.facility_id == facility_id).first()
-            if facility:
-                self.session.delete(facility)
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Deleting A Facility: {str(e)}")
-            return False 
-
-    def check_facility_existence(self, facility_id):
-        c = self.conn.cursor()
-        try:
-            # Перевірка існування запису
-            c.execute('SELECT 1 FROM "facility" WHERE "facility_id" = %s', (facility_id,))
-            return bool(c.fetchone())
-        except Exception as e:
-            print(f"Error With Checking Facility Existence: {str(e)}")
-            return False
-
-    def create_facility_sequence(self):
-        c = self.conn.cursor()
-        try:
-            # Створення або оновлення послідовності для facility_id
-            c.execute("""
-                DO $$
-                DECLARE
-                    max_id INT;
-                BEGIN
-                    -- Знаходимо максимальний facility_id
-                    SELECT COALESCE(MAX(facility_id), 0) INTO max_id FROM "facility";
-
-                    -- Перевіряємо, чи існує послідовність
-                    IF NOT EXISTS (
-                        SELECT 1 
-                        FROM pg_sequences 
-                        WHERE schemaname = 'public' AND sequencename = 'facility_id_seq'
-                    ) THEN
-                        -- Створення нової послідовності
-                        EXECUTE 'CREATE SEQUENCE facility_id_seq START WITH ' || (max_id + 1);
-                    ELSE
-                        -- Оновлення існуючої послідовності
-                        EXECUTE 'ALTER SEQUENCE facility_id_seq RESTART WITH ' || (max_id + 1);
-                    END IF;
-                END $$;
-            """)
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Creating Facility Sequence: {str(e)}")
-            return False
-
-    def generate_rand_facility_data(self, number_of_operations):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                INSERT INTO "facility" ("facility_id", "facility_name", "facility_type", "venue_id")
-                SELECT 
-                    nextval('facility_id_seq'),
-                    (array['Football', 'Basketball', 'Voleyball', 'Golf', 'Tennis'])[floor(random() * 5) + 1] AS facility_name,
-                    CASE 
-                        WHEN random() < 0.5 THEN 'Indoor'
-                        ELSE 'Outdoor'
-                    END AS facility_type,
-                    floor(random() * (SELECT max("venue_id") FROM "venue") + 1)::int AS venue_id
-                FROM generate_series(1, %s);
-            """, (number_of_operations,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Generating Facility Data: {str(e)}")
-            return False
-
-    def truncate_facility_table(self):
-        c = self.conn.cursor()
-        try:
-            # Очищення таблиці facility
-            c.execute('DELETE FROM "facility"')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Truncating Facility Table: {str(e)}")
-            return False
+import prepared
+import psycopg
+from bulk_import import BulkImporter
+from export import Exporter
+from model import PAGE_SIZE, delete_batch, execute_batch, fetch_page, fetch_rows, stream_rows
+
+# Колонки в порядку аргументів add_facility (для пакетних методів)
+FACILITY_COLUMNS = ('facility_id', 'facility_name', 'facility_type', 'venue_id')
+
+
+class ModelFacility:
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.existence = db_model.existence
+        self.reference = db_model.reference
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def add_facility(self, facility_id, facility_name, facility_type, venue_id):
+        """
+        Додає новий об'єкт до таблиці Facility.
+        """
+        try:
+            # Заклад читається через кеш довідкових таблиць
+            if self.reference.get_venue(venue_id) is None:
+                print("Error: Venue ID does not exist.")
+                return False
+
+            prepared.execute(self.conn, 'facility.insert', (facility_id, facility_name, facility_type, venue_id))
+            self.conn.commit()
+            self.existence.invalidate('facility', facility_id, cascade=False)
+            # Кеш міг запам'ятати відсутність об'єкта і список об'єктів закладу без нього
+            self.reference.invalidate('facility', facility_id, venue_id)
+            return True 
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding A Facility: {str(e)}")
+            return False 
+
+    def get_facility(self, facility_id):
+        """
+        Повертає об'єкт за ID (None, якщо його немає) через кеш довідкових таблиць.
+        """
+        try:
+            return self.reference.get_facility(facility_id)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Facility: {str(e)}")
+            return None
+
+    def get_venue_facilities(self, venue_id):
+        """
+        Повертає об'єкти закладу через кеш довідкових таблиць.
+        """
+        try:
+            return self.reference.get_venue_facilities(venue_id)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Facilities: {str(e)}")
+            return None
+
+    def get_all_facilities(self):
+        try:
+            return self.db_model.read(fetch_rows, 'SELECT * FROM "facility"')
+        except Exception as e:
+            print(f"Error With Retrieving Facilities: {str(e)}")
+            return None
+
+    def get_facilities_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        """
+        Повертає сторінку таблиці facility, впорядковану за facility_id.
+        """
+        try:
+            return self.db_model.read(fetch_page, "facility", "facility_id", after_id=after_id,
+                                      before_id=before_id, limit=limit)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Facilities: {str(e)}")
+            return None
+
+    def iter_facilities(self, itersize=None):
+        """
+        Повертає рядки таблиці facility по одному через серверний курсор.
+        """
+        try:
+            yield from stream_rows(self.conn, 'SELECT * FROM "facility"', itersize=itersize)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Facilities: {str(e)}")
+
+    def update_facility(self, facility_id, facility_name, facility_type, venue_id):
+        """
+        Оновлює дані об'єкта Facility за його ID одним запитом UPDATE ... RETURNING.
+        Повертає True, None (об'єкта з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = prepared.execute(self.conn, 'facility.update', (
+                facility_name, facility_type, venue_id, facility_id)).fetchone()
+            self.conn.commit()
+            if not updated:
+                return None
+            old_venue_id, venue_id = updated
+            self.reference.invalidate('facility', facility_id, old_venue_id)
+            self.reference.invalidate('facility', facility_id, venue_id)
+            return True
+        except psycopg.errors.ForeignKeyViolation:
+            self.db_model.rollback()
+            print("Error: Venue ID does not exist.")
+            return False
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating A Facility: {str(e)}")
+            return False
+
+    def delete_facility(self, facility_id):
+        """
+        Видаляє об'єкт Facility за його ID одним запитом DELETE ... RETURNING.
+        Повертає True, None (об'єкта з таким ID немає) або False (помилка).
+        """
+        try:
+            deleted = prepared.execute(self.conn, 'facility.delete', (facility_id,)).fetchone()
+            self.conn.commit()
+            if not deleted:
+                return None
+            self.existence.invalidate('facility', facility_id)
+            self.reference.invalidate('facility', facility_id, deleted[0])
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting A Facility: {str(e)}")
+            return False
+
+    def add_facilities(self, rows):
+        """
+        Додає пачку об'єктів одним запитом. rows - кортежі в порядку аргументів
+        add_facility або словники. Повертає список True/False для кожного рядка
+        (False - дублікат ID або неіснуючий заклад) або None, якщо пачку не записано.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'facility.add_many', "facility_id", rows, FACILITY_COLUMNS)
+            self.existence.invalidate('facility', cascade=False)
+            self.reference.invalidate('facility')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding Facilities: {str(e)}")
+            return None
+
+    def update_facilities(self, rows):
+        """
+        Оновлює пачку об'єктів одним запитом; формат rows як у add_facilities.
+        Повертає список True/False (False - об'єкт чи заклад не існує) або None.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'facility.update_many', "facility_id", rows, FACILITY_COLUMNS)
+            self.reference.invalidate('facility')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating Facilities: {str(e)}")
+            return None
+
+    def delete_facilities(self, facility_ids):
+        """
+        Видаляє об'єкти за списком ID; повертає список True/False або None.
+        """
+        try:
+            outcomes = delete_batch(self.conn, "facility", facility_ids)
+            self.existence.invalidate('facility')
+            self.reference.invalidate('facility')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting Facilities: {str(e)}")
+            return None
+
+    def import_facilities(self, path, file_format=None):
+        """
+        Масово завантажує CSV або JSONL файл у таблицю facility через COPY.
+        Повертає кортеж (імпортовано, відхилено).
+        """
+        try:
+            result = BulkImporter(self.conn, "facility").import_file(path, file_format)
+            self.existence.invalidate('facility', cascade=False)
+            self.reference.invalidate('facility')
+            return result
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Importing Facilities: {str(e)}")
+            return None
+
+    def export_facilities(self, path, file_format=None):
+        """
+        Потоково вивантажує таблицю facility у CSV або JSONL файл (path='-' - stdout, .gz - gzip)
+        через COPY TO STDOUT. Повертає кількість вивантажених рядків.
+        """
+        try:
+            return Exporter().export_table("facility", path, file_format)
+        except Exception as e:
+            print(f"Error With Exporting Facilities: {str(e)}")
+            return None
+
+    def find_free_facilities(self, venue_id, facility_type, window):
+        """
+        Повертає об'єкти заданого типу в закладі, що не мають активних бронювань,
+        які перетинаються з вікном window = (початок, кінець). Об'єкти закладу читаються
+        через кеш довідкових таблиць, з бази - лише бронювання цих об'єктів.
+        """
+        start, end = window
+        try:
+            candidates = [row for row in self.reference.get_venue_facilities(venue_id) if row[3] == facility_type]
+            if not candidates:
+                return []
+            free = {row[0] for row in self.db_model.read(prepared.fetch_all, 'facility.find_free',
+                                                         ([row[0] for row in candidates], start, end))}
+            return [row for row in candidates if row[0] in free]
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Finding Free Facilities: {str(e)}")
+            return None
+
+    def check_facility_existence(self, facility_id):
+        try:
+            # Перевірка існування запису
+            return bool(self.db_model.read(prepared.fetch_one, 'facility.exists', (facility_id,)))
+        except Exception as e:
+            print(f"Error With Checking Facility Existence: {str(e)}")
+            return False
+
+    def create_facility_sequence(self):
+        c = self.conn.cursor()
+        try:
+            # Створення або оновлення послідовності для facility_id
+            c.execute("""
+                DO $$
+                DECLARE
+                    max_id INT;
+                BEGIN
+                    -- Знаходимо максимальний facility_id
+                    SELECT COALESCE(MAX(facility_id), 0) INTO max_id FROM "facility";
+
+                    -- Перевіряємо, чи існує послідовність
+                    IF NOT EXISTS (
+                        SELECT 1 
+                        FROM pg_sequences 
+                        WHERE schemaname = 'public' AND sequencename = 'facility_id_seq'
+                    ) THEN
+                        -- Створення нової послідовності
+                        EXECUTE 'CREATE SEQUENCE facility_id_seq START WITH ' || (max_id + 1);
+                    ELSE
+                        -- Оновлення існуючої послідовності
+                        EXECUTE 'ALTER SEQUENCE facility_id_seq RESTART WITH ' || (max_id + 1);
+                    END IF;
+                END $$;
+            """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Creating Facility Sequence: {str(e)}")
+            return False
+
+    def generate_rand_facility_data(self, number_of_operations, conn=None):
+        commit = conn is None
+        conn = conn or self.conn
+        c = conn.cursor()
+        try:
+            c.execute("""
+                WITH "venues" AS (
+                    -- Об'єкти посилаються лише на наявні заклади (в ідентифікаторах можуть бути пропуски)
+                    SELECT array_agg("venue_id") AS ids FROM "venue"
+                )
+                INSERT INTO "facility" ("facility_id", "facility_name", "facility_type", "venue_id")
+                SELECT 
+                    nextval('facility_id_seq'),
+                    (array['Football', 'Basketball', 'Voleyball', 'Golf', 'Tennis'])[floor(random() * 5) + 1] AS facility_name,
+                    CASE 
+                        WHEN random() < 0.5 THEN 'Indoor'
+                        ELSE 'Outdoor'
+                    END AS facility_type,
+                    ids[floor(random() * cardinality(ids)) + 1] AS venue_id
+                FROM generate_series(1, %s), "venues"
+                WHERE ids IS NOT NULL;
+            """, (number_of_operations,))
+            if commit:
+                conn.commit()
+            self.existence.invalidate('facility', cascade=False)
+            self.reference.invalidate('facility')
+            return c.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error With Generating Facility Data: {str(e)}")
+            return None
+
+    def truncate_facility_table(self):
+        c = self.conn.cursor()
+        try:
+            # Очищення таблиці facility
+            c.execute('DELETE FROM "facility"')
+            self.conn.commit()
+            self.existence.invalidate('facility')
+            self.reference.invalidate('facility')
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Truncating Facility Table: {str(e)}")
+            return False
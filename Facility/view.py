@@ -1,18 +1,29 @@
-class ViewFacility:
-    def show_facility(self, facilities):
-        print("Facilities:")
-        for facility in facilities:
-            print(
-                f"Facility ID: {facility[0]},Venue ID: {facility[1]}, Name: {facility[2]}, Type: {facility[3]} ")
-            
-    def get_facility_input(self):
-        facility_name = input("Input facility name: ")
-        facility_type = input("Input facility type: ")
-        venue_id = int(input("Input Venue ID: "))
-        return facility_name, facility_type, venue_id
-    
-    def get_facility_id(self):
-        return int(input("Input Facility ID: "))
-    
-    def show_facility_message(self, message):
+class ViewFacility:
+    def show_facility(self, facilities):
+        print("Facilities:")
+        for facility in facilities:
+            print(
+                f"Facility ID: {facility[0]},Venue ID: {facility[1]}, Name: {facility[2]}, Type: {facility[3]} ")
+            
+    def get_facility_input(self):
+        facility_name = input("Input facility name: ")
+        facility_type = input("Input facility type: ")
+        venue_id = int(input("Input Venue ID: "))
+        return venue_id, facility_name, facility_type
+    
+    def get_page_size(self):
+        page_size = input("Input page size (Enter to show all): ")
+        return int(page_size) if page_size else None
+
+    def get_availability_input(self):
+        venue_id = int(input("Input Venue ID: "))
+        facility_type = input("Input facility type: ")
+        start = input("Input start (YYYY-MM-DD HH:MM): ")
+        end = input("Input end (YYYY-MM-DD HH:MM): ")
+        return venue_id, facility_type, (start, end)
+
+    def get_facility_id(self):
+        return int(input("Input Facility ID: "))
+    
+    def show_facility_message(self, message):
         print(message)
\ No newline at end of file
@@ -1,176 +1,260 @@
-import alch
-from sqlalchemy import Column, Integer, Float, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
-
-
-class Payment(alch.Base):
-    __tablename__ = 'payment'
-    payment_id = Column(Integer, primary_key=True)
-    booking_id = Column(Integer, ForeignKey('booking.booking_id'), nullable=False)
-    amount = Column(Float, nullable=False)
-    payment_date = Column(DateTime, nullable=False)
-    payment_status = Column(Boolean, nullable=False)
-
-    booking = relationship("Booking", back_populates="payments")
-
-
-# Клас для операцій із таблицею Payment
-class ModelPayment:
-    def __init__(self, db_model):
-        self.conn = db_model.conn  # Для сумісності зі старою структурою
-        self.engine = alch.create_engine(alch.DATABASE_URL)
-        self.session = alch.Session.configure(bind=self.engine)
-        self.session = alch.Session()
-
-    def add_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
-        """
-        Додає новий платіж до таблиці.
-        """
-        try:
-            # Перевірка існування booking_id
-            booking_exists = self.session.query(Payment).filter_by(booking_id=booking_id).first()
-            if not booking_exists:
-                print("Error: Booking ID does not exist.")
-                return False
-
-            new_payment = Payment(
-                payment_id=payment_id,
-                booking_id=booking_id,
-                amount=amount,
-                payment_date=payment_date,
-                payment_status=payment_status
-            )
-            self.session.add(new_payment)
-            self.session.commit()
-            return True
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Adding A Payment: {str(e)}")
-            return False  
-
-    def get_all_payments(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT * FROM "payment"')
-            return c.fetchall()
-        except Exception as e:
-            print(f"Error With Retrieving Payments: {str(e)}")
-            return None
-
-    def update_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
-        """
-        Оновлює дані платежу за його ID.
-        """
-        try:
-            booking_exists = self.session.query(Payment).filter_by(booking_id=booking_id).first()
-            if not booking_exists:
-                print("Error: Booking ID does not exist.")
-                return False
-
-            payment = self.session.query(Payment).filter(Payment.payment_id == payment_id).first()
-            if payment:
-                payment.booking_id = booking_id
-                payment.amount = amount
-                payment.payment_date = payment_date
-                payment.payment_status = payment_status
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Updating A Payment: {str(e)}")
-            return False
-
-    def delete_payment(self, payment_id):
-        """
-        Видаляє платіж за його ID.
-        """
-        try:
-            payment = self.session.query(Payment).filter(Payment.payment_id == payment_id).first()
-            if payment:
-                self.session.delete(payment)
-                self.session.commit()
-                return True
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error With Deleting A Payment: {str(e)}")
-            return False 
-
-    def check_payment_existence(self, payment_id):
-        c = self.conn.cursor()
-        try:
-            # Перевірка існування запису
-            c.execute('SELECT 1 FROM "payment" WHERE "payment_id" = %s', (payment_id,))
-            return bool(c.fetchone())
-        except Exception as e:
-            print(f"Error With Checking Payment Existence: {str(e)}")
-            return False
-
-    def create_payment_sequence(self):
-        c = self.conn.cursor()
-        try:
-            # Створення або оновлення послідовності для payment_id
-            c.execute("""
-                DO $$
-                DECLARE
-                    max_id INT;
-                BEGIN
-                    -- Знаходимо максимальний payment_id
-                    SELECT COALESCE(MAX(payment_id), 0) INTO max_id FROM "payment";
-
-                    -- Перевіряємо, чи існує послідовність
-                    IF NOT EXISTS (
-                        SELECT 1 
-                        FROM pg_sequences 
-                        WHERE schemaname = 'public' AND sequencename = 'payment_id_seq'
-                    ) THEN
-                        -- Створення нової послідовності
-                        EXECUTE 'CREATE SEQUENCE payment_id_seq START WITH ' || (max_id + 1);
-                    ELSE
-                        -- Оновлення існуючої послідовності
-                        EXECUTE 'ALTER SEQUENCE payment_id_seq RESTART WITH ' || (max_id + 1);
-                    END IF;
-                END $$;
-            """)
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Creating Payment Sequence: {str(e)}")
-            return False
-
-    def generate_rand_payment_data(self, number_of_operations):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                INSERT INTO "payment" ("payment_id", "booking_id", "amount", "payment_date", "payment_status")
-                SELECT 
-                    nextval('payment_id_seq'),
-                    floor(random() * (COALESCE((SELECT max("booking_id") FROM "booking"), 1)) + 1)::int AS booking_id,
-                    round((random() * 100 + 50)::numeric, 2) AS amount,
-                    clock_timestamp() - (random() * interval '30 days') AS payment_date,
-                    CASE 
-                        WHEN random() < 0.5 THEN true
-                        ELSE false
-                    END AS payment_status
-                FROM generate_series(1, %s);
-            """, (number_of_operations,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Generating Payment Data: {str(e)}")
-            return False
-
-    def truncate_payment_table(self):
-        c = self.conn.cursor()
-        try:
-            # Очищення таблиці payment
-            c.execute('DELETE FROM "payment"')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Truncating Payment Table: {str(e)}")
-            return False
+import prepared
+import psycopg
+from bulk_import import BulkImporter
+from export import Exporter
+from model import PAGE_SIZE, delete_batch, execute_batch, fetch_page, fetch_rows, stream_rows
+
+# Колонки в порядку аргументів add_payment (для пакетних методів)
+PAYMENT_COLUMNS = ('payment_id', 'booking_id', 'amount', 'payment_date', 'payment_status')
+
+
+# Клас для операцій із таблицею Payment
+class ModelPayment:
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.existence = db_model.existence
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def add_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
+        """
+        Додає новий платіж до таблиці.
+        """
+        try:
+            # Перевірка існування booking_id у таблиці booking через кеш
+            booking_exists = self.existence.exists('booking', booking_id)
+            if not booking_exists:
+                print("Error: Booking ID does not exist.")
+                return False
+
+            prepared.execute(self.conn, 'payment.insert', (
+                payment_id, booking_id, amount, payment_date, payment_status))
+            self.conn.commit()
+            self.existence.invalidate('payment', payment_id, cascade=False)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding A Payment: {str(e)}")
+            return False  
+
+    def get_all_payments(self):
+        try:
+            return self.db_model.read(fetch_rows, 'SELECT * FROM "payment"')
+        except Exception as e:
+            print(f"Error With Retrieving Payments: {str(e)}")
+            return None
+
+    def get_payments_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        """
+        Повертає сторінку таблиці payment, впорядковану за payment_id.
+        """
+        try:
+            return self.db_model.read(fetch_page, "payment", "payment_id", after_id=after_id,
+                                      before_id=before_id, limit=limit)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Payments: {str(e)}")
+            return None
+
+    def iter_payments(self, itersize=None):
+        """
+        Повертає рядки таблиці payment по одному через серверний курсор.
+        """
+        try:
+            yield from stream_rows(self.conn, 'SELECT * FROM "payment"', itersize=itersize)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Retrieving Payments: {str(e)}")
+
+    def update_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
+        """
+        Оновлює дані платежу за його ID одним запитом UPDATE ... RETURNING.
+        Повертає True, None (платежу з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = prepared.execute(self.conn, 'payment.update', (
+                booking_id, amount, payment_date, payment_status, payment_id)).fetchone()
+            self.conn.commit()
+            return True if updated else None
+        except psycopg.errors.ForeignKeyViolation:
+            self.db_model.rollback()
+            print("Error: Booking ID does not exist.")
+            return False
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating A Payment: {str(e)}")
+            return False
+
+    def delete_payment(self, payment_id):
+        """
+        Видаляє платіж за його ID одним запитом DELETE ... RETURNING.
+        Повертає True, None (платежу з таким ID немає) або False (помилка).
+        """
+        try:
+            deleted = prepared.execute(self.conn, 'payment.delete', (payment_id,)).fetchone()
+            self.conn.commit()
+            if not deleted:
+                return None
+            self.existence.invalidate('payment', payment_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting A Payment: {str(e)}")
+            return False
+
+    def add_payments(self, rows):
+        """
+        Додає пачку платежів одним запитом. rows - кортежі в порядку аргументів
+        add_payment або словники. Повертає список True/False для кожного рядка
+        (False - дублікат ID або неіснуюче бронювання) або None, якщо пачку не записано.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'payment.add_many', "payment_id", rows, PAYMENT_COLUMNS)
+            self.existence.invalidate('payment', cascade=False)
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Adding Payments: {str(e)}")
+            return None
+
+    def update_payments(self, rows):
+        """
+        Оновлює пачку платежів одним запитом; формат rows як у add_payments.
+        Повертає список True/False (False - платіж чи бронювання не існує) або None.
+        """
+        try:
+            return execute_batch(self.conn, 'payment.update_many', "payment_id", rows, PAYMENT_COLUMNS)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Updating Payments: {str(e)}")
+            return None
+
+    def delete_payments(self, payment_ids):
+        """
+        Видаляє платежі за списком ID; повертає список True/False або None.
+        """
+        try:
+            outcomes = delete_batch(self.conn, "payment", payment_ids)
+            self.existence.invalidate('payment')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Deleting Payments: {str(e)}")
+            return None
+
+    def import_payments(self, path, file_format=None):
+        """
+        Масово завантажує CSV або JSONL файл у таблицю payment через COPY.
+        Повертає кортеж (імпортовано, відхилено).
+        """
+        try:
+            result = BulkImporter(self.conn, "payment").import_file(path, file_format)
+            self.existence.invalidate('payment', cascade=False)
+            return result
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Importing Payments: {str(e)}")
+            return None
+
+    def export_payments(self, path, file_format=None, start=None, end=None):
+        """
+        Потоково вивантажує таблицю payment у CSV або JSONL файл (path='-' - stdout, .gz - gzip)
+        через COPY TO STDOUT; start/end відбирають рядки за датою [start, end).
+        Повертає кількість вивантажених рядків.
+        """
+        try:
+            return Exporter().export_table("payment", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Payments: {str(e)}")
+            return None
+
+    def check_payment_existence(self, payment_id):
+        try:
+            # Перевірка існування запису
+            return bool(self.db_model.read(prepared.fetch_one, 'payment.exists', (payment_id,)))
+        except Exception as e:
+            print(f"Error With Checking Payment Existence: {str(e)}")
+            return False
+
+    def create_payment_sequence(self):
+        c = self.conn.cursor()
+        try:
+            # Створення або оновлення послідовності для payment_id
+            c.execute("""
+                DO $$
+                DECLARE
+                    max_id INT;
+                BEGIN
+                    -- Знаходимо максимальний payment_id
+                    SELECT COALESCE(MAX(payment_id), 0) INTO max_id FROM "payment";
+
+                    -- Перевіряємо, чи існує послідовність
+                    IF NOT EXISTS (
+                        SELECT 1 
+                        FROM pg_sequences 
+                        WHERE schemaname = 'public' AND sequencename = 'payment_id_seq'
+                    ) THEN
+                        -- Створення нової послідовності
+                        EXECUTE 'CREATE SEQUENCE payment_id_seq START WITH ' || (max_id + 1);
+                    ELSE
+                        -- Оновлення існуючої послідовності
+                        EXECUTE 'ALTER SEQUENCE payment_id_seq RESTART WITH ' || (max_id + 1);
+                    END IF;
+                END $$;
+            """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Creating Payment Sequence: {str(e)}")
+            return False
+
+    def generate_rand_payment_data(self, number_of_operations, conn=None):
+        commit = conn is None
+        conn = conn or self.conn
+        c = conn.cursor()
+        try:
+            c.execute("""
+                WITH "bookings" AS (
+                    -- Платежі посилаються лише на наявні бронювання (в ідентифікаторах можуть бути пропуски)
+                    SELECT array_agg("booking_id") AS ids FROM "booking"
+                )
+                INSERT INTO "payment" ("payment_id", "booking_id", "amount", "payment_date", "payment_status")
+                SELECT 
+                    nextval('payment_id_seq'),
+                    ids[floor(random() * cardinality(ids)) + 1] AS booking_id,
+                    round((random() * 100 + 50)::numeric, 2) AS amount,
+                    -- Дата за останні 30 днів, що зростає з номером рядка: BRIN-індекс
+                    -- по payment_date залишається вибірковим
+                    clock_timestamp() - (1 - (n - random()) / %s) * interval '30 days' AS payment_date,
+                    CASE 
+                        WHEN random() < 0.5 THEN true
+                        ELSE false
+                    END AS payment_status
+                FROM generate_series(1, %s) AS g(n), "bookings"
+                WHERE ids IS NOT NULL;
+            """, (number_of_operations, number_of_operations))
+            if commit:
+                conn.commit()
+            self.existence.invalidate('payment', cascade=False)
+            return c.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error With Generating Payment Data: {str(e)}")
+            return None
+
+    def truncate_payment_table(self):
+        c = self.conn.cursor()
+        try:
+            # Очищення таблиці payment
+            c.execute('DELETE FROM "payment"')
+            self.conn.commit()
+            self.existence.invalidate('payment')
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error With Truncating Payment Table: {str(e)}")
+            return False
@@ -1,19 +1,23 @@
-class ViewPayment:
-    def show_payment(self, payments):
-        print("Payments:")
-        for payment in payments:
-            print(
-                f"Payment ID: {payment[0]},Booking ID: {payment[1]}, Amount: {payment[2]}, Payment date: {payment[3]}, Status: {payment[4]} ")
-            
-    def get_payment_input(self):
-        amount = input("Input amount: ")
-        payment_date = input("Input payment date(HH:MM:SS): ")
-        payment_status = input("Input status: ")
-        booking_id = int(input("Input Booking ID: "))
-        return amount, payment_date, payment_status, booking_id
-    
-    def get_payment_id(self):
-        return int(input("Input Payment ID: "))
-    
-    def show_payment_message(self, message):
+class ViewPayment:
+    def show_payment(self, payments):
+        print("Payments:")
+        for payment in payments:
+            print(
+                f"Payment ID: {payment[0]},Booking ID: {payment[1]}, Amount: {payment[2]}, Payment date: {payment[3]}, Status: {payment[4]} ")
+            
+    def get_payment_input(self):
+        amount = input("Input amount: ")
+        payment_date = input("Input payment date (YYYY-MM-DD HH:MM:SS): ")
+        payment_status = input("Input status (true/false): ").strip().lower() in ('true', 't', 'yes', '1')
+        booking_id = int(input("Input Booking ID: "))
+        return booking_id, amount, payment_date, payment_status
+    
+    def get_page_size(self):
+        page_size = input("Input page size (Enter to show all): ")
+        return int(page_size) if page_size else None
+
+    def get_payment_id(self):
+        return int(input("Input Payment ID: "))
+    
+    def show_payment_message(self, message):
         print(message)
\ No newline at end of file
@@ -1,166 +1,249 @@
-import alch
-from sqlalchemy import Column, Integer, String, Date
-from sqlalchemy.orm import relationship
-
-class User(alch.Base):
-    __tablename__ = 'users'
-    user_id = Column(Integer, primary_key=True)
-    first_name = Column(String, nullable=False)
-    last_name = Column(String, nullable=False)
-    email = Column(String, nullable=False)
-    phone_number = Column(String, nullable=False)
-    date_of_registration = Column(Date, nullable=False)
-
-    bookings = relationship("Booking", back_populates="user")
-
-
-class ModelUser:
-    def __init__(self, db_model):
-        self.conn = db_model.conn
-        self.engine = alch.create_engine(alch.DATABASE_URL)
-        self.session = alch.Session.configure(bind=self.engine)
-        self.session = alch.Session()
-
-    def add_user(self, user_id, first_name, last_name, email, phone_number, date_of_registration):
-        """
-        Додає нового користувача у таблицю.
-        """
-        try:
-            new_user = User(
-                user_id=user_id,
-                first_name=first_name,
-                last_name=last_name,
-                email=email,
-                phone_number=phone_number,
-                date_of_registration=date_of_registration
-            )
-            self.session.add(new_user)
-            self.session.commit()
-            return True
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error adding user: {str(e)}")
-            return False 
-
-    def get_all_users(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT * FROM "users"')
-            return c.fetchall()
-        except Exception as e:
-            print(f"Error retrieving users: {str(e)}")
-            return None
-
-    def update_user(self, user_id, **kwargs):
-        """
-        Оновлює дані користувача за його ID.
-        """
-        try:
-            user = self.session.query(User).filter(User.user_id == user_id).first()
-            if user:
-                for key, value in kwargs.items():
-                    setattr(user, key, value)
-                self.session.commit()
-                return True
-            return False 
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error updating user: {str(e)}")
-            return False 
-
-    def delete_user(self, user_id):
-        """
-        Видаляє користувача за його ID.
-        """
-        try:
-            user = self.session.query(User).filter(User.user_id == user_id).first()
-            if user:
-                self.session.delete(user)
-                self.session.commit()
-                return True 
-            return False  
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error deleting user: {str(e)}")
-            return False
-
-    def check_user_existence(self, user_id):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT 1 FROM "users" WHERE "user_id" = %s', (user_id,))
-            return bool(c.fetchone())
-        except Exception as e:
-            print(f"Error checking user existence: {str(e)}")
-            return False
-
-    def create_user_sequence(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('''
-                DO $$
-                DECLARE
-                    max_id INT;
-                BEGIN
-                    SELECT COALESCE(MAX(user_id), 0) INTO max_id FROM "users";
-
-                    IF NOT EXISTS (
-                        SELECT 1
-                        FROM pg_sequences
-                        WHERE schemaname = 'public' AND sequencename = 'user_id_seq'
-                    ) THEN
-                        EXECUTE 'CREATE SEQUENCE user_id_seq START WITH ' || (max_id + 1);
-                    ELSE
-                        EXECUTE 'ALTER SEQUENCE user_id_seq RESTART WITH ' || (max_id + 1);
-                    END IF;
-                END $$;
-            ''')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error creating user sequence: {str(e)}")
-            return False
-
-    def generate_rand_user_data(self, number_of_operations):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-            INSERT INTO "users" ("user_id", "first_name", "last_name", "email", "phone_number", "date_of_registration")
-            SELECT
-                nextval('user_id_seq'), 
-                -- Випадкове ім'я
-                first_name,
-                -- Випадкове прізвище
-                last_name,
-                -- Генерація email на основі імені та прізвища
-                LOWER(first_name || '.' || last_name || '@gmail.com') AS email,
-                -- Генерація номера телефону
-                '380' || floor(100000000 + random() * 900000000)::bigint,
-                -- Дата реєстрації за останній рік
-                CURRENT_DATE - floor(random() * 365)::int AS date_of_registration
-            FROM (
-                SELECT 
-                    -- Вибір випадкового імені
-                    (array['Michael', 'Sofia', 'Tom', 'Alex', 'Stan', 'Anna', 'John', 'Emma', 'Oliver', 'Ava'])[floor(random() * 10) + 1] AS first_name,
-                    -- Вибір випадкового прізвища
-                    (array['Wall', 'Johnes', 'Tesla', 'Fire', 'Smith', 'Brown', 'Taylor', 'Wilson', 'Davies', 'Evans'])[floor(random() * 10) + 1] AS last_name
-                FROM generate_series(1, %s)
-            ) AS random_data;
-            """, (number_of_operations,))
-            self.conn.commit()
-            return True  
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error With Generating User Data: {str(e)}")
-            return False
-    
-    def truncate_users_table(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('DELETE FROM "users"')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error truncating users table: {str(e)}")
-            return False
+import prepared
+from bulk_import import BulkImporter
+from export import Exporter
+from model import (PAGE_SIZE, check_batch_columns, delete_batch, execute_batch, fetch_page, fetch_rows,
+                   stream_rows)
+
+# Колонки в порядку аргументів add_user (для пакетних методів)
+USER_COLUMNS = ('user_id', 'first_name', 'last_name', 'email', 'phone_number', 'date_of_registration')
+
+
+class ModelUser:
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.existence = db_model.existence
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def add_user(self, user_id, first_name, last_name, email, phone_number, date_of_registration):
+        """
+        Додає нового користувача у таблицю.
+        """
+        try:
+            prepared.execute(self.conn, 'users.insert', (
+                user_id, first_name, last_name, email, phone_number, date_of_registration))
+            self.conn.commit()
+            self.existence.invalidate('users', user_id, cascade=False)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error adding user: {str(e)}")
+            return False 
+
+    def get_all_users(self):
+        try:
+            return self.db_model.read(fetch_rows, 'SELECT * FROM "users"')
+        except Exception as e:
+            print(f"Error retrieving users: {str(e)}")
+            return None
+
+    def get_users_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        """
+        Повертає сторінку таблиці users, впорядковану за user_id.
+        """
+        try:
+            return self.db_model.read(fetch_page, "users", "user_id", after_id=after_id,
+                                      before_id=before_id, limit=limit)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error retrieving users: {str(e)}")
+            return None
+
+    def iter_users(self, itersize=None):
+        """
+        Повертає рядки таблиці users по одному через серверний курсор.
+        """
+        try:
+            yield from stream_rows(self.conn, 'SELECT * FROM "users"', itersize=itersize)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error retrieving users: {str(e)}")
+
+    def update_user(self, user_id, first_name=None, last_name=None, email=None, phone_number=None,
+                    date_of_registration=None):
+        """
+        Оновлює дані користувача за його ID одним запитом UPDATE ... RETURNING.
+        Колонки зі значенням None не змінюються, тож можна передати лише потрібні.
+        Повертає True, None (користувача з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = prepared.execute(self.conn, 'users.update', (
+                first_name, last_name, email, phone_number, date_of_registration, user_id)).fetchone()
+            self.conn.commit()
+            return True if updated else None
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error updating user: {str(e)}")
+            return False
+
+    def delete_user(self, user_id):
+        """
+        Видаляє користувача за його ID одним запитом DELETE ... RETURNING (бронювання - каскадом).
+        Повертає True, None (користувача з таким ID немає) або False (помилка).
+        """
+        try:
+            deleted = prepared.execute(self.conn, 'users.delete', (user_id,)).fetchone()
+            self.conn.commit()
+            if not deleted:
+                return None
+            self.existence.invalidate('users', user_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error deleting user: {str(e)}")
+            return False
+
+    def add_users(self, rows):
+        """
+        Додає пачку користувачів одним запитом. rows - кортежі в порядку аргументів
+        add_user або словники. Повертає список True/False для кожного рядка
+        (False - дублікат ID) або None, якщо пачку не записано.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'users.add_many', "user_id", rows, USER_COLUMNS)
+            self.existence.invalidate('users', cascade=False)
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error adding users: {str(e)}")
+            return None
+
+    def update_users(self, rows):
+        """
+        Оновлює пачку користувачів одним запитом. rows - словники з user_id
+        і колонками, які треба змінити (як kwargs у update_user).
+        Повертає список True/False (False - користувач не існує) або None.
+        """
+        try:
+            check_batch_columns(rows, "user_id", USER_COLUMNS[1:])
+            return execute_batch(self.conn, 'users.update_many', "user_id", rows, USER_COLUMNS)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error updating users: {str(e)}")
+            return None
+
+    def delete_users(self, user_ids):
+        """
+        Видаляє користувачів за списком ID; повертає список True/False або None.
+        """
+        try:
+            outcomes = delete_batch(self.conn, "users", user_ids)
+            self.existence.invalidate('users')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error deleting users: {str(e)}")
+            return None
+
+    def import_users(self, path, file_format=None):
+        """
+        Масово завантажує CSV або JSONL файл у таблицю users через COPY.
+        Повертає кортеж (імпортовано, відхилено).
+        """
+        try:
+            result = BulkImporter(self.conn, "users").import_file(path, file_format)
+            self.existence.invalidate('users', cascade=False)
+            return result
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error importing users: {str(e)}")
+            return None
+
+    def export_users(self, path, file_format=None, start=None, end=None):
+        """
+        Потоково вивантажує таблицю users у CSV або JSONL файл (path='-' - stdout, .gz - gzip)
+        через COPY TO STDOUT; start/end відбирають рядки за датою [start, end).
+        Повертає кількість вивантажених рядків.
+        """
+        try:
+            return Exporter().export_table("users", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Users: {str(e)}")
+            return None
+
+    def check_user_existence(self, user_id):
+        try:
+            return bool(self.db_model.read(prepared.fetch_one, 'users.exists', (user_id,)))
+        except Exception as e:
+            print(f"Error checking user existence: {str(e)}")
+            return False
+
+    def create_user_sequence(self):
+        c = self.conn.cursor()
+        try:
+            c.execute('''
+                DO $$
+                DECLARE
+                    max_id INT;
+                BEGIN
+                    SELECT COALESCE(MAX(user_id), 0) INTO max_id FROM "users";
+
+                    IF NOT EXISTS (
+                        SELECT 1
+                        FROM pg_sequences
+                        WHERE schemaname = 'public' AND sequencename = 'user_id_seq'
+                    ) THEN
+                        EXECUTE 'CREATE SEQUENCE user_id_seq START WITH ' || (max_id + 1);
+                    ELSE
+                        EXECUTE 'ALTER SEQUENCE user_id_seq RESTART WITH ' || (max_id + 1);
+                    END IF;
+                END $$;
+            ''')
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error creating user sequence: {str(e)}")
+            return False
+
+    def generate_rand_user_data(self, number_of_operations, conn=None):
+        commit = conn is None
+        conn = conn or self.conn
+        c = conn.cursor()
+        try:
+            c.execute("""
+            INSERT INTO "users" ("user_id", "first_name", "last_name", "email", "phone_number", "date_of_registration")
+            SELECT
+                nextval('user_id_seq'), 
+                -- Випадкове ім'я
+                first_name,
+                -- Випадкове прізвище
+                last_name,
+                -- Генерація email на основі імені та прізвища
+                LOWER(first_name || '.' || last_name || '@gmail.com') AS email,
+                -- Генерація номера телефону
+                '380' || floor(100000000 + random() * 900000000)::bigint,
+                -- Дата реєстрації за останній рік
+                CURRENT_DATE - floor(random() * 365)::int AS date_of_registration
+            FROM (
+                SELECT 
+                    -- Вибір випадкового імені
+                    (array['Michael', 'Sofia', 'Tom', 'Alex', 'Stan', 'Anna', 'John', 'Emma', 'Oliver', 'Ava'])[floor(random() * 10) + 1] AS first_name,
+                    -- Вибір випадкового прізвища
+                    (array['Wall', 'Johnes', 'Tesla', 'Fire', 'Smith', 'Brown', 'Taylor', 'Wilson', 'Davies', 'Evans'])[floor(random() * 10) + 1] AS last_name
+                FROM generate_series(1, %s)
+            ) AS random_data;
+            """, (number_of_operations,))
+            if commit:
+                conn.commit()
+            self.existence.invalidate('users', cascade=False)
+            return c.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error With Generating User Data: {str(e)}")
+            return None
+    
+    def truncate_users_table(self):
+        c = self.conn.cursor()
+        try:
+            c.execute('DELETE FROM "users"')
+            self.conn.commit()
+            self.existence.invalidate('users')
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error truncating users table: {str(e)}")
+            return False
@@ -1,148 +1,263 @@
-import alch
-from sqlalchemy import Column, Integer, String
-
-class Venue(alch.Base):
-    __tablename__ = 'venue'
-    venue_id = Column(Integer, primary_key=True)
-    name = Column(String(30), nullable=False)
-    address = Column(String(64), nullable=False)
-    city = Column(String(25), nullable=False)
-    capacity = Column(Integer, nullable=False)
-
-
-class ModelVenue:
-    def __init__(self, db_model):
-        self.conn = db_model.conn  
-        self.engine = alch.create_engine(alch.DATABASE_URL)
-        self.session = alch.Session.configure(bind=self.engine)
-        self.session = alch.Session()
-
-    def add_venue(self, venue_id, name, address, city, capacity):
-        try:
-            new_venue = Venue(
-                venue_id=venue_id,
-                name=name,
-                address=address,
-                city=city,
-                capacity=capacity
-            )
-            self.session.add(new_venue)
-            self.session.commit()
-            return True
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error Adding Venue: {str(e)}")
-            return False 
-
-    def get_all_venues(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT * FROM "venue"')
-            return c.fetchall()
-        except Exception as e:
-            print(f"Error Retrieving Venues: {str(e)}")
-            return None
-
-    def update_venue(self, venue_id, **kwargs):
-        try:
-            venue = self.session.query(Venue).filter(Venue.venue_id == venue_id).first()
-            if venue:
-                for key, value in kwargs.items():
-                    setattr(venue, key, value) 
-                self.session.commit()
-                return True  
-            return False  
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error Updating Venue: {str(e)}")
-            return False 
-
-    def delete_venue(self, venue_id):
-        try:
-            venue = self.session.query(Venue).filter(Venue.venue_id == venue_id).first()
-            if venue:
-                self.session.delete(venue)
-                self.session.commit()
-                return True 
-            return False
-        except Exception as e:
-            self.session.rollback()
-            print(f"Error Deleting Venue: {str(e)}")
-            return False
-
-    def check_venue_existence(self, venue_id):
-        c = self.conn.cursor()
-        try:
-            c.execute('SELECT 1 FROM "venue" WHERE "venue_id" = %s', (venue_id,))
-            return bool(c.fetchone())
-        except Exception as e:
-            print(f"Error Checking Venue Existence: {str(e)}")
-            return False
-
-    def create_venue_sequence(self):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                DO $$
-                DECLARE
-                    max_id INT;
-                BEGIN
-                    SELECT COALESCE(MAX(venue_id), 0) INTO max_id FROM "venue";
-
-                    IF NOT EXISTS (
-                        SELECT 1 
-                        FROM pg_sequences 
-                        WHERE schemaname = 'public' AND sequencename = 'venue_id_seq'
-                    ) THEN
-                        EXECUTE 'CREATE SEQUENCE venue_id_seq START WITH ' || (max_id + 1);
-                    ELSE
-                        EXECUTE 'ALTER SEQUENCE venue_id_seq RESTART WITH ' || (max_id + 1);
-                    END IF;
-                END $$;
-            """)
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error Creating Venue Sequence: {str(e)}")
-            return False
-
-    def generate_rand_venue_data(self, number_of_operations):
-        c = self.conn.cursor()
-        try:
-            c.execute("""
-                INSERT INTO "venue" ("venue_id", "name", "address", "city", "capacity")
-                SELECT 
-                    nextval('venue_id_seq'),
-                    -- Назва спортивного комплексу
-                    (array['Arena Sports', 'Champion Gym', 'Victory Stadium', 'Golden Field', 
-                       'Elite Fitness', 'Powerhouse Arena', 'Olympic Hall', 'Titanium Dome', 
-                       'Active Life Center', 'Dynamic Gym'])[row_number] AS name,
-                    -- Унікальна адреса
-                    'Street ' || row_number || ', Building ' || floor(random() * 100 + 1)::int AS address,
-                    -- Випадкове місто
-                    (array['New York', 'Los Angeles', 'Chicago', 'Houston', 'Miami'])[floor(random() * 5) + 1] AS city,
-                    -- Випадкова місткість
-                    floor(random() * 100 + 10) AS capacity
-                FROM (
-                    SELECT row_number() OVER () AS row_number
-                    FROM generate_series(1, %s)
-                ) AS numbered_rows;
-            """, (number_of_operations,))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error Generating Venue Data: {str(e)}")
-            return False
-
-    def truncate_venue_table(self):
-        c = self.conn.cursor()
-        try:
-            c.execute('DELETE FROM "venue"')
-            self.conn.commit()
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error Truncating Venue Table: {str(e)}")
+import prepared
+from bulk_import import BulkImporter
+from export import Exporter
+from model import (PAGE_SIZE, check_batch_columns, delete_batch, execute_batch, fetch_page, fetch_rows,
+                   stream_rows)
+
+# Колонки в порядку аргументів add_venue (для пакетних методів)
+VENUE_COLUMNS = ('venue_id', 'name', 'address', 'city', 'capacity')
+
+
+class ModelVenue:
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.existence = db_model.existence
+        self.reference = db_model.reference
+
+    @property
+    def conn(self):
+        # Поточне з'єднання моделі: після обриву супервізор замінює його новим
+        return self.db_model.conn
+
+    def add_venue(self, venue_id, name, address, city, capacity):
+        try:
+            prepared.execute(self.conn, 'venue.insert', (venue_id, name, address, city, capacity))
+            self.conn.commit()
+            self.existence.invalidate('venue', venue_id, cascade=False)
+            # Кеш міг запам'ятати відсутність закладу до вставки
+            self.reference.invalidate('venue', venue_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Adding Venue: {str(e)}")
+            return False 
+
+    def get_venue(self, venue_id):
+        """
+        Повертає заклад за ID (None, якщо його немає) через кеш довідкових таблиць.
+        """
+        try:
+            return self.reference.get_venue(venue_id)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Retrieving Venue: {str(e)}")
+            return None
+
+    def get_all_venues(self):
+        try:
+            return self.db_model.read(fetch_rows, 'SELECT * FROM "venue"')
+        except Exception as e:
+            print(f"Error Retrieving Venues: {str(e)}")
+            return None
+
+    def get_venues_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        """
+        Повертає сторінку таблиці venue, впорядковану за venue_id.
+        """
+        try:
+            return self.db_model.read(fetch_page, "venue", "venue_id", after_id=after_id,
+                                      before_id=before_id, limit=limit)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Retrieving Venues: {str(e)}")
+            return None
+
+    def iter_venues(self, itersize=None):
+        """
+        Повертає рядки таблиці venue по одному через серверний курсор.
+        """
+        try:
+            yield from stream_rows(self.conn, 'SELECT * FROM "venue"', itersize=itersize)
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Retrieving Venues: {str(e)}")
+
+    def update_venue(self, venue_id, name=None, address=None, city=None, capacity=None):
+        """
+        Оновлює заклад одним запитом UPDATE ... RETURNING; колонки зі значенням None не змінюються.
+        Повертає True, None (закладу з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = prepared.execute(self.conn, 'venue.update', (
+                name, address, city, capacity, venue_id)).fetchone()
+            self.conn.commit()
+            if not updated:
+                return None
+            self.reference.invalidate('venue', venue_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Updating Venue: {str(e)}")
+            return False
+
+    def delete_venue(self, venue_id):
+        """
+        Видаляє заклад одним запитом DELETE ... RETURNING (об'єкти і бронювання - каскадом).
+        Повертає True, None (закладу з таким ID немає) або False (помилка).
+        """
+        try:
+            deleted = prepared.execute(self.conn, 'venue.delete', (venue_id,)).fetchone()
+            self.conn.commit()
+            if not deleted:
+                return None
+            self.existence.invalidate('venue', venue_id)
+            self.reference.invalidate('venue', venue_id)
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Deleting Venue: {str(e)}")
+            return False
+
+    def add_venues(self, rows):
+        """
+        Додає пачку закладів одним запитом. rows - кортежі в порядку аргументів
+        add_venue або словники. Повертає список True/False для кожного рядка
+        (False - дублікат ID) або None, якщо пачку не записано.
+        """
+        try:
+            outcomes = execute_batch(self.conn, 'venue.add_many', "venue_id", rows, VENUE_COLUMNS)
+            self.existence.invalidate('venue', cascade=False)
+            self.reference.invalidate('venue')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Adding Venues: {str(e)}")
+            return None
+
+    def update_venues(self, rows):
+        """
+        Оновлює пачку закладів одним запитом. rows - словники з venue_id
+        і колонками, які треба змінити (як kwargs у update_venue).
+        Повертає список True/False (False - заклад не існує) або None.
+        """
+        try:
+            check_batch_columns(rows, "venue_id", VENUE_COLUMNS[1:])
+            outcomes = execute_batch(self.conn, 'venue.update_many', "venue_id", rows, VENUE_COLUMNS)
+            self.reference.invalidate('venue')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Updating Venues: {str(e)}")
+            return None
+
+    def delete_venues(self, venue_ids):
+        """
+        Видаляє заклади за списком ID; повертає список True/False або None.
+        """
+        try:
+            outcomes = delete_batch(self.conn, "venue", venue_ids)
+            self.existence.invalidate('venue')
+            self.reference.invalidate('venue')
+            return outcomes
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Deleting Venues: {str(e)}")
+            return None
+
+    def import_venues(self, path, file_format=None):
+        """
+        Масово завантажує CSV або JSONL файл у таблицю venue через COPY.
+        Повертає кортеж (імпортовано, відхилено).
+        """
+        try:
+            result = BulkImporter(self.conn, "venue").import_file(path, file_format)
+            self.existence.invalidate('venue', cascade=False)
+            self.reference.invalidate('venue')
+            return result
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Importing Venues: {str(e)}")
+            return None
+
+    def export_venues(self, path, file_format=None):
+        """
+        Потоково вивантажує таблицю venue у CSV або JSONL файл (path='-' - stdout, .gz - gzip)
+        через COPY TO STDOUT. Повертає кількість вивантажених рядків.
+        """
+        try:
+            return Exporter().export_table("venue", path, file_format)
+        except Exception as e:
+            print(f"Error With Exporting Venues: {str(e)}")
+            return None
+
+    def check_venue_existence(self, venue_id):
+        try:
+            return bool(self.db_model.read(prepared.fetch_one, 'venue.exists', (venue_id,)))
+        except Exception as e:
+            print(f"Error Checking Venue Existence: {str(e)}")
+            return False
+
+    def create_venue_sequence(self):
+        c = self.conn.cursor()
+        try:
+            c.execute("""
+                DO $$
+                DECLARE
+                    max_id INT;
+                BEGIN
+                    SELECT COALESCE(MAX(venue_id), 0) INTO max_id FROM "venue";
+
+                    IF NOT EXISTS (
+                        SELECT 1 
+                        FROM pg_sequences 
+                        WHERE schemaname = 'public' AND sequencename = 'venue_id_seq'
+                    ) THEN
+                        EXECUTE 'CREATE SEQUENCE venue_id_seq START WITH ' || (max_id + 1);
+                    ELSE
+                        EXECUTE 'ALTER SEQUENCE venue_id_seq RESTART WITH ' || (max_id + 1);
+                    END IF;
+                END $$;
+            """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Creating Venue Sequence: {str(e)}")
+            return False
+
+    def generate_rand_venue_data(self, number_of_operations, conn=None):
+        commit = conn is None
+        conn = conn or self.conn
+        c = conn.cursor()
+        try:
+            c.execute("""
+                INSERT INTO "venue" ("venue_id", "name", "address", "city", "capacity")
+                SELECT 
+                    nextval('venue_id_seq'),
+                    -- Назва спортивного комплексу
+                    (array['Arena Sports', 'Champion Gym', 'Victory Stadium', 'Golden Field', 
+                       'Elite Fitness', 'Powerhouse Arena', 'Olympic Hall', 'Titanium Dome', 
+                       'Active Life Center', 'Dynamic Gym'])[(row_number - 1) %% 10 + 1] AS name,
+                    -- Унікальна адреса
+                    'Street ' || row_number || ', Building ' || floor(random() * 100 + 1)::int AS address,
+                    -- Випадкове місто
+                    (array['New York', 'Los Angeles', 'Chicago', 'Houston', 'Miami'])[floor(random() * 5) + 1] AS city,
+                    -- Випадкова місткість
+                    floor(random() * 100 + 10) AS capacity
+                FROM (
+                    SELECT row_number() OVER () AS row_number
+                    FROM generate_series(1, %s)
+                ) AS numbered_rows;
+            """, (number_of_operations,))
+            if commit:
+                conn.commit()
+            self.existence.invalidate('venue', cascade=False)
+            self.reference.invalidate('venue')
+            return c.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error Generating Venue Data: {str(e)}")
+            return None
+
+    def truncate_venue_table(self):
+        c = self.conn.cursor()
+        try:
+            c.execute('DELETE FROM "venue"')
+            self.conn.commit()
+            self.existence.invalidate('venue')
+            self.reference.invalidate('venue')
+            return True
+        except Exception as e:
+            self.db_model.rollback()
+            print(f"Error Truncating Venue Table: {str(e)}")
             return False
\ No newline at end of file
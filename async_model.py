@@ -0,0 +1,644 @@
+import asyncio
+import os
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+import alch
+import prepared
+from Analytics.model import REVENUE_PERIODS
+from Booking.model import BOOKING_COLUMNS, user_bookings_query
+from Facility.model import FACILITY_COLUMNS
+from Payment.model import PAYMENT_COLUMNS
+from Users.model import USER_COLUMNS
+from Venue.model import VENUE_COLUMNS
+from export import Exporter
+from model import (PAGE_SIZE, REBUILD_SUMMARIES_SQL, batch_outcomes, batch_params, batch_rows, check_batch_columns,
+                   page_query)
+
+# Розмір асинхронного пулу з'єднань (можна перевизначити змінними оточення)
+ASYNC_POOL_MIN_SIZE = int(os.environ.get('DB_ASYNC_POOL_MIN_SIZE', 4))
+ASYNC_POOL_MAX_SIZE = int(os.environ.get('DB_ASYNC_POOL_MAX_SIZE', 20))
+
+
+class AsyncModel:
+    """
+    Асинхронний пул з'єднань psycopg для моделей AsyncModel*.
+    Кожна операція позичає з'єднання лише на час своєї транзакції,
+    тому сотні корутин можуть працювати паралельно через max_size з'єднань.
+    Запити ті самі, що й у синхронних моделей: зареєстровані в prepared.py.
+
+        async with AsyncModel() as db:
+            bookings = AsyncModelBooking(db)
+            await asyncio.gather(*(bookings.add_booking(...) for ...))
+    """
+
+    def __init__(self, url=alch.DATABASE_URL, min_size=ASYNC_POOL_MIN_SIZE, max_size=ASYNC_POOL_MAX_SIZE):
+        self.pool = AsyncConnectionPool(alch.conninfo(url), min_size=min_size, max_size=max_size, open=False)
+
+    async def open(self):
+        await self.pool.open(wait=True)
+
+    async def close(self):
+        await self.pool.close()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def fetch_all(self, name, params=None):
+        """
+        Виконує зареєстрований у prepared.py запит name в окремій транзакції.
+        """
+        async with self.pool.connection() as conn:
+            cur = await prepared.execute_async(conn, name, params)
+            return await cur.fetchall()
+
+    async def fetch_one(self, name, params=None):
+        async with self.pool.connection() as conn:
+            cur = await prepared.execute_async(conn, name, params)
+            return await cur.fetchone()
+
+    async def execute(self, name, params=None):
+        """
+        Виконує зареєстрований запит, що не повертає рядків; повертає кількість змінених рядків.
+        """
+        async with self.pool.connection() as conn:
+            cur = await prepared.execute_async(conn, name, params)
+            return cur.rowcount
+
+    async def fetch_table(self, table):
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(f'SELECT * FROM "{table}"')
+            return await cur.fetchall()
+
+    async def fetch_page(self, table, key, after_id=None, before_id=None, limit=PAGE_SIZE):
+        """
+        Keyset-пагінація за первинним ключем, як model.fetch_page.
+        """
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(*page_query(table, key, after_id, before_id, limit))
+            return await cur.fetchall()
+
+    async def execute_batch(self, name, key, rows, columns):
+        """
+        Асинхронний варіант model.execute_batch.
+        """
+        rows = batch_rows(rows, columns)
+        if not rows:
+            return []
+        changed = [row[0] for row in await self.fetch_all(name, batch_params(rows))]
+        return batch_outcomes(rows, key, changed)
+
+    async def delete_batch(self, table, ids):
+        ids = list(ids)
+        deleted = {row[0] for row in await self.fetch_all(f'{table}.delete_many', (ids,))}
+        return [row_id in deleted for row_id in ids]
+
+    async def exists(self, table, row_id):
+        return await self.fetch_one(f'{table}.exists', (row_id,)) is not None
+
+
+class AsyncModelBooking:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def add_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
+        try:
+            # Наявність користувача та об'єкта перевіряють зовнішні ключі в тому ж запиті
+            await self.db.execute('booking.insert', (
+                booking_id, user_id, facility_id, booking_date, start_time, end_time, status))
+            return True
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: User ID or Facility ID does not exist.")
+            return False
+        except psycopg.errors.ExclusionViolation:
+            # Обмеження booking_no_overlap: об'єкт уже заброньовано на цей час
+            print("Error: Facility Is Already Booked For This Time.")
+            return False
+        except Exception as e:
+            print(f"Error With Adding A Booking: {str(e)}")
+            return False
+
+    async def get_all_bookings(self):
+        try:
+            return await self.db.fetch_table("booking")
+        except Exception as e:
+            print(f"Error With Retrieving Bookings: {str(e)}")
+            return None
+
+    async def get_bookings_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        try:
+            return await self.db.fetch_page("booking", "booking_id", after_id=after_id,
+                                            before_id=before_id, limit=limit)
+        except Exception as e:
+            print(f"Error With Retrieving Bookings: {str(e)}")
+            return None
+
+    async def get_user_bookings(self, user_id, since=None, cursor=None, limit=PAGE_SIZE, details=False):
+        try:
+            name, params = user_bookings_query(user_id, since, cursor, limit, details)
+            return await self.db.fetch_all(name, params)
+        except Exception as e:
+            print(f"Error With Retrieving User Bookings: {str(e)}")
+            return None
+
+    async def update_booking(self, booking_id, user_id, facility_id, booking_date, start_time, end_time, status):
+        """
+        Повертає True, None (бронювання з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = await self.db.fetch_one('booking.update', (
+                user_id, facility_id, booking_date, start_time, end_time, status, booking_id))
+            return True if updated else None
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: User ID or Facility ID does not exist.")
+            return False
+        except psycopg.errors.ExclusionViolation:
+            print("Error: Facility Is Already Booked For This Time.")
+            return False
+        except Exception as e:
+            print(f"Error With Updating A Booking: {str(e)}")
+            return False
+
+    async def delete_booking(self, booking_id):
+        try:
+            return True if await self.db.fetch_one('booking.delete', (booking_id,)) else None
+        except Exception as e:
+            print(f"Error With Deleting A Booking: {str(e)}")
+            return False
+
+    async def add_bookings(self, rows):
+        try:
+            return await self.db.execute_batch('booking.add_many', "booking_id", rows, BOOKING_COLUMNS)
+        except Exception as e:
+            print(f"Error With Adding Bookings: {str(e)}")
+            return None
+
+    async def update_bookings(self, rows):
+        try:
+            return await self.db.execute_batch('booking.update_many', "booking_id", rows, BOOKING_COLUMNS)
+        except psycopg.errors.ExclusionViolation:
+            print("Error: Facility Is Already Booked For This Time. No Bookings Were Updated.")
+            return None
+        except Exception as e:
+            print(f"Error With Updating Bookings: {str(e)}")
+            return None
+
+    async def delete_bookings(self, booking_ids):
+        try:
+            return await self.db.delete_batch("booking", booking_ids)
+        except Exception as e:
+            print(f"Error With Deleting Bookings: {str(e)}")
+            return None
+
+    async def export_bookings(self, path, file_format=None, start=None, end=None):
+        # Exporter працює з власним синхронним з'єднанням, тому виконується в окремому потоці
+        try:
+            return await asyncio.to_thread(Exporter().export_table, "booking", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Bookings: {str(e)}")
+            return None
+
+    async def check_booking_existence(self, booking_id):
+        try:
+            return await self.db.exists("booking", booking_id)
+        except Exception as e:
+            print(f"Error With Checking Booking Existence: {str(e)}")
+            return False
+
+
+class AsyncModelFacility:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def add_facility(self, facility_id, facility_name, facility_type, venue_id):
+        try:
+            await self.db.execute('facility.insert', (facility_id, facility_name, facility_type, venue_id))
+            return True
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: Venue ID does not exist.")
+            return False
+        except Exception as e:
+            print(f"Error With Adding A Facility: {str(e)}")
+            return False
+
+    async def get_all_facilities(self):
+        try:
+            return await self.db.fetch_table("facility")
+        except Exception as e:
+            print(f"Error With Retrieving Facilities: {str(e)}")
+            return None
+
+    async def get_facilities_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        try:
+            return await self.db.fetch_page("facility", "facility_id", after_id=after_id,
+                                            before_id=before_id, limit=limit)
+        except Exception as e:
+            print(f"Error With Retrieving Facilities: {str(e)}")
+            return None
+
+    async def update_facility(self, facility_id, facility_name, facility_type, venue_id):
+        """
+        Повертає True, None (об'єкта з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = await self.db.fetch_one('facility.update', (
+                facility_name, facility_type, venue_id, facility_id))
+            return True if updated else None
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: Venue ID does not exist.")
+            return False
+        except Exception as e:
+            print(f"Error With Updating A Facility: {str(e)}")
+            return False
+
+    async def delete_facility(self, facility_id):
+        try:
+            return True if await self.db.fetch_one('facility.delete', (facility_id,)) else None
+        except Exception as e:
+            print(f"Error With Deleting A Facility: {str(e)}")
+            return False
+
+    async def add_facilities(self, rows):
+        try:
+            return await self.db.execute_batch('facility.add_many', "facility_id", rows, FACILITY_COLUMNS)
+        except Exception as e:
+            print(f"Error With Adding Facilities: {str(e)}")
+            return None
+
+    async def update_facilities(self, rows):
+        try:
+            return await self.db.execute_batch('facility.update_many', "facility_id", rows, FACILITY_COLUMNS)
+        except Exception as e:
+            print(f"Error With Updating Facilities: {str(e)}")
+            return None
+
+    async def delete_facilities(self, facility_ids):
+        try:
+            return await self.db.delete_batch("facility", facility_ids)
+        except Exception as e:
+            print(f"Error With Deleting Facilities: {str(e)}")
+            return None
+
+    async def export_facilities(self, path, file_format=None):
+        try:
+            return await asyncio.to_thread(Exporter().export_table, "facility", path, file_format)
+        except Exception as e:
+            print(f"Error With Exporting Facilities: {str(e)}")
+            return None
+
+    async def find_free_facilities(self, venue_id, facility_type, window):
+        start, end = window
+        try:
+            candidates = [row for row in await self.db.fetch_all('venue.facilities', (venue_id,))
+                          if row[3] == facility_type]
+            if not candidates:
+                return []
+            free = {row[0] for row in await self.db.fetch_all('facility.find_free',
+                                                              ([row[0] for row in candidates], start, end))}
+            return [row for row in candidates if row[0] in free]
+        except Exception as e:
+            print(f"Error With Finding Free Facilities: {str(e)}")
+            return None
+
+    async def check_facility_existence(self, facility_id):
+        try:
+            return await self.db.exists("facility", facility_id)
+        except Exception as e:
+            print(f"Error With Checking Facility Existence: {str(e)}")
+            return False
+
+
+class AsyncModelPayment:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def add_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
+        try:
+            await self.db.execute('payment.insert', (payment_id, booking_id, amount, payment_date, payment_status))
+            return True
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: Booking ID does not exist.")
+            return False
+        except Exception as e:
+            print(f"Error With Adding A Payment: {str(e)}")
+            return False
+
+    async def get_all_payments(self):
+        try:
+            return await self.db.fetch_table("payment")
+        except Exception as e:
+            print(f"Error With Retrieving Payments: {str(e)}")
+            return None
+
+    async def get_payments_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        try:
+            return await self.db.fetch_page("payment", "payment_id", after_id=after_id,
+                                            before_id=before_id, limit=limit)
+        except Exception as e:
+            print(f"Error With Retrieving Payments: {str(e)}")
+            return None
+
+    async def update_payment(self, payment_id, booking_id, amount, payment_date, payment_status):
+        """
+        Повертає True, None (платежу з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = await self.db.fetch_one('payment.update', (
+                booking_id, amount, payment_date, payment_status, payment_id))
+            return True if updated else None
+        except psycopg.errors.ForeignKeyViolation:
+            print("Error: Booking ID does not exist.")
+            return False
+        except Exception as e:
+            print(f"Error With Updating A Payment: {str(e)}")
+            return False
+
+    async def delete_payment(self, payment_id):
+        try:
+            return True if await self.db.fetch_one('payment.delete', (payment_id,)) else None
+        except Exception as e:
+            print(f"Error With Deleting A Payment: {str(e)}")
+            return False
+
+    async def add_payments(self, rows):
+        try:
+            return await self.db.execute_batch('payment.add_many', "payment_id", rows, PAYMENT_COLUMNS)
+        except Exception as e:
+            print(f"Error With Adding Payments: {str(e)}")
+            return None
+
+    async def update_payments(self, rows):
+        try:
+            return await self.db.execute_batch('payment.update_many', "payment_id", rows, PAYMENT_COLUMNS)
+        except Exception as e:
+            print(f"Error With Updating Payments: {str(e)}")
+            return None
+
+    async def delete_payments(self, payment_ids):
+        try:
+            return await self.db.delete_batch("payment", payment_ids)
+        except Exception as e:
+            print(f"Error With Deleting Payments: {str(e)}")
+            return None
+
+    async def export_payments(self, path, file_format=None, start=None, end=None):
+        try:
+            return await asyncio.to_thread(Exporter().export_table, "payment", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Payments: {str(e)}")
+            return None
+
+    async def check_payment_existence(self, payment_id):
+        try:
+            return await self.db.exists("payment", payment_id)
+        except Exception as e:
+            print(f"Error With Checking Payment Existence: {str(e)}")
+            return False
+
+
+class AsyncModelUser:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def add_user(self, user_id, first_name, last_name, email, phone_number, date_of_registration):
+        try:
+            await self.db.execute('users.insert', (
+                user_id, first_name, last_name, email, phone_number, date_of_registration))
+            return True
+        except Exception as e:
+            print(f"Error adding user: {str(e)}")
+            return False
+
+    async def get_all_users(self):
+        try:
+            return await self.db.fetch_table("users")
+        except Exception as e:
+            print(f"Error retrieving users: {str(e)}")
+            return None
+
+    async def get_users_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        try:
+            return await self.db.fetch_page("users", "user_id", after_id=after_id,
+                                            before_id=before_id, limit=limit)
+        except Exception as e:
+            print(f"Error retrieving users: {str(e)}")
+            return None
+
+    async def update_user(self, user_id, first_name=None, last_name=None, email=None, phone_number=None,
+                          date_of_registration=None):
+        """
+        Колонки зі значенням None не змінюються.
+        Повертає True, None (користувача з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = await self.db.fetch_one('users.update', (
+                first_name, last_name, email, phone_number, date_of_registration, user_id))
+            return True if updated else None
+        except Exception as e:
+            print(f"Error updating user: {str(e)}")
+            return False
+
+    async def delete_user(self, user_id):
+        try:
+            return True if await self.db.fetch_one('users.delete', (user_id,)) else None
+        except Exception as e:
+            print(f"Error deleting user: {str(e)}")
+            return False
+
+    async def add_users(self, rows):
+        try:
+            return await self.db.execute_batch('users.add_many', "user_id", rows, USER_COLUMNS)
+        except Exception as e:
+            print(f"Error adding users: {str(e)}")
+            return None
+
+    async def update_users(self, rows):
+        try:
+            check_batch_columns(rows, "user_id", USER_COLUMNS[1:])
+            return await self.db.execute_batch('users.update_many', "user_id", rows, USER_COLUMNS)
+        except Exception as e:
+            print(f"Error updating users: {str(e)}")
+            return None
+
+    async def delete_users(self, user_ids):
+        try:
+            return await self.db.delete_batch("users", user_ids)
+        except Exception as e:
+            print(f"Error deleting users: {str(e)}")
+            return None
+
+    async def export_users(self, path, file_format=None, start=None, end=None):
+        try:
+            return await asyncio.to_thread(Exporter().export_table, "users", path, file_format, start, end)
+        except Exception as e:
+            print(f"Error With Exporting Users: {str(e)}")
+            return None
+
+    async def check_user_existence(self, user_id):
+        try:
+            return await self.db.exists("users", user_id)
+        except Exception as e:
+            print(f"Error checking user existence: {str(e)}")
+            return False
+
+
+class AsyncModelVenue:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def add_venue(self, venue_id, name, address, city, capacity):
+        try:
+            await self.db.execute('venue.insert', (venue_id, name, address, city, capacity))
+            return True
+        except Exception as e:
+            print(f"Error Adding Venue: {str(e)}")
+            return False
+
+    async def get_all_venues(self):
+        try:
+            return await self.db.fetch_table("venue")
+        except Exception as e:
+            print(f"Error Retrieving Venues: {str(e)}")
+            return None
+
+    async def get_venues_page(self, after_id=None, limit=PAGE_SIZE, before_id=None):
+        try:
+            return await self.db.fetch_page("venue", "venue_id", after_id=after_id,
+                                            before_id=before_id, limit=limit)
+        except Exception as e:
+            print(f"Error Retrieving Venues: {str(e)}")
+            return None
+
+    async def update_venue(self, venue_id, name=None, address=None, city=None, capacity=None):
+        """
+        Колонки зі значенням None не змінюються.
+        Повертає True, None (закладу з таким ID немає) або False (помилка).
+        """
+        try:
+            updated = await self.db.fetch_one('venue.update', (name, address, city, capacity, venue_id))
+            return True if updated else None
+        except Exception as e:
+            print(f"Error Updating Venue: {str(e)}")
+            return False
+
+    async def delete_venue(self, venue_id):
+        try:
+            return True if await self.db.fetch_one('venue.delete', (venue_id,)) else None
+        except Exception as e:
+            print(f"Error Deleting Venue: {str(e)}")
+            return False
+
+    async def add_venues(self, rows):
+        try:
+            return await self.db.execute_batch('venue.add_many', "venue_id", rows, VENUE_COLUMNS)
+        except Exception as e:
+            print(f"Error Adding Venues: {str(e)}")
+            return None
+
+    async def update_venues(self, rows):
+        try:
+            check_batch_columns(rows, "venue_id", VENUE_COLUMNS[1:])
+            return await self.db.execute_batch('venue.update_many', "venue_id", rows, VENUE_COLUMNS)
+        except Exception as e:
+            print(f"Error Updating Venues: {str(e)}")
+            return None
+
+    async def delete_venues(self, venue_ids):
+        try:
+            return await self.db.delete_batch("venue", venue_ids)
+        except Exception as e:
+            print(f"Error Deleting Venues: {str(e)}")
+            return None
+
+    async def export_venues(self, path, file_format=None):
+        try:
+            return await asyncio.to_thread(Exporter().export_table, "venue", path, file_format)
+        except Exception as e:
+            print(f"Error With Exporting Venues: {str(e)}")
+            return None
+
+    async def check_venue_existence(self, venue_id):
+        try:
+            return await self.db.exists("venue", venue_id)
+        except Exception as e:
+            print(f"Error Checking Venue Existence: {str(e)}")
+            return False
+
+
+class AsyncModelAnalytics:
+    def __init__(self, db_model):
+        self.db = db_model
+
+    async def most_booked_venue(self):
+        try:
+            return await self.db.fetch_all('analytics.most_booked_venue')
+        except Exception as e:
+            print(f"Error With Analytics Of Most Booked Venue: {str(e)}")
+            return None
+
+    async def user_activity(self):
+        try:
+            return await self.db.fetch_all('analytics.user_activity')
+        except Exception as e:
+            print(f"Error With Analytics Of User Activity: {str(e)}")
+            return None
+
+    async def payment_analysis(self):
+        try:
+            return await self.db.fetch_all('analytics.payment_analysis')
+        except Exception as e:
+            print(f"Error With Analytics Of Payments: {str(e)}")
+            return None
+
+    async def revenue_by_period(self, start, end, period='day'):
+        try:
+            if period not in REVENUE_PERIODS:
+                raise ValueError(f"period must be one of {', '.join(REVENUE_PERIODS)}")
+            return await self.db.fetch_all('analytics.revenue_by_period', (period, start, end))
+        except Exception as e:
+            print(f"Error With Analytics Of Revenue By Period: {str(e)}")
+            return None
+
+    async def revenue_by_venue(self, start, end, limit=None):
+        try:
+            return await self.db.fetch_all('analytics.revenue_by_venue', (start, end, limit))
+        except Exception as e:
+            print(f"Error With Analytics Of Revenue By Venue: {str(e)}")
+            return None
+
+    async def revenue_by_status(self, start, end):
+        try:
+            return await self.db.fetch_all('analytics.revenue_by_status', (start, end))
+        except Exception as e:
+            print(f"Error With Analytics Of Revenue By Status: {str(e)}")
+            return None
+
+    async def facility_bookings(self, start, end, limit=None):
+        try:
+            return await self.db.fetch_all('analytics.facility_bookings', (start, end, limit))
+        except Exception as e:
+            print(f"Error With Analytics Of Facility Bookings: {str(e)}")
+            return None
+
+    async def export_report(self, report, path, file_format=None, start=None, end=None, period='day'):
+        try:
+            if period not in REVENUE_PERIODS:
+                raise ValueError(f"period must be one of {', '.join(REVENUE_PERIODS)}")
+            return await asyncio.to_thread(Exporter().export_report, report, path, file_format, start, end, period)
+        except Exception as e:
+            print(f"Error With Exporting Analytics Report: {str(e)}")
+            return None
+
+    async def rebuild_summaries(self):
+        try:
+            async with self.db.pool.connection() as conn:
+                await conn.execute(REBUILD_SUMMARIES_SQL)
+            return True
+        except Exception as e:
+            print(f"Error With Rebuilding Analytics Summaries: {str(e)}")
+            return False
@@ -0,0 +1,202 @@
+import datetime
+import json
+import sys
+import time
+
+from bulk_import import TABLE_COLUMNS
+
+
+def _method(controller, owner, name):
+    # Модель береться з контролера під час виклику: вона створюється при першій операції
+    # з таблицею і після відновлення знімка замінюється новою
+    def call(*args, **kwargs):
+        return getattr(getattr(controller, owner), name)(*args, **kwargs)
+    return call
+
+
+def _generate(controller, owner, singular):
+    create_sequence = _method(controller, owner, f'create_{singular}_sequence')
+    generate = _method(controller, owner, f'generate_rand_{singular}_data')
+
+    def run(count):
+        return create_sequence() and generate(count)
+    return run
+
+
+class BatchRunner:
+    """
+    Виконує сценарій операцій без запитів до користувача.
+    Сценарій - JSONL, по одній операції на рядок:
+        {"op": "booking.add", "args": {"booking_id": 1, "user_id": 1, ...}}
+        {"op": "venue.generate", "args": {"count": 1000}}
+        {"op": "analytics.most_booked_venue"}
+        {"op": "snapshot.restore", "args": {"name": "seeded"}}
+    Необов'язкове поле "repeat" виконує операцію кілька разів поспіль.
+    """
+
+    def __init__(self, controller, stop_on_error=False, output=sys.stdout):
+        self.controller = controller
+        self.stop_on_error = stop_on_error
+        self.output = output
+        self.operations = self._operations()
+        # Назва операції -> [кількість, невдачі, сумарний час]
+        self.stats = {}
+
+    def _operations(self):
+        c = self.controller
+        operations = {}
+        models = {
+            'booking': ('model_booking', 'booking', 'bookings'),
+            'facility': ('model_facility', 'facility', 'facilities'),
+            'payment': ('model_payment', 'payment', 'payments'),
+            'users': ('model_user', 'user', 'users'),
+            'venue': ('model_venue', 'venue', 'venues')
+        }
+        for table, (model, singular, plural) in models.items():
+            operations[f'{table}.add'] = _method(c, model, f'add_{singular}')
+            operations[f'{table}.update'] = _method(c, model, f'update_{singular}')
+            operations[f'{table}.delete'] = _method(c, model, f'delete_{singular}')
+            # Пакетні варіанти: {"rows": [...]} або {"<ключ>_ids": [...]} для видалення
+            operations[f'{table}.add_many'] = _method(c, model, f'add_{plural}')
+            operations[f'{table}.update_many'] = _method(c, model, f'update_{plural}')
+            operations[f'{table}.delete_many'] = _method(c, model, f'delete_{plural}')
+            operations[f'{table}.exists'] = _method(c, model, f'check_{singular}_existence')
+            operations[f'{table}.page'] = _method(c, model, f'get_{plural}_page')
+            operations[f'{table}.import'] = _method(c, model, f'import_{plural}')
+            # {"path": "booking.csv.gz", "start": "2024-05-01", "end": "2024-06-01"}
+            operations[f'{table}.export'] = _method(c, model, f'export_{plural}')
+            operations[f'{table}.generate'] = _generate(c, model, singular)
+
+        # {"user_id": 7, "since": "2024-05-01", "limit": 20, "details": true}
+        # або {"user_id": 7, "cursor": ["2024-05-03T00:00:00", 1234]} для наступної сторінки
+        operations['booking.user_bookings'] = _method(c, 'model_booking', 'get_user_bookings')
+        operations['facility.find_free'] = _method(c, 'model_facility', 'find_free_facilities')
+        operations['analytics.most_booked_venue'] = _method(c, 'model_analytics', 'most_booked_venue')
+        operations['analytics.user_activity'] = _method(c, 'model_analytics', 'user_activity')
+        operations['analytics.payment_analysis'] = _method(c, 'model_analytics', 'payment_analysis')
+        operations['analytics.rebuild_summaries'] = _method(c, 'model_analytics', 'rebuild_summaries')
+        # Аналітика за періодом: {"start": "2024-05-01", "end": "2024-05-08", ...}
+        for report in ('revenue_by_period', 'revenue_by_venue', 'revenue_by_status', 'facility_bookings'):
+            operations[f'analytics.{report}'] = _method(c, 'model_analytics', report)
+        operations['analytics.export'] = _method(c, 'model_analytics', 'export_report')
+        operations['truncate'] = _method(c, 'model', 'truncate_all_tables')
+        operations['partitions.convert'] = _method(c, 'model', 'partition_tables')
+        operations['partitions.maintain'] = _method(c, 'model', 'maintain_partitions')
+        operations['snapshot.create'] = self._create_snapshot
+        operations['snapshot.restore'] = self._restore_snapshot
+        return operations
+
+    def _reset(self, action, name):
+        # Знімок і відновлення закривають з'єднання моделей; наступні операції створять нові
+        self.controller.close_models()
+        try:
+            action(name)
+            return True
+        except Exception as e:
+            print(f"Error With Resetting Database: {str(e)}")
+            return False
+
+    def _create_snapshot(self, name):
+        from reset import DatabaseReset
+        return self._reset(DatabaseReset().create_snapshot, name)
+
+    def _restore_snapshot(self, name):
+        from reset import DatabaseReset
+        return self._reset(DatabaseReset().restore_snapshot, name)
+
+    def _convert_args(self, op, args):
+        """
+        Перетворює значення з JSON (рядки дат, сум, часу) на типи, які очікують моделі.
+        """
+        table = op.split('.')[0]
+        converters = dict(TABLE_COLUMNS.get(table, ()))
+        converted = {}
+        for name, value in args.items():
+            if name == 'window':
+                value = tuple(datetime.datetime.fromisoformat(bound) for bound in value)
+            elif name == 'since' and value is not None:
+                value = datetime.datetime.fromisoformat(value)
+            elif name == 'cursor' and value is not None:
+                value = (datetime.datetime.fromisoformat(value[0]), int(value[1]))
+            elif name in ('start', 'end') and (table == 'analytics' or op.endswith('.export')) \
+                    and value is not None:
+                value = datetime.datetime.fromisoformat(value)
+            elif name in converters and value is not None:
+                value = converters[name](value)
+            converted[name] = value
+        return converted
+
+    def run_script(self, lines):
+        """
+        Виконує рядки сценарію. Повертає True, якщо всі операції завершились успішно.
+        """
+        started = time.perf_counter()
+        succeeded = True
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            ok = self.run_line(line_no, line)
+            succeeded = succeeded and ok
+            if not ok and self.stop_on_error:
+                self._write(f"Stopped At Line {line_no}")
+                break
+        self.report(time.perf_counter() - started)
+        return succeeded
+
+    def run_line(self, line_no, line):
+        try:
+            step = json.loads(line)
+            op = step['op']
+            call = self.operations[op]
+            args = self._convert_args(op, step.get('args') or {})
+            repeat = int(step.get('repeat', 1))
+        except KeyError as e:
+            self._write(f"Line {line_no}: Unknown Operation Or Missing Field {e}")
+            return False
+        except (TypeError, ValueError) as e:
+            self._write(f"Line {line_no}: Invalid Operation: {e}")
+            return False
+
+        ok = True
+        for _ in range(repeat):
+            ok = self._execute(line_no, op, call, args) and ok
+        return ok
+
+    def _execute(self, line_no, op, call, args):
+        started = time.perf_counter()
+        try:
+            result = call(**args)
+        except TypeError as e:
+            # Невідповідні аргументи - помилка сценарію, а не бази даних
+            result = None
+            self._write(f"Line {line_no}: {e}")
+        elapsed = time.perf_counter() - started
+
+        ok = result is not False and result is not None
+        stats = self.stats.setdefault(op, [0, 0, 0.0])
+        stats[0] += 1
+        stats[1] += 0 if ok else 1
+        stats[2] += elapsed
+
+        detail = ''
+        if isinstance(result, list):
+            detail = f" ({len(result)} rows)"
+        elif isinstance(result, tuple) and op.endswith('.import'):
+            detail = f" ({result[0]} imported, {result[1]} rejected)"
+        elif ok and isinstance(result, int) and op.endswith(('.export', '.generate')):
+            detail = f" ({result} rows)"
+        self._write(f"{line_no:>5} {op:<32} {'OK' if ok else 'FAILED':<6} {elapsed * 1000:10.3f} ms{detail}")
+        return ok
+
+    def report(self, total_seconds):
+        self._write("\nOperation                        Count  Failed   Total ms    Mean ms")
+        count = 0
+        for op, (op_count, failed, seconds) in sorted(self.stats.items()):
+            count += op_count
+            self._write(f"{op:<32} {op_count:>5} {failed:>7} {seconds * 1000:10.3f} "
+                        f"{seconds / op_count * 1000:10.3f}")
+        if total_seconds:
+            self._write(f"{count} Operations In {total_seconds:.3f} s ({count / total_seconds:.1f} Ops/s)")
+
+    def _write(self, message):
+        print(message, file=self.output)
@@ -0,0 +1,291 @@
+"""
+Відтворюваний бенчмарк CRUD-операцій, аналітики та читання таблиць.
+
+Запуск:
+    python benchmark.py --scale 10k --iterations 200 --seed 42 --output benchmark_results.json
+
+Масштаб задає кількість бронювань (10k, 1m, 10m); кількість закладів, об'єктів,
+користувачів і платежів розраховується пропорційно. Перед наповненням усі таблиці
+очищуються, а генератор випадкових чисел сервера отримує зерно --seed, тож однакові
+аргументи дають однакові дані (або використовуйте --restore зі знімком).
+Результат - JSON з p50/p95/p99 затримками (мс) і пропускною здатністю (операцій
+за секунду) для кожної операції.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import sys
+import time
+
+from Analytics.controller import PERIOD_REPORT_LIMIT
+from Analytics.model import REVENUE_PERIODS
+from columnar import ColumnarAnalytics, copy_table
+from controller import Controller
+from generation import GenerationPipeline
+from reset import DatabaseReset
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Ідентифікатори рядків, які бенчмарк додає і видаляє сам, беруться з цього діапазону
+BENCHMARK_ID_BASE = 2_000_000_000
+
+
+def seed_counts(bookings):
+    return {
+        'venue': max(10, bookings // 1000),
+        'facility': max(50, bookings // 100),
+        'users': max(100, bookings // 10),
+        'booking': bookings,
+        'payment': bookings
+    }
+
+
+def _percentile(sorted_values, percent):
+    # Метод найближчого рангу
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(operation, latencies, failures):
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        'operation': operation,
+        'count': len(ordered),
+        'failures': failures,
+        'p50_ms': round(_percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(_percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(_percentile(ordered, 99) * 1000, 3),
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'throughput_ops_s': round(len(ordered) / total, 1) if total else None
+    }
+
+
+def measure(operation, fn, iterations):
+    """
+    Виконує fn(i) iterations разів і повертає зведення затримок.
+    Повідомлення моделей приглушуються; невдачею вважається результат False або None.
+    """
+    latencies = []
+    failures = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(iterations):
+            started = time.perf_counter()
+            result = fn(i)
+            if isinstance(result, (list, tuple)) or hasattr(result, '__next__'):
+                # Генератори та списки вичитуються повністю, щоб виміряти весь запит
+                result = sum(1 for _ in result) >= 0
+            latencies.append(time.perf_counter() - started)
+            if result is False or result is None:
+                failures += 1
+    return summarize(operation, latencies, failures)
+
+
+class Benchmark:
+    def __init__(self, controller, iterations, read_iterations):
+        self.controller = controller
+        self.iterations = iterations
+        self.read_iterations = read_iterations
+        self.results = []
+
+    def seed(self, bookings, random_seed, workers=1):
+        """
+        Очищує всі таблиці і наповнює базу через GenerationPipeline у порядку залежностей.
+        Повертає None, якщо очищення чи генерація не вдалися.
+        """
+        counts = seed_counts(bookings)
+        controller = self.controller
+        if not controller.model.truncate_all_tables():
+            return None
+        pipeline = GenerationPipeline(controller.model, {
+            'venue': controller.model_venue,
+            'facility': controller.model_facility,
+            'users': controller.model_user,
+            'booking': controller.model_booking,
+            'payment': controller.model_payment
+        }, workers=workers, seed=random_seed)
+        started = time.perf_counter()
+        if not pipeline.run(counts):
+            return None
+        return {'counts': counts, 'random_seed': random_seed, 'workers': workers,
+                'seconds': round(time.perf_counter() - started, 3)}
+
+    def cleanup(self):
+        """
+        Прибирає рядки бенчмарку, що залишилися після перерваного запуску.
+        Бронювання, об'єкти та платежі видаляються каскадно разом із закладами й користувачами.
+        """
+        model = self.controller.model
+        c = model.conn.cursor()
+        for table, key in (('payment', 'payment_id'), ('users', 'user_id'), ('venue', 'venue_id')):
+            c.execute(f'DELETE FROM "{table}" WHERE "{key}" >= %s', (BENCHMARK_ID_BASE,))
+        model.conn.commit()
+        model.existence.clear()
+        model.reference.clear()
+
+    def run(self):
+        self._crud()
+        self._analytics()
+        self._reads()
+        return self.results
+
+    def _record(self, operation, fn, iterations=None):
+        result = measure(operation, fn, iterations or self.iterations)
+        self.results.append(result)
+        print(f"{operation:<32} p50={result['p50_ms']:>9} ms  p95={result['p95_ms']:>9} ms  "
+              f"p99={result['p99_ms']:>9} ms  failures={result['failures']}")
+
+    def _crud(self):
+        c = self.controller
+        n = self.iterations
+        venue_id = BENCHMARK_ID_BASE
+        facility_id = BENCHMARK_ID_BASE
+        user_id = BENCHMARK_ID_BASE
+        ids = [BENCHMARK_ID_BASE + 1 + i for i in range(n)]
+        # Кожне бронювання бенчмарку - в окремий день, щоб не порушувати booking_no_overlap
+        first_day = datetime.date(2100, 1, 1)
+
+        self.cleanup()
+
+        # Батьківські рядки, на які посилаються бенчмаркові бронювання та платежі
+        with contextlib.redirect_stdout(io.StringIO()):
+            c.model_venue.add_venue(venue_id, 'Benchmark Venue', 'Benchmark Street', 'Kyiv', 100)
+            c.model_facility.add_facility(facility_id, 'Benchmark', 'Indoor', venue_id)
+            c.model_user.add_user(user_id, 'Bench', 'Mark', 'bench@example.com', '380000000000',
+                                  datetime.date.today())
+
+        self._record('venue.add', lambda i: c.model_venue.add_venue(
+            ids[i], 'Venue', 'Street', 'Kyiv', 50))
+        self._record('facility.add', lambda i: c.model_facility.add_facility(
+            ids[i], 'Tennis', 'Outdoor', venue_id))
+        self._record('users.add', lambda i: c.model_user.add_user(
+            ids[i], 'Anna', 'Smith', 'anna@example.com', '380501234567', datetime.date.today()))
+        self._record('booking.add', lambda i: c.model_booking.add_booking(
+            ids[i], user_id, facility_id, first_day + datetime.timedelta(days=i),
+            datetime.time(10), datetime.time(12), True))
+        self._record('payment.add', lambda i: c.model_payment.add_payment(
+            ids[i], ids[i], '100.00', datetime.datetime(2100, 1, 1, 10), True))
+
+        self._record('venue.check_existence', lambda i: c.model_venue.check_venue_existence(ids[i]))
+        self._record('facility.check_existence', lambda i: c.model_facility.check_facility_existence(ids[i]))
+        self._record('users.check_existence', lambda i: c.model_user.check_user_existence(ids[i]))
+        self._record('booking.check_existence', lambda i: c.model_booking.check_booking_existence(ids[i]))
+        self._record('payment.check_existence', lambda i: c.model_payment.check_payment_existence(ids[i]))
+
+        self._record('venue.update', lambda i: c.model_venue.update_venue(ids[i], capacity=60))
+        self._record('facility.update', lambda i: c.model_facility.update_facility(
+            ids[i], 'Tennis', 'Indoor', venue_id))
+        self._record('users.update', lambda i: c.model_user.update_user(ids[i], last_name='Brown'))
+        self._record('booking.update', lambda i: c.model_booking.update_booking(
+            ids[i], user_id, facility_id, first_day + datetime.timedelta(days=i),
+            datetime.time(13), datetime.time(15), True))
+        self._record('payment.update', lambda i: c.model_payment.update_payment(
+            ids[i], ids[i], '120.00', datetime.datetime(2100, 1, 1, 11), True))
+
+        self._record('booking.get_page', lambda i: c.model_booking.get_bookings_page(after_id=i * 20))
+        self._record('payment.get_page', lambda i: c.model_payment.get_payments_page(after_id=i * 20))
+        self._record('users.get_page', lambda i: c.model_user.get_users_page(after_id=i * 20))
+        self._record('booking.get_user_bookings', lambda i: c.model_booking.get_user_bookings(user_id))
+        self._record('booking.get_user_bookings_details', lambda i: c.model_booking.get_user_bookings(
+            user_id, details=True))
+
+        # Видалення у зворотному порядку залежностей
+        self._record('payment.delete', lambda i: c.model_payment.delete_payment(ids[i]))
+        self._record('booking.delete', lambda i: c.model_booking.delete_booking(ids[i]))
+        self._record('users.delete', lambda i: c.model_user.delete_user(ids[i]))
+        self._record('facility.delete', lambda i: c.model_facility.delete_facility(ids[i]))
+        self._record('venue.delete', lambda i: c.model_venue.delete_venue(ids[i]))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            c.model_user.delete_user(user_id)
+            c.model_venue.delete_venue(venue_id)
+
+    def _analytics(self):
+        a = self.controller.model_analytics
+        self._record('analytics.most_booked_venue', lambda i: a.most_booked_venue())
+        self._record('analytics.user_activity', lambda i: a.user_activity())
+        self._record('analytics.payment_analysis', lambda i: a.payment_analysis())
+
+        # Звіти за період охоплюють усі згенеровані платежі (30 днів до запуску)
+        # і бронювання (31 день після нього)
+        start = datetime.date.today() - datetime.timedelta(days=30)
+        end = datetime.date.today() + datetime.timedelta(days=32)
+        for period in REVENUE_PERIODS:
+            self._record(f'analytics.revenue_by_period_{period}', lambda i: a.revenue_by_period(start, end, period))
+        self._record('analytics.revenue_by_venue', lambda i: a.revenue_by_venue(start, end, PERIOD_REPORT_LIMIT))
+        self._record('analytics.revenue_by_status', lambda i: a.revenue_by_status(start, end))
+        self._record('analytics.facility_bookings', lambda i: a.facility_bookings(start, end, PERIOD_REPORT_LIMIT))
+
+        # Ті самі звіти у процесі над колонками з бінарного COPY; вивантаження вимірюється окремо
+        columns = ColumnarAnalytics(self.controller.model)
+        self._record('analytics.columnar_load', lambda i: columns.load(), self.read_iterations)
+        self._record('analytics.columnar_most_booked_venue', lambda i: columns.most_booked_venue())
+        self._record('analytics.columnar_user_activity', lambda i: columns.user_activity())
+        self._record('analytics.columnar_payment_analysis', lambda i: columns.payment_analysis())
+
+    def _reads(self):
+        c = self.controller
+        readers = [
+            ('venue', c.model_venue.get_all_venues, c.model_venue.iter_venues),
+            ('facility', c.model_facility.get_all_facilities, c.model_facility.iter_facilities),
+            ('users', c.model_user.get_all_users, c.model_user.iter_users),
+            ('booking', c.model_booking.get_all_bookings, c.model_booking.iter_bookings),
+            ('payment', c.model_payment.get_all_payments, c.model_payment.iter_payments)
+        ]
+        for table, get_all, iterate in readers:
+            self._record(f'{table}.get_all', lambda i: get_all(), self.read_iterations)
+            self._record(f'{table}.iter', lambda i: iterate(), self.read_iterations)
+            self._record(f'{table}.columns', lambda i: copy_table(c.model.conn, table), self.read_iterations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CRUD, analytics and table reads.")
+    parser.add_argument('--scale', choices=SCALES, default='10k', help="number of seeded bookings")
+    parser.add_argument('--iterations', type=int, default=200, help="iterations per CRUD/analytics operation")
+    parser.add_argument('--read-iterations', type=int, default=3, help="iterations per full-table read")
+    parser.add_argument('--skip-seed', action='store_true', help="benchmark the data already in the database")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the generated data")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="parallel generation connections (only 1 gives identical data for a seed)")
+    parser.add_argument('--restore', metavar='SNAPSHOT',
+                        help="restore this database snapshot instead of seeding")
+    parser.add_argument('--output', default='benchmark_results.json', help="path of the JSON report")
+    args = parser.parse_args(argv)
+
+    if args.restore:
+        DatabaseReset().restore_snapshot(args.restore)
+    controller = Controller()
+    benchmark = Benchmark(controller, args.iterations, args.read_iterations)
+
+    report = {
+        'scale': args.scale,
+        'iterations': args.iterations,
+        'read_iterations': args.read_iterations,
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'server_version': controller.model.conn.info.server_version
+    }
+    if args.restore:
+        report['snapshot'] = args.restore
+    elif not args.skip_seed:
+        print(f"Seeding {SCALES[args.scale]} bookings...")
+        report['seed'] = benchmark.seed(SCALES[args.scale], args.seed, args.workers)
+        if report['seed'] is None:
+            print("Seeding failed")
+            return 1
+    report['results'] = benchmark.run()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import csv
+import datetime
+import decimal
+import json
+import os
+
+import psycopg
+
+# Скільки рядків перевіряється і записується через COPY за одну транзакцію
+IMPORT_CHUNK_SIZE = int(os.environ.get('DB_IMPORT_CHUNK_SIZE', 10000))
+
+# Помилки, спричинені самими рядками (формат значення, дублікат ключа, порушення обмеження):
+# лише їх можна звузити до проблемного рядка. Обрив з'єднання чи інша помилка бази
+# не залежить від рядків і перериває імпорт
+ROW_ERRORS = (psycopg.DataError, psycopg.IntegrityError)
+
+
+def _text(value):
+    value = str(value).strip()
+    if not value:
+        raise ValueError("empty value")
+    return value
+
+
+def _int(value):
+    return int(value)
+
+
+def _decimal(value):
+    try:
+        return decimal.Decimal(str(value).strip().lstrip('$').replace(',', ''))
+    except decimal.InvalidOperation:
+        raise ValueError(f"invalid amount {value!r}")
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('true', 't', '1', 'yes', 'y'):
+        return True
+    if text in ('false', 'f', '0', 'no', 'n'):
+        return False
+    raise ValueError(f"invalid boolean {value!r}")
+
+
+def _date(value):
+    return datetime.date.fromisoformat(str(value).strip())
+
+
+def _timestamp(value):
+    return datetime.datetime.fromisoformat(str(value).strip())
+
+
+def _time(value):
+    return datetime.time.fromisoformat(str(value).strip())
+
+
+# Колонки кожної таблиці з функціями перевірки; перша колонка - первинний ключ
+TABLE_COLUMNS = {
+    'booking': [
+        ('booking_id', _int), ('user_id', _int), ('facility_id', _int), ('booking_date', _timestamp),
+        ('start_time', _time), ('end_time', _time), ('status', _bool)
+    ],
+    'facility': [
+        ('facility_id', _int), ('venue_id', _int), ('facility_name', _text), ('facility_type', _text)
+    ],
+    'payment': [
+        ('payment_id', _int), ('booking_id', _int), ('amount', _decimal), ('payment_date', _timestamp),
+        ('payment_status', _bool)
+    ],
+    'users': [
+        ('user_id', _int), ('first_name', _text), ('last_name', _text), ('email', _text),
+        ('phone_number', _text), ('date_of_registration', _date)
+    ],
+    'venue': [
+        ('venue_id', _int), ('name', _text), ('address', _text), ('city', _text), ('capacity', _int)
+    ]
+}
+
+
+class BulkImporter:
+    """
+    Потоково завантажує CSV або JSONL файл у таблицю через COPY FROM STDIN.
+    Рядки перевіряються пакетами; відхилені рядки разом з причиною
+    записуються у JSONL файл поруч із вхідним файлом.
+    """
+
+    def __init__(self, conn, table, chunk_size=IMPORT_CHUNK_SIZE):
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table {table!r}")
+        self.conn = conn
+        self.table = table
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.rejected = 0
+        self._rejects_path = None
+        self._rejects_file = None
+
+    def import_file(self, path, file_format=None, rejects_path=None):
+        """
+        Повертає кортеж (кількість імпортованих, кількість відхилених рядків).
+        Помилка, не пов'язана з рядками (наприклад, обрив з'єднання), перериває імпорт;
+        уже зафіксовані пакети залишаються, а при повторному імпорті того самого файлу
+        їхні рядки з явним ключем відхиляться як дублікати.
+        """
+        file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        self._rejects_path = rejects_path or f"{path}.rejected.jsonl"
+        self.imported = self.rejected = 0
+        if os.path.exists(self._rejects_path):
+            os.remove(self._rejects_path)
+
+        # Кожен пакет - окрема транзакція, тому не залишаємо відкритої попередньої
+        self.conn.commit()
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                records = self._read_jsonl(f) if file_format == 'jsonl' else self._read_csv(f)
+                self._load(records)
+        finally:
+            if self._rejects_file:
+                self._rejects_file.close()
+                self._rejects_file = None
+        return self.imported, self.rejected
+
+    def _read_csv(self, f):
+        for line_no, record in enumerate(csv.DictReader(f), start=2):
+            yield line_no, record, None
+
+    def _read_jsonl(self, f):
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("line is not a JSON object")
+                yield line_no, record, None
+            except ValueError as e:
+                yield line_no, line.rstrip('\n'), str(e)
+
+    def _load(self, records):
+        chunk = []
+        for line_no, record, error in records:
+            chunk.append((line_no, record, error))
+            if len(chunk) >= self.chunk_size:
+                self._load_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._load_chunk(chunk)
+
+    def _has_key(self, record):
+        # Первинний ключ необов'язковий: без нього id видає послідовність таблиці.
+        # Рішення приймається для кожного рядка, тому файл може змішувати обидва види
+        return record.get(TABLE_COLUMNS[self.table][0][0]) not in (None, '')
+
+    def _validate(self, columns, record):
+        row = []
+        for name, convert in columns:
+            value = record.get(name)
+            if value is None or value == '':
+                raise ValueError(f"missing {name}")
+            try:
+                row.append(convert(value))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{name}: {e}")
+        return tuple(row)
+
+    def _load_chunk(self, chunk):
+        # Рядки з явним ключем і без нього записуються окремими COPY з різним списком колонок
+        columns = TABLE_COLUMNS[self.table]
+        with_key, without_key = [], []
+        for line_no, record, error in chunk:
+            if error is None:
+                has_key = self._has_key(record)
+                try:
+                    row = (line_no, record, self._validate(columns if has_key else columns[1:], record))
+                    (with_key if has_key else without_key).append(row)
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            self._reject(line_no, record, error)
+
+        if with_key:
+            self._copy_rows(columns, with_key)
+            self._advance_sequence()
+        if without_key:
+            self._copy_rows(columns[1:], without_key)
+
+    def _copy_rows(self, columns, rows):
+        column_list = ', '.join(f'"{name}"' for name, _ in columns)
+        try:
+            with self.conn.transaction():
+                with self.conn.cursor() as c:
+                    with c.copy(f'COPY "{self.table}" ({column_list}) FROM STDIN') as copy:
+                        for _, _, row in rows:
+                            copy.write_row(row)
+            self.imported += len(rows)
+        except ROW_ERRORS as e:
+            # Помилка рядка (дублікат ключа, порушення обмеження) скасовує весь COPY,
+            # тому пакет ділиться навпіл, доки не залишиться сам проблемний рядок
+            if len(rows) == 1:
+                line_no, record, _ = rows[0]
+                self._reject(line_no, record, str(e).splitlines()[0])
+            else:
+                middle = len(rows) // 2
+                self._copy_rows(columns, rows[:middle])
+                self._copy_rows(columns, rows[middle:])
+
+    def _advance_sequence(self):
+        # Явні ключі не рухають послідовність, тож без цього наступні рядки без ключа
+        # отримали б уже зайняті id і відхилилися б як дублікати
+        key = TABLE_COLUMNS[self.table][0][0]
+        with self.conn.transaction():
+            with self.conn.cursor() as c:
+                c.execute('SELECT pg_get_serial_sequence(%s, %s)', (self.table, key))
+                sequence = c.fetchone()[0]
+                c.execute(f'SELECT setval(%s, m) FROM (SELECT max("{key}") AS m FROM "{self.table}") t '
+                          f'WHERE m > (SELECT last_value FROM {sequence})', (sequence,))
+
+    def _reject(self, line_no, record, error):
+        if self._rejects_file is None:
+            self._rejects_file = open(self._rejects_path, 'w', encoding='utf-8')
+        self._rejects_file.write(json.dumps({'line': line_no, 'record': record, 'error': error},
+                                            default=str, ensure_ascii=False) + '\n')
+        self.rejected += 1
@@ -0,0 +1,245 @@
+import decimal
+import os
+import struct
+
+import numpy as np
+
+from model import fetch_rows
+
+# Скільки рядків результату сервер пакує в один рядок COPY (по масиву на колонку)
+COLUMNAR_BLOCK_ROWS = int(os.environ.get('DB_COLUMNAR_BLOCK_ROWS', 1000))
+
+# Бінарний COPY: сигнатура, прапорці й довжина розширення заголовка, а в кінці - лічильник полів -1
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_COPY_HEADER = struct.Struct('>11sii')
+_INT16 = struct.Struct('>h')
+_INT32 = struct.Struct('>i')
+# Заголовок одновимірного масиву: вимірність, ознака NULL, тип елемента, довжина, нижня межа
+_ARRAY_HEADER = struct.Struct('>iiiii')
+
+# Тип PostgreSQL (OID) -> (розмір значення, dtype у потоці COPY, dtype колонки).
+# У бінарному форматі date - дні, time і timestamp - мікросекунди від 2000-01-01,
+# money - ціле число копійок (дві дробові цифри), timestamptz - у UTC
+_COLUMN_TYPES = {
+    16: (1, '?', 'bool'),
+    21: (2, '>i2', 'int16'),
+    23: (4, '>i4', 'int32'),
+    20: (8, '>i8', 'int64'),
+    700: (4, '>f4', 'float32'),
+    701: (8, '>f8', 'float64'),
+    790: (8, '>i8', 'int64'),
+    1082: (4, '>i4', 'datetime64[D]'),
+    1083: (8, '>i8', 'timedelta64[us]'),
+    1114: (8, '>i8', 'datetime64[us]'),
+    1184: (8, '>i8', 'datetime64[us]')
+}
+
+# Зсув епохи PostgreSQL (2000-01-01) відносно епохи numpy (1970-01-01)
+_EPOCH_OFFSETS = {
+    'datetime64[D]': 10_957,
+    'datetime64[us]': 946_684_800_000_000
+}
+
+
+def _describe(conn, query, params):
+    c = conn.cursor()
+    c.execute(f'SELECT * FROM ({query}) AS q LIMIT 0', params)
+    return [(column.name, column.type_code) for column in c.description]
+
+
+def _block_query(query, description, block_rows, order_by=None):
+    # Сервер надсилає кожен рядок COPY окремим повідомленням, і його обробка в Python коштує
+    # більше за сам рядок. Рядки групуються в блоки по block_rows з масивом на колонку:
+    # усі array_agg групи отримують рядки в одному порядку, тож масиви вирівняні між собою.
+    # ORDER BY підзапиту чи паралельне виконання порядку рядків у блоках не зберігають, тому
+    # з order_by рядки нумеруються в цьому порядку і масиви сортуються за номером (ціною
+    # ще одного сортування результату)
+    over, within = (f'ORDER BY {order_by}', ' ORDER BY b."row_number"') if order_by else ('', '')
+    aggregates = ', '.join(f'array_agg(b."{name}"{within})' for name, _ in description)
+    block = f'(b."row_number" - 1) / {int(block_rows)}'
+    return f'''
+        SELECT {aggregates}
+        FROM (SELECT q.*, row_number() OVER ({over}) AS "row_number" FROM ({query}) AS q) AS b
+        GROUP BY {block}
+        ORDER BY {block}
+    '''
+
+
+def _row_end(buffer, pos):
+    # Кінець рядка COPY, що починається з pos, або None, якщо рядок ще не надійшов повністю
+    if pos + 2 > len(buffer):
+        return None
+    count, = _INT16.unpack_from(buffer, pos)
+    if count == -1:
+        return pos + 2
+    pos += 2
+    for _ in range(count):
+        if pos + 4 > len(buffer):
+            return None
+        length, = _INT32.unpack_from(buffer, pos)
+        pos += 4 + max(length, 0)
+    return pos if pos <= len(buffer) else None
+
+
+def _parse_block(buffer, description):
+    # Рядок-блок: кількість полів, далі для кожної колонки довжина і одновимірний масив,
+    # елементи якого - пари (довжина int32, значення) фіксованого розміру
+    pos = 2
+    columns = []
+    for name, type_code in description:
+        size, stream_dtype, _ = _COLUMN_TYPES[type_code]
+        pos += 4
+        _, has_null, _, rows, _ = _ARRAY_HEADER.unpack_from(buffer, pos)
+        if has_null:
+            raise ValueError(f"column {name} contains NULL values; filter them out or use COALESCE")
+        pos += _ARRAY_HEADER.size
+        elements = np.frombuffer(buffer, dtype=[('length', '>i4'), ('value', stream_dtype)], count=rows,
+                                 offset=pos)
+        if not (elements['length'] == size).all():
+            raise ValueError(f"unexpected value size in column {name}")
+        columns.append(elements['value'])
+        pos += elements.nbytes
+    return columns
+
+
+def _convert(values, dtype):
+    if dtype in _EPOCH_OFFSETS:
+        return (values.astype(np.int64) + _EPOCH_OFFSETS[dtype]).view(dtype)
+    return values.astype(dtype)
+
+
+def copy_columns(conn, query, params=None, block_rows=COLUMNAR_BLOCK_ROWS, order_by=None):
+    """
+    Виконує query через COPY (...) TO STDOUT (FORMAT binary) і повертає словник
+    колонка -> одновимірний масив numpy. Рядки йдуть у порядку order_by - виразу ORDER BY
+    над колонками query (наприклад '"booking_id"'); без нього порядок не визначений,
+    але i-ті елементи всіх масивів завжди належать одному рядку. Значення
+    розбираються np.frombuffer блоками по block_rows, тому жоден рядок не стає кортежем Python.
+    Підтримуються лише колонки фіксованої довжини без NULL: ідентифікатори, числа,
+    boolean, money (копійки int64), date, time і timestamp (datetime64/timedelta64).
+    """
+    description = _describe(conn, query, params)
+    for name, type_code in description:
+        if type_code not in _COLUMN_TYPES:
+            raise ValueError(f"column {name} has a variable-width or unsupported type (oid {type_code}); "
+                             f"leave it out or cast it to a fixed-width type")
+    blocks = []
+    buffer = bytearray()
+    pos = None
+    finished = False
+
+    c = conn.cursor()
+    with c.copy(f'COPY ({_block_query(query, description, block_rows, order_by)}) TO STDOUT (FORMAT binary)',
+                params) as copy:
+        for data in copy:
+            buffer += data
+            if pos is None:
+                if len(buffer) < _COPY_HEADER.size:
+                    continue
+                signature, _, extension = _COPY_HEADER.unpack_from(buffer)
+                if signature != _COPY_SIGNATURE:
+                    raise ValueError("not a binary COPY stream")
+                pos = _COPY_HEADER.size + extension
+            while (end := _row_end(buffer, pos)) is not None:
+                if _INT16.unpack_from(buffer, pos)[0] == -1:
+                    finished = True
+                    break
+                blocks.append(_parse_block(bytes(buffer[pos:end]), description))
+                pos = end
+            del buffer[:pos]
+            pos = 0
+    conn.commit()
+
+    if not finished:
+        raise ValueError("unexpected end of COPY stream")
+    return {
+        name: _convert(np.concatenate([block[index] for block in blocks]) if blocks
+                       else np.empty(0, dtype=_COLUMN_TYPES[type_code][1]), _COLUMN_TYPES[type_code][2])
+        for index, (name, type_code) in enumerate(description)
+    }
+
+
+def copy_table(conn, table, columns=None, block_rows=COLUMNAR_BLOCK_ROWS, order_by=None):
+    """
+    Колонки таблиці table у масивах numpy (copy_columns). columns=None - усі колонки
+    підтримуваних типів; текстові колонки та діапазони (during) пропускаються.
+    """
+    if columns is None:
+        columns = [name for name, type_code in _describe(conn, f'SELECT * FROM "{table}"', None)
+                   if type_code in _COLUMN_TYPES]
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    return copy_columns(conn, f'SELECT {column_list} FROM "{table}"', block_rows=block_rows, order_by=order_by)
+
+
+def _lookup(keys, values, wanted):
+    # Значення values для кожного wanted за ключами keys (аналог JOIN через сортування і бінарний пошук).
+    # Як і внутрішній JOIN, wanted без відповідного ключа пропускаються: таблиці читаються окремими
+    # запитами, тож рядок може посилатися на ключ, вставлений після читання keys.
+    # Повертає (значення знайдених, маска знайдених у wanted)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.searchsorted(sorted_keys, wanted)
+    found = positions < len(sorted_keys)
+    found[found] = sorted_keys[positions[found]] == wanted[found]
+    return values[order][positions[found]], found
+
+
+def _top(ids, limit):
+    # (ідентифікатори, кількості) найчастіших значень: за кількістю від більшої, далі за ідентифікатором
+    unique, counts = np.unique(ids, return_counts=True)
+    order = np.lexsort((unique, -counts))[:limit]
+    return unique[order], counts[order]
+
+
+class ColumnarAnalytics:
+    """
+    Звіти ModelAnalytics, обчислені у процесі над колонками booking, facility і payment,
+    отриманими через бінарний COPY (copy_table). Колонки завантажуються один раз при
+    першому звіті або викликом load() і відображають стан бази на момент завантаження.
+    Звіти повертають рядки тієї ж форми, що й ModelAnalytics; виручка - Decimal.
+    """
+
+    def __init__(self, db_model):
+        self.db_model = db_model
+        self.columns = None
+
+    def load(self):
+        read = self.db_model.read
+        self.columns = {
+            'booking': read(copy_table, 'booking', ('user_id', 'facility_id')),
+            'facility': read(copy_table, 'facility', ('facility_id', 'venue_id')),
+            'payment': read(copy_table, 'payment', ('payment_status', 'amount'))
+        }
+        return self.columns
+
+    def _table(self, table):
+        if self.columns is None:
+            self.load()
+        return self.columns[table]
+
+    def most_booked_venue(self):
+        booking, facility = self._table('booking'), self._table('facility')
+        venues, _ = _lookup(facility['facility_id'], facility['venue_id'], booking['facility_id'])
+        if not len(venues):
+            return []
+        (venue_id,), (total,) = _top(venues, 1)
+        venue = self.db_model.reference.get_venue(int(venue_id))
+        return [(int(venue_id), venue[1] if venue else None, int(total))]
+
+    def user_activity(self, limit=5):
+        user_ids, totals = _top(self._table('booking')['user_id'], limit)
+        rows = self.db_model.read(fetch_rows, 'SELECT "user_id", "first_name", "last_name" FROM "users" '
+                                              'WHERE "user_id" = ANY(%s)', (user_ids.tolist(),))
+        names = {row[0]: row[1:] for row in rows}
+        return [(int(user_id), *names.get(int(user_id), (None, None)), int(total))
+                for user_id, total in zip(user_ids, totals)]
+
+    def payment_analysis(self):
+        payment = self._table('payment')
+        rows = []
+        for status in (True, False):
+            selected = payment['payment_status'] == status
+            if selected.any():
+                revenue = decimal.Decimal(int(payment['amount'][selected].sum())).scaleb(-2)
+                rows.append((status, int(selected.sum()), revenue))
+        return sorted(rows, key=lambda row: row[2], reverse=True)
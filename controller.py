@@ -1,180 +1,412 @@
-from model import Model
-
-from Booking.view import ViewBooking
-from Booking.model import ModelBooking
-from Booking.controller import ControllerBooking
-
-from Facility.view import ViewFacility
-from Facility.model import ModelFacility
-from Facility.controller import ControllerFacility
-
-from Payment.view import ViewPayment
-from Payment.model import ModelPayment
-from Payment.controller import ControllerPayment
-
-from Users.view import ViewUser
-from Users.model import ModelUser
-from Users.controller import ControllerUser
-
-from Venue.view import ViewVenue
-from Venue.model import ModelVenue
-from Venue.controller import ControllerVenue
-
-from Analytics.view import ViewAnalytics
-from Analytics.model import ModelAnalytics
-from Analytics.controller import ControllerAnalytics
-
-
-class Controller:
-    def __init__(self):
-        self.model = Model()
-        self.view_booking = ViewBooking()
-        self.view_facility = ViewFacility()
-        self.view_payment = ViewPayment()
-        self.view_user = ViewUser()
-        self.view_venue = ViewVenue()
-        self.view_analytics = ViewAnalytics()
-
-        self.model_booking = ModelBooking(self.model)
-        self.model_facility = ModelFacility(self.model)
-        self.model_payment = ModelPayment(self.model)
-        self.model_user = ModelUser(self.model)
-        self.model_venue = ModelVenue(self.model)
-        self.model_analytics = ModelAnalytics(self.model)
-
-        self.controller_booking = ControllerBooking(self.model_booking, self.view_booking)
-        self.controller_facility = ControllerFacility(self.model_facility, self.view_facility)
-        self.controller_payment = ControllerPayment(self.model_payment, self.view_payment)
-        self.controller_user = ControllerUser(self.model_user, self.view_user)
-        self.controller_venue = ControllerVenue(self.model_venue, self.view_venue)
-        self.controller_analytics = ControllerAnalytics(self.model_analytics, self.view_analytics)
-
-    def run(self):
-        methods = {
-            '1': self.controller_booking.add_booking,
-            '2': self.controller_facility.add_facility,
-            '3': self.controller_payment.add_payment,
-            '4': self.controller_user.add_user,
-            '5': self.controller_venue.add_venue,
-            '6': self.controller_booking.view_bookings,
-            '7': self.controller_facility.view_facilities,
-            '8': self.controller_payment.view_payments,
-            '9': self.controller_user.view_users,
-            '10': self.controller_venue.view_venues,
-            '11': self.controller_booking.update_booking,
-            '12': self.controller_facility.update_facility,
-            '13': self.controller_payment.update_payment,
-            '14': self.controller_user.update_user,
-            '15': self.controller_venue.update_venue,
-            '16': self.controller_booking.delete_booking,
-            '17': self.controller_facility.delete_facility,
-            '18': self.controller_payment.delete_payment,
-            '19': self.controller_user.delete_user,
-            '20': self.controller_venue.delete_venue,
-            '21': self.generate_rand_data,
-            '22': self.truncate_all_tables,
-            '23': self.display_analytics
-        }
-
-        while True:
-            choice = self.show_menu()
-
-            if choice in methods:
-                methods[choice]()
-            elif choice == '24':
-                break
-
-    MENU_OPTIONS = [
-        "Add New Booking",
-        "Add New Facility",
-        "Add New Payment",
-        "Add New User",
-        "Add New Venue",
-        "Show Bookings",
-        "Show Facilities",
-        "Show Payments",
-        "Show Users",
-        "Show Venues",
-        "Update Booking",
-        "Update Facility",
-        "Update Payment",
-        "Update User",
-        "Update Venue",
-        "Remove Booking",
-        "Remove Facility",
-        "Remove Payment",
-        "Remove User",
-        "Remove Venue",
-        "Create Data By Random",
-        "Delete All Data",
-        "View Analytics",
-        "Exit"
-    ]
-
-    def show_menu(self):
-        self.view_facility.show_facility_message("\nMain Menu:")
-        for idx, option in enumerate(self.MENU_OPTIONS, start=1):
-            self.view_facility.show_facility_message(f"{idx}. {option}")
-        return input("Choose an action : ")
-
-    def create_venue_sequence(self):
-        self.controller_venue.create_venue_sequence()
-
-    def generate_rand_venue_data(self, number_of_operations):
-        self.controller_venue.generate_rand_venue_data(number_of_operations)
-
-    def create_facility_sequence(self):
-        self.controller_facility.create_facility_sequence()
-
-    def generate_rand_facility_data(self, number_of_operations):
-        self.controller_facility.generate_rand_facility_data(number_of_operations)
-
-    def create_user_sequence(self):
-        self.controller_user.create_user_sequence()
-
-    def generate_rand_user_data(self, number_of_operations):
-        self.controller_user.generate_rand_user_data(number_of_operations)
-
-    def create_booking_sequence(self):
-        self.controller_booking.create_booking_sequence()
-
-    def generate_rand_booking_data(self, number_of_operations):
-        self.controller_booking.generate_rand_booking_data(number_of_operations)
-
-    def create_payment_sequence(self):
-        self.controller_payment.create_payment_sequence()
-
-    def generate_rand_payment_data(self, number_of_operations):
-        self.controller_payment.generate_rand_payment_data(number_of_operations)
-
-    def generate_rand_data(self):
-        number_of_operations = int(input("Input Number Of Generations: "))
-        self.create_booking_sequence()
-        self.generate_rand_booking_data(number_of_operations)
-        self.create_facility_sequence()
-        self.generate_rand_facility_data(number_of_operations)
-        self.create_payment_sequence()
-        self.generate_rand_payment_data(number_of_operations)
-        self.create_user_sequence()
-        self.generate_rand_user_data(number_of_operations)
-        self.create_venue_sequence()
-        self.generate_rand_venue_data(number_of_operations)
-
-    def truncate_all_tables(self):
-        if input("Confirm The Action. Type Yes or No: ") == "Yes":
-            self.controller_booking.truncate_booking_table()
-            self.controller_facility.truncate_facility_table()
-            self.controller_payment.truncate_payment_table()
-            self.controller_user.truncate_user_table()
-            self.controller_venue.truncate_venue_table()
-        else:
-            print("Ok")
-
-    def display_analytics(self):
-        print("-------------------------------------------------------------------------------")
-        self.controller_analytics.most_booked_venue()
-        print("-------------------------------------------------------------------------------")
-        self.controller_analytics.user_activity()
-        print("-------------------------------------------------------------------------------")
-        self.controller_analytics.payment_analysis()
+import datetime
+from functools import cached_property
+
+from Booking.view import ViewBooking
+from Facility.view import ViewFacility
+from Payment.view import ViewPayment
+from Users.view import ViewUser
+from Venue.view import ViewVenue
+from Analytics.view import ViewAnalytics
+
+# Атрибути, які створюються при першому зверненні і скидаються close_models
+_LAZY_ATTRIBUTES = (
+    'model', 'model_booking', 'model_facility', 'model_payment', 'model_user', 'model_venue', 'model_analytics',
+    'controller_booking', 'controller_facility', 'controller_payment', 'controller_user', 'controller_venue',
+    'controller_analytics'
+)
+
+
+class Controller:
+    def __init__(self, check_schema=None):
+        # None - перевіряти схему, якщо її не вимкнено DB_SKIP_SCHEMA_CHECK (model.CHECK_SCHEMA)
+        self.check_schema = check_schema
+        self.view_booking = ViewBooking()
+        self.view_facility = ViewFacility()
+        self.view_payment = ViewPayment()
+        self.view_user = ViewUser()
+        self.view_venue = ViewVenue()
+        self.view_analytics = ViewAnalytics()
+
+    def close_models(self):
+        # Моделі тримають з'єднання з базою: знімок і відновлення вимагають їх закрити,
+        # а після відновлення моделі створюються заново при наступному зверненні
+        if 'model' in self.__dict__:
+            self.model.close()
+        for name in _LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+    # Моделі, контролери та модулі сутностей створюються та імпортуються при першому
+    # зверненні: сценарій, що працює з однією таблицею, не платить за решту. Тому й модулі,
+    # що тягнуть alch (рушій SQLAlchemy, psycopg), імпортуються лише в методах
+    @cached_property
+    def model(self):
+        from model import CHECK_SCHEMA, Model
+        return Model(check_schema=CHECK_SCHEMA if self.check_schema is None else self.check_schema)
+
+    @cached_property
+    def model_booking(self):
+        from Booking.model import ModelBooking
+        return ModelBooking(self.model)
+
+    @cached_property
+    def model_facility(self):
+        from Facility.model import ModelFacility
+        return ModelFacility(self.model)
+
+    @cached_property
+    def model_payment(self):
+        from Payment.model import ModelPayment
+        return ModelPayment(self.model)
+
+    @cached_property
+    def model_user(self):
+        from Users.model import ModelUser
+        return ModelUser(self.model)
+
+    @cached_property
+    def model_venue(self):
+        from Venue.model import ModelVenue
+        return ModelVenue(self.model)
+
+    @cached_property
+    def model_analytics(self):
+        from Analytics.model import ModelAnalytics
+        return ModelAnalytics(self.model)
+
+    @cached_property
+    def controller_booking(self):
+        from Booking.controller import ControllerBooking
+        return ControllerBooking(self.model_booking, self.view_booking)
+
+    @cached_property
+    def controller_facility(self):
+        from Facility.controller import ControllerFacility
+        return ControllerFacility(self.model_facility, self.view_facility)
+
+    @cached_property
+    def controller_payment(self):
+        from Payment.controller import ControllerPayment
+        return ControllerPayment(self.model_payment, self.view_payment)
+
+    @cached_property
+    def controller_user(self):
+        from Users.controller import ControllerUser
+        return ControllerUser(self.model_user, self.view_user)
+
+    @cached_property
+    def controller_venue(self):
+        from Venue.controller import ControllerVenue
+        return ControllerVenue(self.model_venue, self.view_venue)
+
+    @cached_property
+    def controller_analytics(self):
+        from Analytics.controller import ControllerAnalytics
+        return ControllerAnalytics(self.model_analytics, self.view_analytics)
+
+    def run(self):
+        # Пункт меню -> (контролер сутності або None для самого Controller, метод).
+        # Контролер береться при виборі пункту, тому створюється лише за потреби
+        methods = {
+            '1': ('controller_booking', 'add_booking'),
+            '2': ('controller_facility', 'add_facility'),
+            '3': ('controller_payment', 'add_payment'),
+            '4': ('controller_user', 'add_user'),
+            '5': ('controller_venue', 'add_venue'),
+            '6': ('controller_booking', 'view_bookings'),
+            '7': ('controller_facility', 'view_facilities'),
+            '8': ('controller_payment', 'view_payments'),
+            '9': ('controller_user', 'view_users'),
+            '10': ('controller_venue', 'view_venues'),
+            '11': ('controller_booking', 'update_booking'),
+            '12': ('controller_facility', 'update_facility'),
+            '13': ('controller_payment', 'update_payment'),
+            '14': ('controller_user', 'update_user'),
+            '15': ('controller_venue', 'update_venue'),
+            '16': ('controller_booking', 'delete_booking'),
+            '17': ('controller_facility', 'delete_facility'),
+            '18': ('controller_payment', 'delete_payment'),
+            '19': ('controller_user', 'delete_user'),
+            '20': ('controller_venue', 'delete_venue'),
+            '21': (None, 'generate_rand_data'),
+            '22': (None, 'truncate_all_tables'),
+            '23': (None, 'display_analytics'),
+            '24': (None, 'import_data'),
+            '25': ('controller_analytics', 'rebuild_summaries'),
+            '26': (None, 'ensure_indexes'),
+            '27': ('controller_facility', 'find_free_facilities'),
+            '28': (None, 'reset_database'),
+            '29': (None, 'show_query_stats'),
+            '30': ('controller_analytics', 'period_analytics'),
+            '31': (None, 'partition_tables'),
+            '32': (None, 'export_data'),
+            '33': ('controller_booking', 'view_user_bookings')
+        }
+
+        while True:
+            choice = self.show_menu()
+
+            if choice in methods:
+                owner, method = methods[choice]
+                getattr(getattr(self, owner) if owner else self, method)()
+            elif choice == str(len(self.MENU_OPTIONS)):
+                break
+
+    MENU_OPTIONS = [
+        "Add New Booking",
+        "Add New Facility",
+        "Add New Payment",
+        "Add New User",
+        "Add New Venue",
+        "Show Bookings",
+        "Show Facilities",
+        "Show Payments",
+        "Show Users",
+        "Show Venues",
+        "Update Booking",
+        "Update Facility",
+        "Update Payment",
+        "Update User",
+        "Update Venue",
+        "Remove Booking",
+        "Remove Facility",
+        "Remove Payment",
+        "Remove User",
+        "Remove Venue",
+        "Create Data By Random",
+        "Delete All Data",
+        "View Analytics",
+        "Import Data From File",
+        "Rebuild Analytics Summaries",
+        "Ensure Indexes And Constraints",
+        "Find Free Facilities",
+        "Reset Database Or Snapshots",
+        "Show Slowest Queries",
+        "View Analytics For Period",
+        "Partition Tables By Date",
+        "Export Data To File",
+        "Show User Bookings",
+        "Exit"
+    ]
+
+    def show_menu(self):
+        self.view_facility.show_facility_message("\nMain Menu:")
+        for idx, option in enumerate(self.MENU_OPTIONS, start=1):
+            self.view_facility.show_facility_message(f"{idx}. {option}")
+        return input("Choose an action : ")
+
+    def create_venue_sequence(self):
+        self.controller_venue.create_venue_sequence()
+
+    def generate_rand_venue_data(self, number_of_operations):
+        self.controller_venue.generate_rand_venue_data(number_of_operations)
+
+    def create_facility_sequence(self):
+        self.controller_facility.create_facility_sequence()
+
+    def generate_rand_facility_data(self, number_of_operations):
+        self.controller_facility.generate_rand_facility_data(number_of_operations)
+
+    def create_user_sequence(self):
+        self.controller_user.create_user_sequence()
+
+    def generate_rand_user_data(self, number_of_operations):
+        self.controller_user.generate_rand_user_data(number_of_operations)
+
+    def create_booking_sequence(self):
+        self.controller_booking.create_booking_sequence()
+
+    def generate_rand_booking_data(self, number_of_operations):
+        self.controller_booking.generate_rand_booking_data(number_of_operations)
+
+    def create_payment_sequence(self):
+        self.controller_payment.create_payment_sequence()
+
+    def generate_rand_payment_data(self, number_of_operations):
+        self.controller_payment.generate_rand_payment_data(number_of_operations)
+
+    def generate_rand_data(self):
+        from generation import GENERATION_ORDER, GenerationPipeline
+
+        number_of_operations = int(input("Input Number Of Generations: "))
+        run_id = input("Input Run ID To Resume (Empty For A New Run): ").strip() or None
+
+        # Таблиці генеруються в порядку зовнішніх ключів, пакетами паралельно
+        pipeline = GenerationPipeline(self.model, {
+            'venue': self.model_venue,
+            'facility': self.model_facility,
+            'users': self.model_user,
+            'booking': self.model_booking,
+            'payment': self.model_payment
+        })
+        counts = {entity: number_of_operations for entity in GENERATION_ORDER}
+        if pipeline.run(counts, run_id):
+            print("Random Data Successfully Generated")
+
+    def truncate_all_tables(self):
+        if input("Confirm The Action. Type Yes or No: ") == "Yes":
+            if self.model.truncate_all_tables():
+                print("All Tables Successfully Truncated")
+            else:
+                print("Tables Not Truncated")
+        else:
+            print("Ok")
+
+    def reset_database(self):
+        from reset import DatabaseReset
+
+        action = input("[T]runcate, [S]napshot, [R]estore, [L]ist Or [D]rop Snapshots: ").strip().lower()
+        reset = DatabaseReset()
+
+        if action == 't':
+            self.truncate_all_tables()
+        elif action == 'l':
+            snapshots = reset.list_snapshots()
+            for name, size in snapshots:
+                print(f"{name} ({size})")
+            if not snapshots:
+                print("No Snapshots")
+        elif action in ('s', 'r', 'd'):
+            name = input("Input Snapshot Name: ").strip()
+            try:
+                if action == 'd':
+                    reset.drop_snapshot(name)
+                    print(f"Snapshot {name} Dropped")
+                    return
+                # Знімок і відновлення вимагають, щоб ніхто не був підключений до бази
+                self.close_models()
+                if action == 's':
+                    reset.create_snapshot(name)
+                    print(f"Snapshot {name} Created")
+                else:
+                    reset.restore_snapshot(name)
+                    print(f"Database Restored From Snapshot {name}")
+            except Exception as e:
+                print(f"Error With Resetting Database: {str(e)}")
+
+    def import_data(self):
+        importers = {
+            'booking': self.model_booking.import_bookings,
+            'facility': self.model_facility.import_facilities,
+            'payment': self.model_payment.import_payments,
+            'users': self.model_user.import_users,
+            'venue': self.model_venue.import_venues
+        }
+        table = input(f"Input Table ({', '.join(importers)}): ")
+        if table not in importers:
+            print("Unknown Table")
+            return
+        path = input("Input Path To CSV Or JSONL File: ")
+
+        result = importers[table](path)
+        if result:
+            imported, rejected = result
+            print(f"{imported} Rows Imported, {rejected} Rows Rejected")
+            if rejected:
+                print(f"Rejected Rows Written To {path}.rejected.jsonl")
+        else:
+            print("Data Not Imported")
+
+    def export_data(self):
+        from export import EXPORT_DATE_COLUMNS, EXPORT_REPORTS
+
+        exporters = {
+            'booking': self.model_booking.export_bookings,
+            'facility': self.model_facility.export_facilities,
+            'payment': self.model_payment.export_payments,
+            'users': self.model_user.export_users,
+            'venue': self.model_venue.export_venues
+        }
+        name = input(f"Input Table ({', '.join(exporters)}) Or Report ({', '.join(EXPORT_REPORTS)}): ")
+        if name not in exporters and name not in EXPORT_REPORTS:
+            print("Unknown Table Or Report")
+            return
+        path = input("Input Path To CSV Or JSONL File (.gz To Compress, - For Stdout): ")
+
+        start = end = None
+        if name in EXPORT_DATE_COLUMNS or 'start' in EXPORT_REPORTS.get(name, ()):
+            try:
+                # Обидві дати включно; для таблиць порожнє значення знімає обмеження
+                start = input("Input Start Date (YYYY-MM-DD) Or Leave Empty: ").strip()
+                end = input("Input End Date (YYYY-MM-DD) Or Leave Empty: ").strip()
+                start = datetime.date.fromisoformat(start) if start else None
+                end = datetime.date.fromisoformat(end) + datetime.timedelta(days=1) if end else None
+            except ValueError as e:
+                print(f"Invalid Date: {e}")
+                return
+
+        if name in exporters:
+            rows = exporters[name](path, start=start, end=end) if name in EXPORT_DATE_COLUMNS \
+                else exporters[name](path)
+        else:
+            period = 'day'
+            if 'period' in EXPORT_REPORTS[name]:
+                period = input("Group Revenue By ([D]ay, [W]eek, [M]onth): ").strip().lower()
+                period = {'w': 'week', 'm': 'month'}.get(period[:1], 'day')
+            rows = self.model_analytics.export_report(name, path, start=start, end=end, period=period)
+
+        if rows is None:
+            print("Data Not Exported")
+        elif path != '-':
+            print(f"{rows} Rows Exported To {path}")
+
+    def ensure_indexes(self):
+        problems = self.model.ensure_indexes()
+        if problems:
+            for problem in problems:
+                print(problem)
+        else:
+            print("All Indexes And Constraints Are In Place")
+
+    def partition_tables(self):
+        if len(self.model.schema_state()['partitioned']) < 2:
+            # Перетворення переписує booking і payment, тож потребує підтвердження
+            print("booking And payment Will Be Locked While Their Rows Are Copied Into Monthly Partitions")
+            if input("Confirm The Action. Type Yes or No: ") != "Yes":
+                return
+            converted = self.model.partition_tables()
+            if converted is None:
+                print("Tables Not Partitioned")
+                return
+            print(f"Partitioned Tables: {', '.join(converted)}")
+
+        result = self.model.maintain_partitions()
+        if result:
+            created, expired = result
+            print(f"{len(created)} Partitions Created, {len(expired)} Partitions Expired")
+            for partition in expired:
+                print(f"Expired Partition: {partition}")
+
+    def show_query_stats(self):
+        from instrumentation import SLOW_QUERY_LOG, SLOW_QUERY_MS, prepared_stats, query_stats
+
+        order = input("Order By ([T]otal, [M]ean, Ma[X], [C]ount): ").strip().lower()
+        order = {'m': 'mean', 'x': 'max', 'c': 'count'}.get(order, 'total')
+
+        connection = self.model.supervisor.stats()
+        print(f"Connection: {connection['reconnects']} Reconnects, {connection['retries']} Read Retries, "
+              f"{connection['connect_failures']} Failed Connects, Circuit Breaker {connection['breaker'].title()}")
+
+        rows = query_stats.top(10, order)
+        if not rows:
+            print("No Queries Recorded")
+            return
+        print(f"{'Count':>7} {'Total ms':>11} {'Mean ms':>9} {'Max ms':>9} {'Rows':>9}  Query")
+        for statement, count, total, mean, longest, row_count in rows:
+            print(f"{count:>7} {total:>11.1f} {mean:>9.2f} {longest:>9.2f} {row_count:>9}  {statement[:100]}")
+        print(f"Queries Slower Than {SLOW_QUERY_MS:g} ms Are Logged With Plans To {SLOW_QUERY_LOG}")
+
+        prepared = prepared_stats.top(10)
+        if prepared:
+            print(f"\n{'Prepared':<30} {'Conns':>5} {'Executions':>10} {'Plan ms':>8} {'Saved ms':>9}")
+            for name, connections, executions, planning, saved in prepared:
+                planning = f"{planning:.3f}" if planning is not None else '-'
+                print(f"{name:<30} {connections:>5} {executions:>10} {planning:>8} {saved:>9.1f}")
+
+    def display_analytics(self):
+        print("-------------------------------------------------------------------------------")
+        self.controller_analytics.most_booked_venue()
+        print("-------------------------------------------------------------------------------")
+        self.controller_analytics.user_activity()
+        print("-------------------------------------------------------------------------------")
+        self.controller_analytics.payment_analysis()
         print("-------------------------------------------------------------------------------")
\ No newline at end of file
@@ -0,0 +1,95 @@
+import collections
+import os
+import threading
+import time
+
+import prepared
+
+# Максимальна кількість закешованих перевірок і час життя негативних відповідей (секунди)
+EXISTENCE_CACHE_SIZE = int(os.environ.get('DB_EXISTENCE_CACHE_SIZE', 100000))
+EXISTENCE_NEGATIVE_TTL = float(os.environ.get('DB_EXISTENCE_NEGATIVE_TTL', 5))
+
+# Первинні ключі таблиць, на які посилаються зовнішні ключі
+PRIMARY_KEYS = {
+    'booking': 'booking_id',
+    'facility': 'facility_id',
+    'payment': 'payment_id',
+    'users': 'user_id',
+    'venue': 'venue_id'
+}
+
+# Дочірні таблиці, рядки яких видаляються каскадно (ON DELETE CASCADE)
+CASCADES = {
+    'venue': ('facility',),
+    'facility': ('booking',),
+    'users': ('booking',),
+    'booking': ('payment',)
+}
+
+
+class ExistenceCache:
+    """
+    Перевірка існування батьківських рядків за первинним ключем з LRU-кешем.
+    Позитивні відповіді живуть до видалення рядка, негативні - EXISTENCE_NEGATIVE_TTL секунд,
+    щоб рядки, додані іншими процесами, стали видимими.
+    """
+
+    def __init__(self, db_model, max_size=EXISTENCE_CACHE_SIZE, negative_ttl=EXISTENCE_NEGATIVE_TTL):
+        # Читання через db_model.read: на поточному з'єднанні і з повтором після обриву
+        self.db_model = db_model
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        # (таблиця, id) -> (існує, момент застарівання негативної відповіді)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def exists(self, table, row_id):
+        key = (table, row_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        found = self.db_model.read(prepared.fetch_one, f'{table}.exists', (row_id,)) is not None
+
+        self._store(key, found, now)
+        return found
+
+    def _store(self, key, found, now):
+        with self._lock:
+            self._entries[key] = (found, now + self.negative_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, table, row_id=None, cascade=True):
+        """
+        Забуває рядок (або всю таблицю, якщо row_id не задано).
+        Після видалення (cascade=True) каскад може прибрати дочірні рядки,
+        тому кеш дочірніх таблиць очищується повністю.
+        """
+        tables = set() if row_id is not None else {table}
+        if cascade:
+            pending = list(CASCADES.get(table, ()))
+            while pending:
+                child = pending.pop()
+                if child not in tables:
+                    tables.add(child)
+                    pending.extend(CASCADES.get(child, ()))
+
+        with self._lock:
+            if row_id is not None:
+                self._entries.pop((table, row_id), None)
+            if tables:
+                for key in [key for key in self._entries if key[0] in tables]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
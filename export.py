@@ -0,0 +1,191 @@
+import gzip
+import os
+import select
+import sys
+
+import psycopg
+from psycopg import pq
+
+import alch
+from bulk_import import TABLE_COLUMNS
+from prepared import PREPARED_QUERIES
+
+# Скільки байтів COPY накопичується перед записом у файл: пам'ять експорту не залежить від розміру таблиці
+EXPORT_BUFFER_BYTES = int(os.environ.get('DB_EXPORT_BUFFER_BYTES', 1024 * 1024))
+# Рівень стиснення gzip: 1 стискає майже зі швидкістю запису на диск
+EXPORT_GZIP_LEVEL = int(os.environ.get('DB_EXPORT_GZIP_LEVEL', 1))
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+# Колонка дати таблиці для відбору за періодом [start, end)
+EXPORT_DATE_COLUMNS = {
+    'booking': 'booking_date',
+    'payment': 'payment_date',
+    'users': 'date_of_registration'
+}
+
+# Аналітичні звіти prepared.py: назва -> параметри запиту в порядку %s
+EXPORT_REPORTS = {
+    'most_booked_venue': (),
+    'user_activity': (),
+    'payment_analysis': (),
+    'revenue_by_period': ('period', 'start', 'end'),
+    'revenue_by_venue': ('start', 'end', 'limit'),
+    'revenue_by_status': ('start', 'end'),
+    'facility_bookings': ('start', 'end', 'limit')
+}
+
+# JSONL будує сервер (row_to_json), а COPY у форматі CSV з роздільником і лапками, яких
+# не буває в JSON (керуючі символи JSON екранує), віддає кожен документ рядком без змін
+_COPY_OPTIONS = {
+    'csv': "FORMAT csv, HEADER",
+    'jsonl': "FORMAT csv, DELIMITER E'\\x01', QUOTE E'\\x02'"
+}
+
+
+def _error(result):
+    sqlstate = result.error_field(pq.DiagnosticField.SQLSTATE)
+    message = (result.error_field(pq.DiagnosticField.MESSAGE_PRIMARY) or result.error_message)
+    message = message.decode(errors='replace').strip()
+    return (psycopg.errors.lookup(sqlstate.decode()) if sqlstate else psycopg.OperationalError)(message)
+
+
+def copy_out(conn, statement, write, buffer_bytes=EXPORT_BUFFER_BYTES):
+    """
+    Виконує COPY ... TO STDOUT і передає дані у write частинами по buffer_bytes.
+    Повертає кількість вивантажених рядків.
+
+    Copy з psycopg витрачає близько 2 мкс Python-коду на кожен рядок (сервер надсилає
+    рядок окремим повідомленням), що обмежує експорт десятками МБ/с. Тут повідомлення
+    читаються напряму з libpq без очікування, поки вони вже є в буфері з'єднання.
+    Об'єкт Copy psycopg не бере участі, тому після помилки з'єднання може лишитися
+    в режимі COPY - викликач має його закрити (Exporter бере окреме з'єднання з пулу).
+    """
+    pgconn = conn.pgconn
+    pgconn.send_query(statement.encode())
+    result = pgconn.get_result()
+    if result.status != pq.ExecStatus.COPY_OUT:
+        raise _error(result)
+
+    get_copy_data = pgconn.get_copy_data
+    buffer = bytearray()
+    while True:
+        nbytes, data = get_copy_data(1)
+        if nbytes > 0:
+            buffer += data
+            if len(buffer) >= buffer_bytes:
+                write(buffer)
+                buffer.clear()
+        elif nbytes == 0:
+            # Повідомлень у буфері немає - чекаємо наступних даних від сервера
+            select.select([pgconn.socket], [], [])
+            pgconn.consume_input()
+        else:
+            break
+    write(buffer)
+
+    rows = 0
+    while (result := pgconn.get_result()) is not None:
+        if result.status != pq.ExecStatus.COMMAND_OK:
+            raise _error(result)
+        rows = result.command_tuples or 0
+    return rows
+
+
+class Exporter:
+    """
+    Потоково вивантажує таблицю або аналітичний звіт у CSV чи JSONL файл (або stdout, path='-')
+    через COPY TO STDOUT, за потреби стискаючи gzip. Формат і стиснення визначаються
+    за розширенням (.csv, .jsonl, .gz). Колонки таблиць - ті самі, що приймає BulkImporter,
+    тож вивантажений файл можна імпортувати назад. Файл пишеться під тимчасовою назвою
+    і отримує справжню лише після успішного експорту.
+    """
+
+    def __init__(self, buffer_bytes=EXPORT_BUFFER_BYTES, gzip_level=EXPORT_GZIP_LEVEL):
+        self.buffer_bytes = buffer_bytes
+        self.gzip_level = gzip_level
+
+    def export_table(self, table, path, file_format=None, start=None, end=None, compress=None):
+        """
+        Вивантажує таблицю table; start/end - відбір за датою [start, end) для booking,
+        payment і users. Повертає кількість рядків.
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table {table!r}")
+        column_list = ', '.join(f'"{name}"' for name, _ in TABLE_COLUMNS[table])
+        query = f'SELECT {column_list} FROM "{table}"'
+        params = []
+        if start is not None or end is not None:
+            if table not in EXPORT_DATE_COLUMNS:
+                raise ValueError(f"table {table} has no date column to filter by")
+            column = EXPORT_DATE_COLUMNS[table]
+            conditions = []
+            for value, operator in ((start, '>='), (end, '<')):
+                if value is not None:
+                    conditions.append(f'"{column}" {operator} %s')
+                    params.append(value)
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return self._export(query, params, path, file_format, compress)
+
+    def export_report(self, report, path, file_format=None, start=None, end=None, period='day', compress=None):
+        """
+        Вивантажує аналітичний звіт report (EXPORT_REPORTS). Звіти за періодом
+        вимагають start і end; revenue_by_period групує по period. Повертає кількість рядків.
+        """
+        if report not in EXPORT_REPORTS:
+            raise ValueError(f"Unknown report {report!r}")
+        names = EXPORT_REPORTS[report]
+        if 'start' in names and (start is None or end is None):
+            raise ValueError(f"report {report} needs start and end")
+        if 'start' not in names and (start is not None or end is not None):
+            raise ValueError(f"report {report} has no date range")
+        values = {'period': period, 'start': start, 'end': end, 'limit': None}
+        return self._export(PREPARED_QUERIES[f'analytics.{report}'], [values[name] for name in names],
+                            path, file_format, compress)
+
+    def _export(self, query, params, path, file_format, compress):
+        name = path[:-3] if path.endswith('.gz') else path
+        file_format = file_format or ('jsonl' if name.endswith(('.jsonl', '.json')) else 'csv')
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        compress = path.endswith('.gz') if compress is None else compress
+
+        raw_conn = alch.raw_connection()
+        try:
+            conn = raw_conn.driver_connection
+            # COPY не приймає параметрів сервера, тому значення підставляються на клієнті
+            query = psycopg.ClientCursor(conn).mogrify(query, params or None)
+            if file_format == 'jsonl':
+                query = f'SELECT row_to_json(q)::text FROM ({query}) AS q'
+            statement = f'COPY ({query}) TO STDOUT ({_COPY_OPTIONS[file_format]})'
+            return self._write(conn, statement, path, compress)
+        except BaseException:
+            # Перерваний COPY лишає з'єднання непридатним - пул його не отримає назад
+            raw_conn.invalidate()
+            raise
+        finally:
+            raw_conn.close()
+
+    def _write(self, conn, statement, path, compress):
+        if path == '-':
+            stdout = sys.stdout.buffer
+            sys.stdout.flush()
+            if not compress:
+                return copy_out(conn, statement, stdout.write, self.buffer_bytes)
+            with gzip.GzipFile(fileobj=stdout, mode='wb', compresslevel=self.gzip_level) as f:
+                return copy_out(conn, statement, f.write, self.buffer_bytes)
+
+        partial = f"{path}.part"
+        try:
+            with open(partial, 'wb') as raw:
+                if compress:
+                    with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.gzip_level) as f:
+                        rows = copy_out(conn, statement, f.write, self.buffer_bytes)
+                else:
+                    rows = copy_out(conn, statement, raw.write, self.buffer_bytes)
+            os.replace(partial, path)
+            return rows
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
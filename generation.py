@@ -0,0 +1,177 @@
+import datetime
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import alch
+
+# Кількість рядків в одному пакеті (одна транзакція) і кількість паралельних з'єднань
+GENERATION_CHUNK_SIZE = int(os.environ.get('DB_GENERATION_CHUNK_SIZE', 100000))
+GENERATION_WORKERS = int(os.environ.get('DB_GENERATION_WORKERS', 4))
+
+# Порядок генерації за зовнішніми ключами: батьківські таблиці раніше дочірніх
+GENERATION_ORDER = ('venue', 'facility', 'users', 'booking', 'payment')
+
+# Таблиці, пакети яких ділять батьківські рядки між смугами, щоб не блокувати одна одну
+# на перевірці обмеження booking_no_overlap: таблиця -> батьківська таблиця, що ділиться
+PARTITIONED_ENTITIES = {'booking': 'facility'}
+
+GENERATION_PROGRESS_SQL = """
+    CREATE TABLE IF NOT EXISTS "generation_progress" (
+        "run_id" TEXT NOT NULL,
+        "entity" TEXT NOT NULL,
+        "chunk" INTEGER NOT NULL,
+        "rows" INTEGER NOT NULL,
+        "finished_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY ("run_id", "entity", "chunk")
+    );
+"""
+
+
+def new_run_id():
+    return datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+def chunk_seed(seed, entity, number):
+    """
+    Значення для setseed() (від -1 до 1) окремого пакета: пакети виконуються на різних
+    з'єднаннях у довільному порядку, тому кожен отримує власне зерно, похідне від seed.
+    """
+    return zlib.crc32(f"{seed}:{entity}:{number}".encode()) / 0xFFFFFFFF * 2 - 1
+
+
+class GenerationPipeline:
+    """
+    Генерує випадкові дані для всіх таблиць у порядку залежностей.
+    Кожна таблиця ділиться на пакети по chunk_size рядків, які виконуються
+    паралельно на workers з'єднаннях пулу; кожен пакет - окрема транзакція.
+    Завершені пакети записуються в generation_progress у тій самій транзакції разом
+    із кількістю справді вставлених рядків, тому перерваний запуск з тим самим run_id
+    продовжується з першого незавершеного пакета. Пакет, що не вставив жодного рядка
+    (немає батьківських рядків), вважається невдалим і не записується.
+
+    Якщо задано seed, кожен пакет викликає setseed() перед генерацією, і random() у
+    генераторах дає ті самі значення при кожному запуску. Паралельні смуги перемежовують
+    nextval() ідентифікаторів, тому повністю однакові дані гарантує лише workers=1.
+    """
+
+    def __init__(self, db_model, models, chunk_size=GENERATION_CHUNK_SIZE, workers=GENERATION_WORKERS,
+                 progress=print, seed=None):
+        # models: таблиця -> модель з create_*_sequence і generate_rand_*_data
+        self.db_model = db_model
+        self.models = models
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.progress = progress
+        self.seed = seed
+
+    def run(self, counts, run_id=None):
+        """
+        counts: таблиця -> кількість рядків. Повертає run_id або None, якщо пакет не вдався.
+        """
+        run_id = run_id or new_run_id()
+        self._create_progress_table()
+        self.progress(f"Generation Run {run_id}")
+
+        for entity in GENERATION_ORDER:
+            count = counts.get(entity, 0)
+            if count <= 0:
+                continue
+            if not self._generate_entity(run_id, entity, count):
+                self.progress(f"Generation Stopped. Resume With Run ID {run_id}")
+                return None
+        return run_id
+
+    def _create_progress_table(self):
+        c = self.db_model.conn.cursor()
+        c.execute(GENERATION_PROGRESS_SQL)
+        self.db_model.conn.commit()
+
+    def _finished_chunks(self, run_id, entity):
+        # Номер пакета -> кількість вставлених рядків
+        c = self.db_model.conn.cursor()
+        c.execute('SELECT "chunk", "rows" FROM "generation_progress" WHERE "run_id" = %s AND "entity" = %s',
+                  (run_id, entity))
+        finished = dict(c.fetchall())
+        self.db_model.conn.commit()
+        return finished
+
+    def _count_rows(self, table):
+        c = self.db_model.conn.cursor()
+        c.execute(f'SELECT count(*) FROM "{table}"')
+        count = c.fetchone()[0]
+        self.db_model.conn.commit()
+        return count
+
+    def _generate_entity(self, run_id, entity, count):
+        model = self.models[entity]
+        singular = 'user' if entity == 'users' else entity
+
+        # Послідовність перезапускається з max(id) + 1, тому продовження не дає дублікатів ключів
+        if not getattr(model, f'create_{singular}_sequence')():
+            return False
+        generate = getattr(model, f'generate_rand_{singular}_data')
+
+        chunks = [(number, min(self.chunk_size, count - start))
+                  for number, start in enumerate(range(0, count, self.chunk_size))]
+        finished = self._finished_chunks(run_id, entity)
+        pending = [chunk for chunk in chunks if chunk[0] not in finished]
+        done_rows = sum(finished.values())
+        if not pending:
+            self.progress(f"{entity}: Already Generated ({done_rows} Rows)")
+            return True
+
+        # Пакети розкладаються по смугах; пакети однієї смуги виконуються послідовно
+        lanes = min(self.workers, len(pending))
+        if entity in PARTITIONED_ENTITIES:
+            # Кожна смуга отримує щонайменше один батьківський рядок
+            lanes = max(1, min(lanes, self._count_rows(PARTITIONED_ENTITIES[entity])))
+        progress_lock = threading.Lock()
+        state = {'done_rows': done_rows, 'succeeded': True}
+
+        def run_lane(lane):
+            for number, rows in pending[lane::lanes]:
+                options = {}
+                if entity in PARTITIONED_ENTITIES:
+                    # Кожна смуга бронює лише свою частину об'єктів
+                    options = {'part': lane, 'parts': lanes}
+                inserted = self._generate_chunk(run_id, entity, generate, number, rows, options)
+                with progress_lock:
+                    if inserted is not None:
+                        state['done_rows'] += inserted
+                        self.progress(f"{entity}: Chunk {number + 1}/{len(chunks)} Done "
+                                      f"({state['done_rows']}/{count} Rows)")
+                    else:
+                        state['succeeded'] = False
+                        self.progress(f"{entity}: Chunk {number + 1}/{len(chunks)} Failed")
+
+        with ThreadPoolExecutor(max_workers=lanes) as executor:
+            for future in [executor.submit(run_lane, lane) for lane in range(lanes)]:
+                future.result()
+        return state['succeeded']
+
+    def _generate_chunk(self, run_id, entity, generate, number, rows, options):
+        # Повертає кількість вставлених рядків або None, якщо пакет не вдався
+        raw_conn = alch.raw_connection()
+        try:
+            conn = raw_conn.driver_connection
+            if self.seed is not None:
+                conn.execute('SELECT setseed(%s)', (chunk_seed(self.seed, entity, number),))
+            inserted = generate(rows, conn=conn, **options)
+            if inserted is None:
+                return None
+            if rows and not inserted:
+                raise ValueError(f"no rows inserted, {entity} has no parent rows to reference")
+            # Відмітка про пакет фіксується тим самим commit, що й згенеровані рядки
+            conn.execute(
+                'INSERT INTO "generation_progress" ("run_id", "entity", "chunk", "rows") VALUES (%s, %s, %s, %s)',
+                (run_id, entity, number, inserted))
+            conn.commit()
+            return inserted
+        except Exception as e:
+            raw_conn.rollback()
+            print(f"Error With Generating {entity} Chunk {number + 1}: {str(e)}")
+            return None
+        finally:
+            raw_conn.close()
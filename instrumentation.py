@@ -0,0 +1,238 @@
+import datetime
+import os
+import re
+import threading
+import time
+
+import psycopg
+from sqlalchemy import event
+
+# Інструментацію можна вимкнути змінною оточення DB_INSTRUMENT=0
+INSTRUMENT = os.environ.get('DB_INSTRUMENT', '1') == '1'
+# Запити, довші за поріг (мс), потрапляють у журнал повільних запитів разом із планом
+SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.environ.get('DB_SLOW_QUERY_LOG', 'slow_queries.log')
+# DB_SLOW_QUERY_ANALYZE=1: для повільних SELECT журнал отримує план EXPLAIN (ANALYZE, BUFFERS)
+# з фактичним часом вузлів. ANALYZE виконує запит ще раз разом з його побічними діями
+# (nextval, pg_terminate_backend тощо), тому за замовчуванням пишеться лише план без виконання
+SLOW_QUERY_ANALYZE = os.environ.get('DB_SLOW_QUERY_ANALYZE', '0') == '1'
+
+# Запити, план яких можна отримати через EXPLAIN; запити, що змінюють дані, ніколи не виконуються повторно
+_EXPLAINABLE_RE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+_READ_ONLY_RE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize(statement):
+    if isinstance(statement, bytes):
+        statement = statement.decode()
+    return _WHITESPACE_RE.sub(' ', str(statement)).strip()
+
+
+class QueryStats:
+    """
+    Накопичує статистику по кожному тексту запиту (параметри не враховуються,
+    тому виклики з різними значеннями групуються разом).
+    """
+
+    def __init__(self):
+        # запит -> [кількість, сумарний час, максимальний час, кількість рядків]
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, elapsed, rows):
+        statement = normalize(statement)
+        with self._lock:
+            stats = self._stats.setdefault(statement, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] += max(rows or 0, 0)
+
+    def top(self, limit=10, order='total'):
+        """
+        Повертає до limit записів (запит, кількість, сумарний мс, середній мс, максимальний мс, рядки),
+        впорядкованих за order: total, mean, max або count.
+        """
+        with self._lock:
+            rows = [
+                (statement, count, total * 1000, total / count * 1000, longest * 1000, rows)
+                for statement, (count, total, longest, rows) in self._stats.items()
+            ]
+        index = {'count': 1, 'total': 2, 'mean': 3, 'max': 4}[order]
+        return sorted(rows, key=lambda row: row[index], reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+
+class PreparedStats:
+    """
+    Статистика зареєстрованих prepared statements (prepared.py) за назвою запиту:
+    скільки з'єднань його підготували, скільки разів його виконано, час планування,
+    виміряний один раз через EXPLAIN, і оцінка зекономленого часу планування.
+    """
+
+    def __init__(self):
+        # назва -> [з'єднання, виконання, час планування мс, зекономлено мс]
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def planning_ms(self, name):
+        with self._lock:
+            stats = self._stats.get(name)
+            return stats[2] if stats else None
+
+    def record(self, name, prepared, planning_ms=None, saved=False):
+        """
+        prepared - запит щойно підготовлено на новому з'єднанні;
+        saved - виконання використало збережений план і не планувалось.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0, None, 0.0])
+            stats[0] += 1 if prepared else 0
+            stats[1] += 1
+            if planning_ms is not None:
+                stats[2] = planning_ms
+            if saved and stats[2] is not None:
+                stats[3] += stats[2]
+
+    def top(self, limit=10):
+        """
+        Повертає до limit записів (назва, з'єднання, виконання, планування мс, зекономлено мс),
+        впорядкованих за зекономленим часом.
+        """
+        with self._lock:
+            rows = [(name, *stats) for name, stats in self._stats.items()]
+        return sorted(rows, key=lambda row: row[4], reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+prepared_stats = PreparedStats()
+
+_log_lock = threading.Lock()
+
+
+def _explain(conn, statement, params):
+    if not _EXPLAINABLE_RE.match(statement) or ';' in statement.rstrip().rstrip(';'):
+        return None
+    options = '(ANALYZE, BUFFERS)' if SLOW_QUERY_ANALYZE and _READ_ONLY_RE.match(statement) else ''
+    try:
+        # Звичайний курсор і точка збереження: EXPLAIN не інструментується
+        # і в разі помилки не перериває транзакцію застосунку
+        with conn.transaction():
+            c = psycopg.Cursor(conn)
+            c.execute(f'EXPLAIN {options} {statement}', params)
+            return '\n'.join(row[0] for row in c.fetchall())
+    except Exception as e:
+        return f"(plan unavailable: {str(e).splitlines()[0]})"
+
+
+def _planning_statement(statement):
+    return f'EXPLAIN (SUMMARY) {statement}'
+
+
+def _planning_ms(rows):
+    for (line,) in rows:
+        if line.startswith('Planning Time:'):
+            return float(line.split()[2])
+    return None
+
+
+def planning_time(conn, statement, params):
+    """
+    Час планування запиту (мс) за EXPLAIN (SUMMARY) - без виконання самого запиту.
+    """
+    if conn.info.transaction_status == psycopg.pq.TransactionStatus.INERROR:
+        return None
+    try:
+        with conn.transaction():
+            c = psycopg.Cursor(conn)
+            c.execute(_planning_statement(statement), params)
+            return _planning_ms(c.fetchall())
+    except Exception:
+        return None
+
+
+async def planning_time_async(conn, statement, params):
+    if conn.info.transaction_status == psycopg.pq.TransactionStatus.INERROR:
+        return None
+    try:
+        async with conn.transaction():
+            c = psycopg.AsyncCursor(conn)
+            await c.execute(_planning_statement(statement), params)
+            return _planning_ms(await c.fetchall())
+    except Exception:
+        return None
+
+
+def log_slow_query(conn, statement, params, elapsed, rows):
+    statement = statement.decode() if isinstance(statement, bytes) else str(statement)
+    plan = _explain(conn, statement, params) if conn is not None else None
+    entry = [
+        f"-- {datetime.datetime.now().isoformat(timespec='seconds')} "
+        f"{elapsed * 1000:.3f} ms, {rows} rows",
+        statement.strip(),
+        f"-- params: {params!r}"
+    ]
+    if plan:
+        entry.append('\n'.join(f"-- {line}" for line in plan.splitlines()))
+    with _log_lock:
+        with open(SLOW_QUERY_LOG, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(entry) + '\n\n')
+
+
+def _observe(conn, statement, params, elapsed, rows, explain=True):
+    query_stats.record(statement, elapsed, rows)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        log_slow_query(conn if explain else None, statement, params, elapsed, rows)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """
+    Курсор для запитів через self.conn.cursor(): вимірює execute/executemany.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            _observe(self.connection, query, params, time.perf_counter() - started, self.rowcount,
+                     explain=self.connection.info.transaction_status != psycopg.pq.TransactionStatus.INERROR)
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            _observe(self.connection, query, None, time.perf_counter() - started, self.rowcount, explain=False)
+
+
+def instrument_connection(conn):
+    """
+    Вмикає вимірювання запитів через курсори DBAPI-з'єднання conn (psycopg).
+    """
+    if INSTRUMENT:
+        conn.cursor_factory = InstrumentedCursor
+
+
+def install(engine):
+    """
+    Підключає обробник події рушія SQLAlchemy: з'єднання, що повертаються в пул,
+    втрачають InstrumentedCursor, який raw_connection() вмикає для кожного позичання.
+    """
+    if not INSTRUMENT:
+        return
+
+    @event.listens_for(engine, 'checkin')
+    def checkin(dbapi_connection, connection_record):
+        if dbapi_connection is not None:
+            dbapi_connection.cursor_factory = psycopg.Cursor
@@ -1,5 +1,33 @@
-from controller import Controller
-
-if __name__ == "__main__":
-    controller = Controller()
-    controller.run()
+import argparse
+import sys
+
+from controller import Controller
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sports facility booking database.")
+    parser.add_argument('--script', metavar='PATH',
+                        help="run operations from a JSONL file ('-' for stdin) instead of the menu")
+    parser.add_argument('--stop-on-error', action='store_true',
+                        help="stop the script at the first failed operation")
+    parser.add_argument('--skip-schema-check', action='store_true',
+                        help="do not verify or migrate the schema on startup (same as DB_SKIP_SCHEMA_CHECK=1)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    controller = Controller(check_schema=False) if args.skip_schema_check else Controller()
+
+    if args.script:
+        from batch import BatchRunner
+
+        runner = BatchRunner(controller, stop_on_error=args.stop_on_error)
+        if args.script == '-':
+            succeeded = runner.run_script(sys.stdin)
+        else:
+            with open(args.script, encoding='utf-8') as f:
+                succeeded = runner.run_script(f)
+        sys.exit(0 if succeeded else 1)
+    else:
+        controller.run()
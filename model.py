@@ -1,86 +1,939 @@
-import psycopg
-
-class Model:
-    def __init__(self):
-        self.conn = psycopg.connect(
-            dbname='postgres',
-            user='postgres',
-            password='Ddd.12350987',
-            host='localhost',
-            port=5432
-        )
-        self.create_tables()
-
-    def create_tables(self):
-        c = self.conn.cursor()
-        # Check for tables
-        c.execute("SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'booking')")
-        booking_table_exists = c.fetchone()[0]
-
-        c.execute("SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'facility')")
-        facility_table_exists = c.fetchone()[0]
-
-        c.execute("SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'payment')")
-        payment_table_exists = c.fetchone()[0]
-        
-        c.execute("SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'users')")
-        users_table_exists = c.fetchone()[0]
-        
-        c.execute("SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'venue')")
-        venue_table_exists = c.fetchone()[0]
-
-        if not booking_table_exists:
-            c.execute('''
-                        CREATE TABLE "booking" (
-                            "booking_id" SERIAL PRIMARY KEY,
-                            "user_id" INTEGER NOT NULL,
-                            "facility_id" INTEGER NOT NULL,
-                            "booking_date" TIME NOT NULL,
-                            "start_time" TIME NOT NULL,
-                            "end_time" TIME NOT NULL,
-                            "status" BOOLEAN NOT NULL
-                        )
-                    ''')
-        if not facility_table_exists:
-            c.execute('''
-                        CREATE TABLE "facility" (
-                            "facility_id" SERIAL PRIMARY KEY,
-                            "venue_id" INTEGER NOT NULL,
-                            "facility_name" TEXT NOT NULL,
-                            "facility_type" TEXT NOT NULL
-                            
-                        )
-                    ''')
-        if not payment_table_exists:
-            c.execute('''
-                        CREATE TABLE "payment" (
-                            "payment_id" SERIAL PRIMARY KEY,
-                            "booking_id" INTEGER NOT NULL,
-                            "amount" MONEY NOT NULL,
-                            "payment_date" TIME NOT NULL,
-                            "payment_status" BOOLEAN NOT NULL
-                        )
-                    ''')
-        if not users_table_exists:
-            c.execute('''
-                        CREATE TABLE "users" (
-                            "user_id" SERIAL PRIMARY KEY,
-                            "first_name" TEXT NOT NULL,
-                            "last_name" TEXT NOT NULL,
-                            "email" TEXT NOT NULL,
-                            "phone_number" TEXT NOT NULL,
-                            "date_of_registration" DATE NOT NULL
-                        )
-                    ''')
-        if not venue_table_exists:
-            c.execute('''
-                        CREATE TABLE "venue" (
-                            "venue_id" SERIAL PRIMARY KEY,
-                            "name" TEXT NOT NULL,
-                            "address" TEXT NOT NULL,
-                            "city" TEXT NOT NULL,
-                            "capacity" INTEGER NOT NULL
-                        )
-                    ''')
-
-        self.conn.commit()
\ No newline at end of file
+import hashlib
+import itertools
+import json
+import os
+
+from psycopg.types.json import Jsonb
+
+import prepared
+from existence import ExistenceCache
+from partitioning import (PARTITION_EXPIRE, PARTITION_MONTHS_AHEAD, PARTITION_RETENTION_MONTHS,
+                          PARTITIONED_TABLES, PARTITIONING, PartitionManager)
+from reference_cache import REFERENCE_NOTIFY_SQL, REFERENCE_TRIGGERS, ReferenceCache
+from supervisor import ConnectionSupervisor
+
+# Скільки рядків за раз серверний курсор передає клієнту
+STREAM_ITERSIZE = int(os.environ.get('DB_STREAM_ITERSIZE', 2000))
+
+# Розмір сторінки за замовчуванням для посторінкового перегляду
+PAGE_SIZE = int(os.environ.get('DB_PAGE_SIZE', 20))
+
+# DB_SKIP_SCHEMA_CHECK=1 пропускає перевірку і міграцію схеми при запуску (для сценаріїв
+# на базі, схему якої вже підготував попередній запуск)
+CHECK_SCHEMA = os.environ.get('DB_SKIP_SCHEMA_CHECK', '0') != '1'
+
+_stream_cursor_ids = itertools.count(1)
+
+
+def stream_rows(conn, query, params=None, itersize=None):
+    """
+    Генератор рядків результату через іменований серверний курсор.
+    Клієнт отримує рядки пакетами по itersize, тому пам'ять не залежить від розміру таблиці.
+    """
+    with conn.cursor(name=f"stream_{next(_stream_cursor_ids)}") as c:
+        c.itersize = itersize or STREAM_ITERSIZE
+        c.execute(query, params)
+        yield from c
+    conn.commit()
+
+
+def fetch_rows(conn, query, params=None):
+    """
+    Усі рядки результату query (для Model.read).
+    """
+    with conn.cursor() as c:
+        c.execute(query, params)
+        return c.fetchall()
+
+
+def page_query(table, key, after_id=None, before_id=None, limit=PAGE_SIZE):
+    """
+    Текст і параметри запиту сторінки для fetch_page (і AsyncModel.fetch_page).
+    """
+    if before_id is not None:
+        return f'''
+            SELECT * FROM (
+                SELECT * FROM "{table}" WHERE "{key}" < %s ORDER BY "{key}" DESC LIMIT %s
+            ) AS page
+            ORDER BY "{key}"
+        ''', (before_id, limit)
+    if after_id is not None:
+        return f'SELECT * FROM "{table}" WHERE "{key}" > %s ORDER BY "{key}" LIMIT %s', (after_id, limit)
+    return f'SELECT * FROM "{table}" ORDER BY "{key}" LIMIT %s', (limit,)
+
+
+def fetch_page(conn, table, key, after_id=None, before_id=None, limit=PAGE_SIZE):
+    """
+    Keyset-пагінація за первинним ключем замість OFFSET: кожна сторінка
+    читається через індекс первинного ключа, тож сторінка 10000 не повільніша за першу.
+    after_id - сторінка після цього ключа, before_id - сторінка перед цим ключем.
+    """
+    with conn.cursor() as c:
+        c.execute(*page_query(table, key, after_id, before_id, limit))
+        rows = c.fetchall()
+    conn.commit()
+    return rows
+
+
+def batch_rows(rows, columns):
+    # Рядки пакета - кортежі в порядку columns або словники
+    return [row if isinstance(row, dict) else dict(zip(columns, row)) for row in rows]
+
+
+def batch_params(rows):
+    return (Jsonb(rows, dumps=_json_dumps),)
+
+
+def batch_outcomes(rows, key, changed):
+    # True для рядків, ключ яких повернув RETURNING; для повторюваного ключа - лише перше входження
+    changed = set(changed)
+    outcomes = []
+    for row in rows:
+        outcomes.append(row.get(key) in changed)
+        changed.discard(row.get(key))
+    return outcomes
+
+
+def execute_batch(conn, name, key, rows, columns):
+    """
+    Пакетний запис одним запитом name з prepared.py (*.add_many, *.update_many): рядки
+    передаються одним jsonb-масивом, який запит розгортає через jsonb_to_recordset(%s).
+    Замість N запитів - одна мережева затримка, один commit і одне спрацювання тригерів
+    зведених таблиць (вони працюють на рівні інструкції). Рядки - кортежі в порядку columns
+    або словники. Повертає True/False для кожного рядка у порядку rows.
+    """
+    rows = batch_rows(rows, columns)
+    if not rows:
+        return []
+    changed = [row[0] for row in prepared.fetch_all(conn, name, batch_params(rows))]
+    conn.commit()
+    return batch_outcomes(rows, key, changed)
+
+
+def check_batch_columns(rows, key, columns):
+    """
+    Перевіряє словники часткового оновлення: кожен містить key і хоча б одну з columns.
+    """
+    for index, row in enumerate(rows):
+        changed = set(row) - {key}
+        unknown = changed - set(columns)
+        if key not in row or unknown or not changed:
+            raise ValueError(f"row {index}: expected {key} and columns from {', '.join(columns)}")
+
+
+def delete_batch(conn, table, ids):
+    """
+    Видаляє рядки за списком ключів одним запитом (<table>.delete_many);
+    повертає True/False для кожного id.
+    """
+    ids = list(ids)
+    deleted = {row[0] for row in prepared.fetch_all(conn, f'{table}.delete_many', (ids,))}
+    conn.commit()
+    return [row_id in deleted for row_id in ids]
+
+
+def _json_dumps(obj):
+    # Дати, час і Decimal передаються рядками, які PostgreSQL приводить до типів колонок
+    return json.dumps(obj, default=str)
+
+
+def _delta_rows(columns, op):
+    """
+    Рядки змін для тригерів зведених таблиць: (колонки..., delta),
+    де delta = +1 для нових рядків і -1 для видалених. При UPDATE незмінені
+    комбінації колонок взаємно скорочуються через EXCEPT ALL.
+    """
+    cols = ', '.join(f'"{c}"' for c in columns)
+    if op == 'INSERT':
+        return f'SELECT {cols}, 1 AS "delta" FROM new_rows'
+    if op == 'DELETE':
+        return f'SELECT {cols}, -1 AS "delta" FROM old_rows'
+    return (f'(SELECT {cols}, 1 AS "delta" FROM (SELECT {cols} FROM new_rows EXCEPT ALL SELECT {cols} FROM old_rows) n) '
+            f'UNION ALL '
+            f'(SELECT {cols}, -1 AS "delta" FROM (SELECT {cols} FROM old_rows EXCEPT ALL SELECT {cols} FROM new_rows) o)')
+
+
+def _summary_trigger(table, function, body, op):
+    referencing = {
+        'INSERT': 'NEW TABLE AS new_rows',
+        'DELETE': 'OLD TABLE AS old_rows',
+        'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows'
+    }[op]
+    name = f"{function}_{op.lower()}"
+    return f"""
+        CREATE OR REPLACE FUNCTION "{name}"() RETURNS trigger AS $$
+        BEGIN
+            {body}
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER "{name}"
+            AFTER {op} ON "{table}"
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION "{name}"();
+    """
+
+
+def _booking_summary_body(op):
+    # Рядки зведених таблиць оновлюються у порядку ключа, щоб паралельні транзакції не блокували одна одну
+    delta = _delta_rows(('user_id', 'facility_id'), op)
+    return f"""
+            INSERT INTO "user_booking_summary" AS s ("user_id", "total_bookings")
+            SELECT d."user_id", SUM(d."delta") FROM ({delta}) d
+            GROUP BY d."user_id" ORDER BY d."user_id"
+            ON CONFLICT ("user_id") DO UPDATE SET "total_bookings" = s."total_bookings" + EXCLUDED."total_bookings";
+
+            INSERT INTO "venue_booking_summary" AS s ("venue_id", "total_bookings")
+            SELECT f."venue_id", SUM(d."delta") FROM ({delta}) d
+            JOIN "facility" f ON f."facility_id" = d."facility_id"
+            GROUP BY f."venue_id" ORDER BY f."venue_id"
+            ON CONFLICT ("venue_id") DO UPDATE SET "total_bookings" = s."total_bookings" + EXCLUDED."total_bookings";
+    """
+
+
+def _facility_summary_body(op):
+    # Перенесення об'єкта між закладами переносить і його бронювання у зведенні по закладах
+    delta = _delta_rows(('facility_id', 'venue_id'), op)
+    return f"""
+            INSERT INTO "venue_booking_summary" AS s ("venue_id", "total_bookings")
+            SELECT d."venue_id", SUM(d."delta") FROM ({delta}) d
+            JOIN "booking" b ON b."facility_id" = d."facility_id"
+            GROUP BY d."venue_id" HAVING SUM(d."delta") <> 0 ORDER BY d."venue_id"
+            ON CONFLICT ("venue_id") DO UPDATE SET "total_bookings" = s."total_bookings" + EXCLUDED."total_bookings";
+    """
+
+
+def _payment_summary_body(op):
+    delta = _delta_rows(('payment_status', 'amount'), op)
+    return f"""
+            INSERT INTO "payment_status_summary" AS s ("payment_status", "total_payments", "total_revenue")
+            SELECT d."payment_status", SUM(d."delta"), SUM(d."amount" * d."delta") FROM ({delta}) d
+            GROUP BY d."payment_status" ORDER BY d."payment_status"
+            ON CONFLICT ("payment_status") DO UPDATE SET
+                "total_payments" = s."total_payments" + EXCLUDED."total_payments",
+                "total_revenue" = s."total_revenue" + EXCLUDED."total_revenue";
+    """
+
+
+# Тіла тригерів зведених таблиць за таблицею даних
+SUMMARY_BODIES = {
+    'booking': _booking_summary_body,
+    'facility': _facility_summary_body,
+    'payment': _payment_summary_body
+}
+
+# Зведені таблиці для аналітики, які тригери підтримують інкрементально при кожному записі
+SUMMARY_TABLES_SQL = """
+    CREATE TABLE IF NOT EXISTS "venue_booking_summary" (
+        "venue_id" INTEGER PRIMARY KEY,
+        "total_bookings" BIGINT NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS "venue_booking_summary_total_idx"
+        ON "venue_booking_summary" ("total_bookings" DESC);
+
+    CREATE TABLE IF NOT EXISTS "user_booking_summary" (
+        "user_id" INTEGER PRIMARY KEY,
+        "total_bookings" BIGINT NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS "user_booking_summary_total_idx"
+        ON "user_booking_summary" ("total_bookings" DESC);
+
+    CREATE TABLE IF NOT EXISTS "payment_status_summary" (
+        "payment_status" BOOLEAN PRIMARY KEY,
+        "total_payments" BIGINT NOT NULL DEFAULT 0,
+        "total_revenue" MONEY NOT NULL DEFAULT 0
+    );
+""" + "".join(
+    _summary_trigger(table, f"{table}_summary", body(op), op)
+    for table, body in SUMMARY_BODIES.items()
+    for op in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+# Тригери зведених таблиць: (назва, таблиця)
+SUMMARY_TRIGGERS = [
+    (f"{function}_{op}", table)
+    for table, function in (('booking', 'booking_summary'), ('facility', 'facility_summary'),
+                            ('payment', 'payment_summary'))
+    for op in ('insert', 'update', 'delete')
+]
+
+# Повний перерахунок зведених таблиць (відновлення після збою або ручних змін)
+REBUILD_SUMMARIES_SQL = """
+    LOCK TABLE "booking", "facility", "payment" IN SHARE MODE;
+    TRUNCATE "venue_booking_summary", "user_booking_summary", "payment_status_summary";
+
+    INSERT INTO "user_booking_summary" ("user_id", "total_bookings")
+    SELECT "user_id", COUNT(*) FROM "booking" GROUP BY "user_id";
+
+    INSERT INTO "venue_booking_summary" ("venue_id", "total_bookings")
+    SELECT f."venue_id", COUNT(*) FROM "booking" b
+    JOIN "facility" f ON f."facility_id" = b."facility_id"
+    GROUP BY f."venue_id";
+
+    INSERT INTO "payment_status_summary" ("payment_status", "total_payments", "total_revenue")
+    SELECT "payment_status", COUNT(*), SUM("amount") FROM "payment" GROUP BY "payment_status";
+"""
+
+# Інтервал бронювання для перевірки перетинів; бронювання, що закінчується
+# не пізніше початку, вважається нічним і закінчується наступного дня
+BOOKING_DURING_SQL = """
+    tsrange(
+        "booking_date"::date + "start_time",
+        "booking_date"::date + "end_time"
+            + CASE WHEN "end_time" <= "start_time" THEN interval '1 day' ELSE interval '0 days' END
+    )
+"""
+
+# Заборона перетину активних бронювань одного об'єкта. int4range замість колонки
+# facility_id дозволяє GiST-індексу працювати без розширення btree_gist
+BOOKING_NO_OVERLAP_EXCLUDE = """
+    EXCLUDE USING gist (int4range("facility_id", "facility_id", '[]') WITH =, "during" WITH &&)
+    WHERE ("status")
+"""
+BOOKING_NO_OVERLAP_SQL = f'ALTER TABLE "booking" ADD CONSTRAINT "booking_no_overlap" {BOOKING_NO_OVERLAP_EXCLUDE}'
+
+# Секціонована booking не може мати такого обмеження на всю таблицю: воно створюється
+# в кожній секції, а перетини між секціями перевіряє тригер booking_partition_check
+PARTITION_CONSTRAINTS = {'booking': [('no_overlap', BOOKING_NO_OVERLAP_EXCLUDE)]}
+
+# Бронювання іншого місяця (а отже й іншої секції) може перетнутися з рядком, лише якщо
+# рядок починається в першу добу місяця або закінчується в наступному місяці
+_BOOKING_CROSSES_MONTH = """
+    (lower(n."during") < date_trunc('month', n."booking_date") + interval '1 day'
+        OR upper(n."during") > date_trunc('month', n."booking_date") + interval '1 month')
+"""
+
+
+def _partition_check_sql(table, id_column, extra=''):
+    """
+    Тригери секціонованої таблиці: первинний ключ (ідентифікатор, дата) не гарантує
+    унікальності ідентифікатора, тому її перевіряє тригер на рівні інструкції.
+    Рядки інших транзакцій видно лише після їх фіксації, тому перевірки паралельних
+    транзакцій виконуються по черзі під advisory-блокуванням до кінця транзакції.
+    Помилки мають ті самі SQLSTATE, що й порушення первинного ключа та обмеження-виключення.
+    """
+    function = f"{table}_partition_check"
+    triggers = ''.join(f"""
+        CREATE OR REPLACE TRIGGER "{function}_{op.lower()}" AFTER {op} ON "{table}"
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "{function}"();
+    """ for op in ('INSERT', 'UPDATE'))
+    return f"""
+        CREATE OR REPLACE FUNCTION "{function}"() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('{function}'));
+            IF EXISTS (
+                SELECT 1 FROM new_rows n
+                JOIN "{table}" t ON t."{id_column}" = n."{id_column}"
+                GROUP BY n."{id_column}"
+                HAVING count(*) > 1
+            ) THEN
+                RAISE EXCEPTION 'duplicate {id_column} in partitioned table {table}'
+                    USING ERRCODE = 'unique_violation';
+            END IF;
+            {extra}
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        {triggers}
+    """
+
+
+# Секціоновані таблиці: таблиця -> SQL тригерів, що замінюють унікальність ідентифікатора
+# і (для booking) обмеження booking_no_overlap між секціями
+PARTITION_CHECK_SQL = {
+    'booking': _partition_check_sql('booking', 'booking_id', f"""
+            IF EXISTS (
+                SELECT 1 FROM new_rows n
+                JOIN "booking" b
+                    ON int4range(b."facility_id", b."facility_id", '[]')
+                        = int4range(n."facility_id", n."facility_id", '[]')
+                    AND b."during" && n."during"
+                WHERE n."status" AND b."status" AND b."booking_id" <> n."booking_id"
+                    AND date_trunc('month', b."booking_date") <> date_trunc('month', n."booking_date")
+                    AND {_BOOKING_CROSSES_MONTH}
+            ) THEN
+                RAISE EXCEPTION 'booking overlaps a booking of the same facility in another partition'
+                    USING ERRCODE = 'exclusion_violation';
+            END IF;
+    """),
+    'payment': _partition_check_sql('payment', 'payment_id')
+}
+
+# Тригери PARTITION_CHECK_SQL: таблиця -> [(назва, таблиця)]
+PARTITION_CHECK_TRIGGERS = {
+    table: [(f'{table}_partition_check_{op}', table) for op in ('insert', 'update')]
+    for table in PARTITION_CHECK_SQL
+}
+
+# Первинний ключ секціонованої booking - (booking_id, booking_date), тому зовнішній ключ
+# payment -> booking неможливий. Його перевірку і ON DELETE CASCADE виконують тригери
+# на рівні інструкції; помилка має той самий SQLSTATE 23503, що й у зовнішнього ключа
+PAYMENT_REFERENCE_SQL = """
+    CREATE OR REPLACE FUNCTION "payment_booking_check"() RETURNS trigger AS $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM new_rows n
+            WHERE NOT EXISTS (SELECT 1 FROM "booking" b WHERE b."booking_id" = n."booking_id")
+        ) THEN
+            RAISE EXCEPTION 'payment references a booking that does not exist'
+                USING ERRCODE = 'foreign_key_violation';
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER "payment_booking_check_insert" AFTER INSERT ON "payment"
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "payment_booking_check"();
+    CREATE OR REPLACE TRIGGER "payment_booking_check_update" AFTER UPDATE ON "payment"
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "payment_booking_check"();
+
+    CREATE OR REPLACE FUNCTION "booking_payment_cascade"() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM "payment" WHERE "booking_id" IN (SELECT "booking_id" FROM old_rows);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER "booking_payment_cascade" AFTER DELETE ON "booking"
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION "booking_payment_cascade"();
+"""
+
+# Тригери, що замінюють зовнішній ключ payment -> booking: (назва, таблиця)
+PAYMENT_REFERENCE_TRIGGERS = [
+    ('payment_booking_check_insert', 'payment'),
+    ('payment_booking_check_update', 'payment'),
+    ('booking_payment_cascade', 'booking')
+]
+
+# Таблиці даних, зведені таблиці аналітики та послідовності генераторів ідентифікаторів
+DATA_TABLES = ('booking', 'facility', 'payment', 'users', 'venue')
+SUMMARY_TABLES = ('venue_booking_summary', 'user_booking_summary', 'payment_status_summary')
+ID_SEQUENCES = ('booking_id_seq', 'facility_id_seq', 'payment_id_seq', 'user_id_seq', 'venue_id_seq')
+
+# Вторинні індекси під аналітичні запити, тригери зведених таблиць і каскадні видалення:
+# (назва, таблиця, колонки та INCLUDE)
+INDEXES = [
+    ('booking_facility_id_idx', 'booking', '("facility_id")'),
+    ('booking_user_id_facility_id_idx', 'booking', '("user_id", "facility_id")'),
+    # Історія бронювань користувача (get_user_bookings) читається лише з індексу:
+    # діапазон одного user_id уже впорядкований за датою, а решта колонок - у INCLUDE
+    ('booking_user_id_booking_date_idx', 'booking',
+     '("user_id", "booking_date", "booking_id") INCLUDE ("facility_id", "start_time", "end_time", "status")'),
+    ('facility_venue_id_idx', 'facility', '("venue_id") INCLUDE ("facility_id")'),
+    ('facility_venue_id_type_idx', 'facility', '("venue_id", "facility_type") INCLUDE ("facility_name")'),
+    ('payment_booking_id_idx', 'payment', '("booking_id")'),
+    ('payment_status_amount_idx', 'payment', '("payment_status") INCLUDE ("amount")'),
+    # BRIN зберігає лише межі дат для кожних pages_per_range сторінок: звіт за тиждень
+    # читає тільки діапазони сторінок, у які потрапив тиждень. Генератори вставляють рядки
+    # впорядкованими за датою, тому діапазони вузькі
+    ('booking_booking_date_brin_idx', 'booking', 'USING brin ("booking_date") WITH (pages_per_range = 32)'),
+    ('payment_payment_date_brin_idx', 'payment', 'USING brin ("payment_date") WITH (pages_per_range = 32)')
+]
+
+# Зовнішні ключі: (назва, таблиця, колонка, батьківська таблиця, батьківська колонка)
+FOREIGN_KEYS = [
+    ('booking_user_id_fkey', 'booking', 'user_id', 'users', 'user_id'),
+    ('booking_facility_id_fkey', 'booking', 'facility_id', 'facility', 'facility_id'),
+    ('facility_venue_id_fkey', 'facility', 'venue_id', 'venue', 'venue_id'),
+    ('payment_booking_id_fkey', 'payment', 'booking_id', 'booking', 'booking_id')
+]
+
+
+def _trigger_version(sql):
+    return 'schema:' + hashlib.md5(sql.encode()).hexdigest()[:16]
+
+
+# Версія тексту тригерів зберігається в коментарі кожного тригера: тригери
+# перестворюються лише тоді, коли відсутні або їх визначення змінилось
+TRIGGER_VERSIONS = {
+    **{name: (table, _trigger_version(SUMMARY_TABLES_SQL)) for name, table in SUMMARY_TRIGGERS},
+    **{name: (table, _trigger_version(REFERENCE_NOTIFY_SQL)) for name, table in REFERENCE_TRIGGERS},
+    **{name: (table, _trigger_version(PAYMENT_REFERENCE_SQL)) for name, table in PAYMENT_REFERENCE_TRIGGERS},
+    **{name: (table, _trigger_version(PARTITION_CHECK_SQL[table]))
+       for triggers in PARTITION_CHECK_TRIGGERS.values() for name, table in triggers}
+}
+
+# Увесь стан схеми, потрібний create_tables і verify_schema, одним запитом до каталогу:
+# рядки (вид об'єкта, назва, ознака готовності)
+SCHEMA_STATE_SQL = """
+    SELECT 'table', t.name, true
+    FROM unnest(%(tables)s::text[]) AS t(name)
+    WHERE to_regclass(quote_ident(t.name)) IS NOT NULL
+    UNION ALL
+    SELECT 'column', r.relname || '.' || a.attname, format_type(a.atttypid, a.atttypmod) <> 'time without time zone'
+    FROM pg_attribute a
+    JOIN pg_class r ON r.oid = a.attrelid
+    WHERE a.attrelid IN (to_regclass('"booking"'), to_regclass('"payment"'))
+        AND a.attname IN ('booking_date', 'during', 'payment_date') AND NOT a.attisdropped
+    UNION ALL
+    SELECT 'index', i.relname, x.indisvalid
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    WHERE i.relname = ANY(%(indexes)s)
+    UNION ALL
+    SELECT CASE WHEN contype = 'f' THEN 'foreign_key' ELSE 'constraint' END, conname, convalidated
+    FROM pg_constraint
+    WHERE conname = ANY(%(constraints)s)
+    UNION ALL
+    SELECT 'trigger', t.tgname, obj_description(t.oid, 'pg_trigger') IS NOT DISTINCT FROM v.version
+    FROM pg_trigger t
+    JOIN unnest(%(triggers)s::text[], %(versions)s::text[]) AS v(name, version) ON v.name = t.tgname
+    WHERE NOT t.tgisinternal
+    UNION ALL
+    SELECT 'partitioned', r.relname, true
+    FROM pg_class r
+    WHERE r.oid IN (to_regclass('"booking"'), to_regclass('"payment"')) AND r.relkind = 'p'
+    UNION ALL
+    SELECT 'partition', p.relname, EXISTS (SELECT 1 FROM pg_constraint x WHERE x.conrelid = p.oid AND x.contype = 'x')
+    FROM pg_inherits i
+    JOIN pg_class p ON p.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass('"booking"')
+"""
+
+
+class Model:
+    def __init__(self, check_schema=CHECK_SCHEMA):
+        # З'єднання позичається зі спільного пулу alch і замінюється новим після обриву
+        self.supervisor = ConnectionSupervisor()
+        # Спільний для всіх моделей кеш перевірок існування батьківських рядків
+        self.existence = ExistenceCache(self)
+        self.partitions = PartitionManager(PARTITION_CONSTRAINTS)
+        if check_schema:
+            self.create_tables()
+        # Кеш закладів і об'єктів; інші процеси скидають його через NOTIFY.
+        # Слухач повідомлень запускається при першому читанні через кеш
+        self.reference = ReferenceCache(self, self.existence)
+
+    @property
+    def conn(self):
+        # Моделі звертаються до з'єднання щоразу через цю властивість, а не зберігають його:
+        # після перепідключення всі вони працюють з новим з'єднанням
+        return self.supervisor.conn
+
+    def read(self, query, *args, **kwargs):
+        """
+        Ідемпотентне читання query(conn, *args, **kwargs) з повтором після обриву з'єднання.
+        """
+        return self.supervisor.read(query, *args, **kwargs)
+
+    def rollback(self):
+        self.supervisor.rollback()
+
+    def close(self):
+        # Повертає з'єднання у спільний пул
+        self.reference.stop()
+        self.supervisor.close()
+
+    def truncate_all_tables(self):
+        """
+        Швидко очищує всі таблиці одним TRUNCATE і скидає послідовності *_id_seq до 1.
+        На відміну від DELETE не залишає мертвих рядків і не запускає тригери по рядках,
+        тому зведені таблиці аналітики очищуються разом з основними.
+        """
+        c = self.conn.cursor()
+        try:
+            tables = DATA_TABLES + SUMMARY_TABLES
+            c.execute("SELECT to_regclass('generation_progress') IS NOT NULL")
+            if c.fetchone()[0]:
+                tables += ('generation_progress',)
+            table_list = ', '.join(f'"{table}"' for table in tables)
+            c.execute(f'TRUNCATE {table_list} RESTART IDENTITY CASCADE')
+            # Послідовності генераторів не належать колонкам, тому RESTART IDENTITY їх не скидає
+            c.execute("""
+                SELECT sequencename FROM pg_sequences
+                WHERE schemaname = 'public' AND sequencename = ANY(%s)
+            """, (list(ID_SEQUENCES),))
+            for (sequence,) in c.fetchall():
+                c.execute(f'ALTER SEQUENCE "{sequence}" RESTART WITH 1')
+            self.conn.commit()
+            self.existence.clear()
+            self.reference.clear()
+            return True
+        except Exception as e:
+            self.rollback()
+            print(f"Error With Truncating Tables: {str(e)}")
+            return False
+
+    def schema_state(self):
+        """
+        Повертає стан схеми: вид об'єкта (table, column, index, foreign_key, constraint, trigger,
+        partitioned - секціоновані таблиці, partition - секції booking з обмеженням перетинів) ->
+        {назва: ознака готовності}. Відсутні об'єкти у словник не потрапляють.
+        """
+        c = self.conn.cursor()
+        c.execute(SCHEMA_STATE_SQL, {
+            'tables': list(DATA_TABLES + SUMMARY_TABLES),
+            'indexes': [name for name, _, _ in INDEXES],
+            'constraints': [name for name, *_ in FOREIGN_KEYS] + ['booking_no_overlap'],
+            'triggers': list(TRIGGER_VERSIONS),
+            'versions': [version for _, version in TRIGGER_VERSIONS.values()]
+        })
+        state = {kind: {} for kind in ('table', 'column', 'index', 'foreign_key', 'constraint', 'trigger',
+                                       'partitioned', 'partition')}
+        for kind, name, ready in c.fetchall():
+            state[kind][name] = ready
+        self.conn.commit()
+        return state
+
+    def create_tables(self):
+        state = self.schema_state()
+        tables = state['table']
+        c = self.conn.cursor()
+
+        if 'booking' not in tables:
+            c.execute(f'''
+                        CREATE TABLE "booking" (
+                            "booking_id" SERIAL PRIMARY KEY,
+                            "user_id" INTEGER NOT NULL,
+                            "facility_id" INTEGER NOT NULL,
+                            "booking_date" TIMESTAMP NOT NULL,
+                            "start_time" TIME NOT NULL,
+                            "end_time" TIME NOT NULL,
+                            "status" BOOLEAN NOT NULL,
+                            "during" TSRANGE GENERATED ALWAYS AS ({BOOKING_DURING_SQL}) STORED
+                        )
+                    ''')
+        if 'facility' not in tables:
+            c.execute('''
+                        CREATE TABLE "facility" (
+                            "facility_id" SERIAL PRIMARY KEY,
+                            "venue_id" INTEGER NOT NULL,
+                            "facility_name" TEXT NOT NULL,
+                            "facility_type" TEXT NOT NULL
+                            
+                        )
+                    ''')
+        if 'payment' not in tables:
+            c.execute('''
+                        CREATE TABLE "payment" (
+                            "payment_id" SERIAL PRIMARY KEY,
+                            "booking_id" INTEGER NOT NULL,
+                            "amount" MONEY NOT NULL,
+                            "payment_date" TIMESTAMP NOT NULL,
+                            "payment_status" BOOLEAN NOT NULL
+                        )
+                    ''')
+        if 'users' not in tables:
+            c.execute('''
+                        CREATE TABLE "users" (
+                            "user_id" SERIAL PRIMARY KEY,
+                            "first_name" TEXT NOT NULL,
+                            "last_name" TEXT NOT NULL,
+                            "email" TEXT NOT NULL,
+                            "phone_number" TEXT NOT NULL,
+                            "date_of_registration" DATE NOT NULL
+                        )
+                    ''')
+        if 'venue' not in tables:
+            c.execute('''
+                        CREATE TABLE "venue" (
+                            "venue_id" SERIAL PRIMARY KEY,
+                            "name" TEXT NOT NULL,
+                            "address" TEXT NOT NULL,
+                            "city" TEXT NOT NULL,
+                            "capacity" INTEGER NOT NULL
+                        )
+                    ''')
+
+        created_tables = set(DATA_TABLES) - set(tables)
+        # З DB_PARTITIONING=1 нові booking і payment одразу стають секціонованими
+        if PARTITIONING:
+            for table in PARTITIONED_TABLES:
+                if table in created_tables:
+                    self.partitions.convert(c, table)
+                    state['partitioned'][table] = True
+
+        # Нові таблиці порожні, тому індекси та ключі для них створюються одразу і без CONCURRENTLY
+        self._create_indexes(c, created_tables)
+        self._add_foreign_keys(c, created_tables, state['partitioned'])
+
+        changed = self.create_booking_ranges(c, state) or bool(created_tables)
+        changed = self.create_payment_dates(c, state) or changed
+
+        # Зведені таблиці аналітики та тригери, що їх підтримують
+        if not self._triggers_current(state, SUMMARY_TRIGGERS) or not set(SUMMARY_TABLES) <= set(tables):
+            c.execute(SUMMARY_TABLES_SQL)
+            self._mark_triggers(c, SUMMARY_TRIGGERS)
+            if 'payment_status_summary' not in tables:
+                c.execute(REBUILD_SUMMARIES_SQL)
+            changed = True
+
+        # Тригери, що повідомляють кеші всіх процесів про зміни venue і facility
+        if not self._triggers_current(state, REFERENCE_TRIGGERS):
+            c.execute(REFERENCE_NOTIFY_SQL)
+            self._mark_triggers(c, REFERENCE_TRIGGERS)
+            changed = True
+
+        if 'booking' in state['partitioned'] and not self._triggers_current(state, PAYMENT_REFERENCE_TRIGGERS):
+            c.execute(PAYMENT_REFERENCE_SQL)
+            self._mark_triggers(c, PAYMENT_REFERENCE_TRIGGERS)
+            changed = True
+        for table in state['partitioned']:
+            if not self._triggers_current(state, PARTITION_CHECK_TRIGGERS[table]):
+                c.execute(PARTITION_CHECK_SQL[table])
+                self._mark_triggers(c, PARTITION_CHECK_TRIGGERS[table])
+                changed = True
+
+        self.conn.commit()
+
+        # Без змін схеми повторно читати каталог не потрібно
+        for problem in self.verify_schema(self.schema_state() if changed else state):
+            print(f"Schema Warning: {problem}. Run \"Ensure Indexes And Constraints\" To Fix It.")
+
+        if state['partitioned']:
+            # Секції на найближчі місяці мають існувати раніше, ніж у них потраплять рядки
+            self.maintain_partitions()
+        elif PARTITIONING:
+            print("Schema Warning: Tables booking And payment Are Not Partitioned. "
+                  "Run \"Partition Tables By Date\" To Convert Them.")
+
+    def _create_indexes(self, c, tables):
+        for name, table, columns in INDEXES:
+            if table in tables:
+                c.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" {columns}')
+
+    def _add_foreign_keys(self, c, tables, partitioned):
+        # Ключ на секціоновану таблицю замінюють тригери PAYMENT_REFERENCE_SQL
+        for name, table, column, parent, parent_column in FOREIGN_KEYS:
+            if table in tables and parent not in partitioned:
+                c.execute(f'''
+                    ALTER TABLE "{table}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{column}")
+                    REFERENCES "{parent}" ("{parent_column}") ON DELETE CASCADE
+                ''')
+
+    def _triggers_current(self, state, triggers):
+        return all(state['trigger'].get(name) for name, _ in triggers)
+
+    def _mark_triggers(self, c, triggers):
+        for name, table in triggers:
+            c.execute(f'COMMENT ON TRIGGER "{name}" ON "{table}" IS \'{TRIGGER_VERSIONS[name][1]}\'')
+
+    def create_booking_ranges(self, c, state):
+        """
+        Доводить таблицю booking до схеми з інтервалами: booking_date типу TIMESTAMP,
+        згенерована колонка during та обмеження booking_no_overlap.
+        Повертає True, якщо схему змінено.
+        """
+        changed = False
+        if state['column'].get('booking.booking_date') is False:
+            # Старі бази зберігали лише час - відносимо такі бронювання до поточної дати
+            c.execute('''
+                ALTER TABLE "booking" ALTER COLUMN "booking_date" TYPE TIMESTAMP
+                USING CURRENT_DATE + "booking_date"
+            ''')
+            changed = True
+        if 'booking.during' not in state['column']:
+            c.execute(f'''
+                ALTER TABLE "booking" ADD COLUMN IF NOT EXISTS "during" TSRANGE
+                GENERATED ALWAYS AS ({BOOKING_DURING_SQL}) STORED
+            ''')
+            changed = True
+
+        # Секціонована booking має обмеження в кожній секції (PARTITION_CONSTRAINTS)
+        if 'booking_no_overlap' not in state['constraint'] and 'booking' not in state['partitioned']:
+            try:
+                with self.conn.transaction():
+                    c.execute(BOOKING_NO_OVERLAP_SQL)
+                changed = True
+            except Exception as e:
+                # Наявні перетини не дають створити обмеження; verify_schema про це нагадає
+                print(f"Error With Creating Booking Overlap Constraint: {str(e)}")
+        return changed
+
+    def create_payment_dates(self, c, state):
+        """
+        Доводить payment_date до типу TIMESTAMP, щоб платежі можна було вибирати за періодом.
+        Повертає True, якщо схему змінено.
+        """
+        if state['column'].get('payment.payment_date') is not False:
+            return False
+        # Як і для бронювань, платежі старих баз відносимо до поточної дати
+        c.execute('''
+            ALTER TABLE "payment" ALTER COLUMN "payment_date" TYPE TIMESTAMP
+            USING CURRENT_DATE + "payment_date"
+        ''')
+        return True
+
+    def verify_schema(self, state=None):
+        """
+        Перевіряє наявність і валідність індексів та зовнішніх ключів
+        (за станом schema_state, якщо його не передано).
+        Повертає список знайдених проблем (порожній, якщо все гаразд).
+        """
+        state = state or self.schema_state()
+        indexes = state['index']
+        foreign_keys = state['foreign_key']
+        partitioned = state['partitioned']
+
+        problems = []
+        for name, table, _ in INDEXES:
+            if name not in indexes:
+                problems.append(f"Index {name} On {table} Is Missing")
+            elif not indexes[name]:
+                problems.append(f"Index {name} On {table} Is Invalid")
+        for name, table, _, parent, _ in FOREIGN_KEYS:
+            if parent in partitioned:
+                continue
+            if name not in foreign_keys:
+                problems.append(f"Foreign Key {name} On {table} Is Missing")
+            elif not foreign_keys[name]:
+                problems.append(f"Foreign Key {name} On {table} Is Not Validated")
+        if 'booking' in partitioned:
+            for name, ready in sorted(state['partition'].items()):
+                if not ready:
+                    problems.append(f"Constraint {name}_no_overlap Is Missing (Overlapping Bookings Exist)")
+            for name, table in PAYMENT_REFERENCE_TRIGGERS:
+                if name not in state['trigger']:
+                    problems.append(f"Trigger {name} On {table} Is Missing")
+        elif 'booking_no_overlap' not in state['constraint']:
+            problems.append("Constraint booking_no_overlap Is Missing (Overlapping Bookings Exist)")
+        for table in partitioned:
+            for name, _ in PARTITION_CHECK_TRIGGERS[table]:
+                if name not in state['trigger']:
+                    problems.append(f"Trigger {name} On {table} Is Missing")
+        return problems
+
+    def ensure_indexes(self):
+        """
+        Ідемпотентно створює відсутні індекси (CREATE INDEX CONCURRENTLY, без блокування записів)
+        і зовнішні ключі (NOT VALID + VALIDATE) на існуючій базі.
+        Повертає список проблем, що залишились після виконання.
+        """
+        # CONCURRENTLY не можна виконувати всередині транзакції
+        self.conn.commit()
+        self.conn.autocommit = True
+        c = self.conn.cursor()
+        try:
+            state = self.schema_state()
+            partitioned = state['partitioned']
+            # Секціоновані таблиці не підтримують CONCURRENTLY і NOT VALID: індекси та ключі
+            # на них будуються звичайними командами з блокуванням запису
+            concurrently = {table: '' if table in partitioned else ' CONCURRENTLY' for table in DATA_TABLES}
+            index_tables = {name: table for name, table, _ in INDEXES}
+            for problem_index in self._invalid_indexes(c):
+                # Залишок перерваного CREATE INDEX CONCURRENTLY - перебудовуємо
+                c.execute(f'DROP INDEX{concurrently[index_tables[problem_index]]} IF EXISTS "{problem_index}"')
+            for name, table, columns in INDEXES:
+                c.execute(f'CREATE INDEX{concurrently[table]} IF NOT EXISTS "{name}" ON "{table}" {columns}')
+
+            for name, table, column, parent, parent_column in FOREIGN_KEYS:
+                if parent in partitioned:
+                    continue
+                c.execute("SELECT convalidated FROM pg_constraint WHERE conname = %s", (name,))
+                row = c.fetchone()
+                if row is None:
+                    not_valid = '' if table in partitioned else ' NOT VALID'
+                    c.execute(f'''
+                        ALTER TABLE "{table}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{column}")
+                        REFERENCES "{parent}" ("{parent_column}") ON DELETE CASCADE{not_valid}
+                    ''')
+                if row is None or not row[0]:
+                    try:
+                        # Перевірка існуючих рядків не блокує запис у таблицю
+                        c.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{name}"')
+                    except Exception as e:
+                        print(f"Error With Validating {name}: {str(e)}")
+
+            if 'booking' in partitioned:
+                for partition, ready in state['partition'].items():
+                    if not ready:
+                        try:
+                            self.partitions.add_constraints(c, 'booking', partition)
+                        except Exception as e:
+                            print(f"Error With Creating Booking Overlap Constraint On {partition}: {str(e)}")
+            elif 'booking_no_overlap' not in state['constraint']:
+                try:
+                    c.execute(BOOKING_NO_OVERLAP_SQL)
+                except Exception as e:
+                    print(f"Error With Creating Booking Overlap Constraint: {str(e)}")
+        except Exception as e:
+            print(f"Error With Ensuring Indexes: {str(e)}")
+        finally:
+            self.conn.autocommit = False
+        return self.verify_schema()
+
+    def _invalid_indexes(self, c):
+        c.execute("""
+            SELECT i.relname
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE NOT x.indisvalid AND i.relname = ANY(%s)
+        """, ([name for name, _, _ in INDEXES],))
+        return [row[0] for row in c.fetchall()]
+
+    def partition_tables(self, ahead=PARTITION_MONTHS_AHEAD):
+        """
+        Перетворює наявні booking і payment на секціоновані за датою таблиці.
+        Рядки переносяться в одній транзакції, і весь цей час таблиці заблоковані.
+        Повертає список перетворених таблиць (порожній, якщо все вже секціоновано) або None.
+        """
+        c = self.conn.cursor()
+        try:
+            tables = [table for table in PARTITIONED_TABLES if table not in self.partitions.partitioned(c)]
+            for table in tables:
+                self.partitions.convert(c, table, ahead)
+            if tables:
+                # Індекси, ключі й тригери видалились разом зі старими таблицями
+                partitioned = self.partitions.partitioned(c)
+                self._create_indexes(c, tables)
+                self._add_foreign_keys(c, tables, partitioned)
+                c.execute(SUMMARY_TABLES_SQL)
+                self._mark_triggers(c, SUMMARY_TRIGGERS)
+                if 'booking' in partitioned:
+                    c.execute(PAYMENT_REFERENCE_SQL)
+                    self._mark_triggers(c, PAYMENT_REFERENCE_TRIGGERS)
+                for table in tables:
+                    c.execute(PARTITION_CHECK_SQL[table])
+                    self._mark_triggers(c, PARTITION_CHECK_TRIGGERS[table])
+            self.conn.commit()
+            self.existence.clear()
+            return tables
+        except Exception as e:
+            self.rollback()
+            print(f"Error With Partitioning Tables: {str(e)}")
+            return None
+
+    def maintain_partitions(self, ahead=PARTITION_MONTHS_AHEAD, retention=PARTITION_RETENTION_MONTHS,
+                            drop=PARTITION_EXPIRE == 'drop'):
+        """
+        Створює секції на ahead місяців наперед і від'єднує секції, старші за retention місяців
+        (drop=True - видаляє їх). Платежі бронювань від'єднаної секції booking переносяться
+        в архівну таблицю <секція>_payment (з drop=True - видаляються).
+        Повертає (створені секції, від'єднані секції) або None.
+        """
+        c = self.conn.cursor()
+        try:
+            created, expired = [], []
+            for table in sorted(self.partitions.partitioned(c)):
+                created += self.partitions.ensure_partitions(c, table, ahead)
+                for partition in self.partitions.expired(c, table, retention):
+                    if table == 'booking':
+                        self._expire_payments(c, partition, drop)
+                    self._subtract_summaries(c, table, partition)
+                    self.partitions.expire(c, table, partition, drop)
+                    expired.append(partition)
+            self.conn.commit()
+            if expired:
+                self.existence.clear()
+            return created, expired
+        except Exception as e:
+            self.rollback()
+            print(f"Error With Maintaining Partitions: {str(e)}")
+            return None
+
+    def _expire_payments(self, c, partition, drop):
+        # Від'єднання секції не запускає тригера booking_payment_cascade, тому платежі її
+        # бронювань прибираються явно: DELETE запускає тригери зведень payment
+        moved = f'DELETE FROM "payment" WHERE "booking_id" IN (SELECT "booking_id" FROM "{partition}")'
+        if drop:
+            c.execute(moved)
+        else:
+            archive = f"{partition}_payment"
+            c.execute(f'CREATE TABLE "{archive}" (LIKE "payment")')
+            c.execute(f'WITH moved AS ({moved} RETURNING *) INSERT INTO "{archive}" SELECT * FROM moved')
+
+    def _subtract_summaries(self, c, table, partition):
+        # Від'єднання секції прибирає рядки без DELETE і тригерів, тому зведення
+        # зменшуються тим самим тілом тригера, що читає рядки секції замість old_rows
+        c.execute(SUMMARY_BODIES[table]('DELETE').replace('old_rows', f'"{partition}"'))
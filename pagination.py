@@ -0,0 +1,42 @@
+class ViewPager:
+    def get_page_action(self):
+        return input("[N]ext, [P]revious, [S]eek by ID, [Q]uit: ").strip().lower()
+
+    def get_seek_id(self):
+        return int(input("Show from ID: "))
+
+    def show_pager_message(self, message):
+        print(message)
+
+
+class ControllerPager:
+    def __init__(self, fetch_page, show_page, view_pager=None):
+        # fetch_page(after_id=..., before_id=..., limit=...) - метод get_*_page моделі
+        self.fetch_page = fetch_page
+        self.show_page = show_page
+        self.view_pager = view_pager or ViewPager()
+
+    def browse(self, page_size):
+        rows = self.fetch_page(limit=page_size) or []
+
+        while True:
+            self.show_page(rows)
+            action = self.view_pager.get_page_action()
+
+            if action == 'n':
+                # Наступна сторінка починається після останнього ключа поточної
+                next_rows = self.fetch_page(after_id=rows[-1][0], limit=page_size) if rows else None
+                if next_rows:
+                    rows = next_rows
+                else:
+                    self.view_pager.show_pager_message("This Is The Last Page")
+            elif action == 'p':
+                prev_rows = self.fetch_page(before_id=rows[0][0], limit=page_size) if rows else None
+                if prev_rows:
+                    rows = prev_rows
+                else:
+                    self.view_pager.show_pager_message("This Is The First Page")
+            elif action == 's':
+                rows = self.fetch_page(after_id=self.view_pager.get_seek_id() - 1, limit=page_size) or []
+            elif action == 'q':
+                break
@@ -0,0 +1,213 @@
+import datetime
+import os
+import re
+
+# DB_PARTITIONING=1: нові таблиці booking і payment створюються секціонованими за датою.
+# Наявні таблиці перетворюються лише явно (пункт меню "Partition Tables By Date")
+PARTITIONING = os.environ.get('DB_PARTITIONING', '0') == '1'
+# На скільки місяців наперед тримати готові секції
+PARTITION_MONTHS_AHEAD = int(os.environ.get('DB_PARTITION_MONTHS_AHEAD', 3))
+# Секції, старші за стільки місяців, вважаються застарілими (0 - зберігати всі)
+PARTITION_RETENTION_MONTHS = int(os.environ.get('DB_PARTITION_RETENTION_MONTHS', 0))
+# Застарілі секції від'єднуються і лишаються окремими архівними таблицями (detach) або видаляються (drop)
+PARTITION_EXPIRE = os.environ.get('DB_PARTITION_EXPIRE', 'detach')
+
+# Секціоновані таблиці: таблиця -> (ключ секціонування, колонка ідентифікатора)
+PARTITIONED_TABLES = {
+    'booking': ('booking_date', 'booking_id'),
+    'payment': ('payment_date', 'payment_id')
+}
+
+# Місячні секції називаються <таблиця>_pРРРР_ММ, а рядки поза ними потрапляють у <таблиця>_default
+_PARTITION_NAME_RE = re.compile(r'^(?P<table>[a-z_]+)_p(?P<year>\d{4})_(?P<month>\d{2})$')
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition(table):
+    return f"{table}_default"
+
+
+class PartitionManager:
+    """
+    Секціонування booking і payment за місяцями дати (PARTITION BY RANGE).
+    Запити з умовою на дату читають лише потрібні секції (partition pruning),
+    а старі дані прибираються від'єднанням секції замість DELETE мільйонів рядків.
+
+    Унікальні обмеження секціонованої таблиці мусять містити ключ секціонування, тому
+    первинний ключ стає (ідентифікатор, дата), а обмеження-виключення створюються
+    в кожній секції окремо (constraints: таблиця -> [(суфікс назви, визначення)]).
+    Унікальність ідентифікатора та перетини між секціями перевіряють тригери
+    model.PARTITION_CHECK_SQL, які встановлює викликач.
+    Транзакціями керує викликач: методи отримують курсор і нічого не фіксують.
+    """
+
+    def __init__(self, constraints=None):
+        self.constraints = constraints or {}
+
+    def partitioned(self, c):
+        """
+        Повертає множину таблиць з PARTITIONED_TABLES, які вже секціоновані.
+        """
+        c.execute("""
+            SELECT relname FROM pg_class
+            WHERE oid = ANY(ARRAY(SELECT to_regclass(quote_ident(t)) FROM unnest(%s::text[]) AS t))
+                AND relkind = 'p'
+        """, (list(PARTITIONED_TABLES),))
+        return {row[0] for row in c.fetchall()}
+
+    def partitions(self, c, table):
+        """
+        Місячні секції таблиці: {назва: перший день місяця}. Секція за замовчуванням не входить.
+        """
+        c.execute("""
+            SELECT p.relname FROM pg_inherits i
+            JOIN pg_class p ON p.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(quote_ident(%s))
+        """, (table,))
+        months = {}
+        for (name,) in c.fetchall():
+            match = _PARTITION_NAME_RE.match(name)
+            if match and match['table'] == table:
+                months[name] = datetime.date(int(match['year']), int(match['month']), 1)
+        return months
+
+    def convert(self, c, table, ahead=PARTITION_MONTHS_AHEAD, today=None):
+        """
+        Перетворює звичайну таблицю на секціоновану: створює секції для кожного місяця
+        з даними та на ahead місяців наперед, переносить рядки і замінює стару таблицю.
+        Зовнішні ключі інших таблиць на неї, її індекси та тригери видаляються разом
+        зі старою таблицею - їх відновлює викликач (Model.partition_tables) разом
+        з тригерами унікальності ідентифікатора.
+        """
+        key, id_column = PARTITIONED_TABLES[table]
+        staging = f"{table}_partitioned"
+        c.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        # LIKE переносить типи, NOT NULL, значення за замовчуванням (nextval) і згенеровану колонку during
+        c.execute(f'''
+            CREATE TABLE "{staging}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING GENERATED)
+            PARTITION BY RANGE ("{key}")
+        ''')
+
+        c.execute(f'SELECT DISTINCT date_trunc(\'month\', "{key}")::date FROM "{table}"')
+        current = month_start(today or datetime.date.today())
+        months = {row[0] for row in c.fetchall()}
+        months.update(add_months(current, offset) for offset in range(ahead + 1))
+        for month in sorted(months):
+            self._create(c, staging, partition_name(table, month), month)
+        self._create(c, staging, default_partition(table))
+
+        columns = self._insert_columns(c, table)
+        c.execute(f'INSERT INTO "{staging}" ({columns}) SELECT {columns} FROM "{table}"')
+        # Обмеження-виключення будуються після перенесення рядків - так швидше, ніж перевіряти кожну вставку
+        for name in [*(partition_name(table, month) for month in sorted(months)), default_partition(table)]:
+            self.add_constraints(c, table, name)
+
+        # Послідовність SERIAL належить колонці старої таблиці і видалилася б разом з нею
+        c.execute('SELECT pg_get_serial_sequence(%s, %s)', (f'"{table}"', id_column))
+        sequence = c.fetchone()[0]
+        if sequence:
+            c.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+        c.execute(f'DROP TABLE "{table}" CASCADE')
+        c.execute(f'ALTER TABLE "{staging}" RENAME TO "{table}"')
+        if sequence:
+            c.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{table}"."{id_column}"')
+        c.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ("{id_column}", "{key}")')
+
+    def ensure_partitions(self, c, table, ahead=PARTITION_MONTHS_AHEAD, today=None):
+        """
+        Створює відсутні секції від поточного місяця до ahead місяців наперед.
+        Повертає назви створених секцій.
+        """
+        existing = set(self.partitions(c, table).values())
+        current = month_start(today or datetime.date.today())
+        created = []
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(self.create_partition(c, table, month))
+        return created
+
+    def create_partition(self, c, table, month):
+        """
+        Створює секцію місяця month. Рядки цього місяця, що вже лежать у секції
+        за замовчуванням, переносяться в нову секцію: інакше PostgreSQL її не створить.
+        Рядки переносяться між секціями напряму, тому тригери зведених таблиць
+        на батьківській таблиці не спрацьовують і зведення не змінюються.
+        """
+        key, _ = PARTITIONED_TABLES[table]
+        name = partition_name(table, month)
+        default = default_partition(table)
+        # DDL не приймає параметрів, тому межі підставляються літералами дат
+        bounds = f"\"{key}\" >= '{month}' AND \"{key}\" < '{add_months(month, 1)}'"
+        columns = self._insert_columns(c, table)
+
+        c.execute('SELECT to_regclass(quote_ident(%s)) IS NOT NULL', (default,))
+        moved = False
+        if c.fetchone()[0]:
+            c.execute(f'''
+                CREATE TEMP TABLE "partition_rows" ON COMMIT DROP AS
+                SELECT {columns} FROM "{default}" WHERE {bounds}
+            ''')
+            moved = c.rowcount > 0
+            if moved:
+                c.execute(f'DELETE FROM "{default}" WHERE {bounds}')
+
+        self._create(c, table, name, month)
+        self.add_constraints(c, table, name)
+        if moved:
+            c.execute(f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM "partition_rows"')
+        c.execute('DROP TABLE IF EXISTS "partition_rows"')
+        return name
+
+    def expired(self, c, table, retention=PARTITION_RETENTION_MONTHS, today=None):
+        """
+        Секції, всі дати яких старші за retention місяців від поточного місяця.
+        """
+        if retention <= 0:
+            return []
+        cutoff = add_months(month_start(today or datetime.date.today()), -retention)
+        partitions = self.partitions(c, table)
+        return sorted((name for name, month in partitions.items() if month < cutoff), key=partitions.get)
+
+    def expire(self, c, table, name, drop=PARTITION_EXPIRE == 'drop'):
+        """
+        Від'єднує секцію name; з drop=True секція видаляється разом з даними.
+        """
+        c.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+        if drop:
+            c.execute(f'DROP TABLE "{name}"')
+
+    def _create(self, c, parent, name, month=None):
+        if month is None:
+            c.execute(f'CREATE TABLE "{name}" PARTITION OF "{parent}" DEFAULT')
+        else:
+            c.execute(f'''
+                CREATE TABLE "{name}" PARTITION OF "{parent}"
+                FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')
+            ''')
+
+    def add_constraints(self, c, table, name):
+        for suffix, definition in self.constraints.get(table, ()):
+            c.execute(f'ALTER TABLE "{name}" ADD CONSTRAINT "{name}_{suffix}" {definition}')
+
+    def _insert_columns(self, c, table):
+        # Згенеровані колонки (during) обчислюються при вставці, передавати їх не можна
+        c.execute("""
+            SELECT attname FROM pg_attribute
+            WHERE attrelid = to_regclass(quote_ident(%s)) AND attnum > 0
+                AND NOT attisdropped AND attgenerated = ''
+            ORDER BY attnum
+        """, (table,))
+        return ', '.join(f'"{row[0]}"' for row in c.fetchall())
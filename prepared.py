@@ -0,0 +1,381 @@
+import threading
+import weakref
+
+from instrumentation import planning_time, planning_time_async, prepared_stats
+
+# Сторінка історії бронювань користувача в порядку (booking_date, booking_id): перша сторінка
+# починається з дати, наступні - після курсора (дата, ID) останнього рядка попередньої
+_USER_BOOKINGS = '''
+    SELECT "booking_id", "user_id", "facility_id", "booking_date", "start_time", "end_time", "status"
+    FROM "booking"
+    WHERE "user_id" = %s AND {condition}
+    ORDER BY "booking_date", "booking_id"
+    LIMIT %s
+'''
+_USER_BOOKINGS_FIRST = _USER_BOOKINGS.format(condition='"booking_date" >= %s')
+_USER_BOOKINGS_AFTER = _USER_BOOKINGS.format(condition='("booking_date", "booking_id") > (%s, %s)')
+
+# Подробиці додаються до вже вибраної сторінки, тож з'єднання виконуються лише для limit рядків:
+# назва об'єкта, заклад, кількість платежів і сума успішних
+_USER_BOOKING_DETAILS = '''
+    SELECT b.*, f."facility_name", v."venue_id", v."name", p."payments", p."paid"
+    FROM ({page}) AS b
+    JOIN "facility" f ON f."facility_id" = b."facility_id"
+    JOIN "venue" v ON v."venue_id" = f."venue_id"
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS "payments", SUM(p."amount") FILTER (WHERE p."payment_status") AS "paid"
+        FROM "payment" p WHERE p."booking_id" = b."booking_id"
+    ) AS p
+    ORDER BY b."booking_date", b."booking_id"
+'''
+
+# Гарячі запити всіх моделей: назва -> текст. Кожен запит готується на сервері
+# (PREPARE) при першому виконанні на з'єднанні, а далі виконується без повторного
+# розбору і, коли PostgreSQL переходить на загальний план, без планування.
+# Колонки перелічені явно: після ALTER TABLE підготовлений SELECT * завершився б
+# помилкою "cached plan must not change result type"
+PREPARED_QUERIES = {
+    'booking.exists': 'SELECT 1 FROM "booking" WHERE "booking_id" = %s',
+    'facility.exists': 'SELECT 1 FROM "facility" WHERE "facility_id" = %s',
+    'payment.exists': 'SELECT 1 FROM "payment" WHERE "payment_id" = %s',
+    'users.exists': 'SELECT 1 FROM "users" WHERE "user_id" = %s',
+    'venue.exists': 'SELECT 1 FROM "venue" WHERE "venue_id" = %s',
+
+    # Оновлення і видалення одного рядка: RETURNING повідомляє, чи існував рядок,
+    # тож окрема перевірка існування і читання об'єкта ORM не потрібні.
+    # Для users і venue NULL означає "не змінювати" (усі колонки NOT NULL)
+    'booking.update': '''
+        UPDATE "booking"
+        SET "user_id" = %s, "facility_id" = %s, "booking_date" = %s,
+            "start_time" = %s, "end_time" = %s, "status" = %s
+        WHERE "booking_id" = %s
+        RETURNING "booking_id"
+    ''',
+    'facility.update': '''
+        UPDATE "facility" f
+        SET "facility_name" = %s, "facility_type" = %s, "venue_id" = %s
+        FROM "facility" o
+        WHERE f."facility_id" = %s AND o."facility_id" = f."facility_id"
+        RETURNING o."venue_id", f."venue_id"
+    ''',
+    'payment.update': '''
+        UPDATE "payment"
+        SET "booking_id" = %s, "amount" = %s::text::money, "payment_date" = %s, "payment_status" = %s
+        WHERE "payment_id" = %s
+        RETURNING "payment_id"
+    ''',
+    'users.update': '''
+        UPDATE "users"
+        SET "first_name" = COALESCE(%s, "first_name"), "last_name" = COALESCE(%s, "last_name"),
+            "email" = COALESCE(%s, "email"), "phone_number" = COALESCE(%s, "phone_number"),
+            "date_of_registration" = COALESCE(%s, "date_of_registration")
+        WHERE "user_id" = %s
+        RETURNING "user_id"
+    ''',
+    'venue.update': '''
+        UPDATE "venue"
+        SET "name" = COALESCE(%s, "name"), "address" = COALESCE(%s, "address"),
+            "city" = COALESCE(%s, "city"), "capacity" = COALESCE(%s, "capacity")
+        WHERE "venue_id" = %s
+        RETURNING "venue_id"
+    ''',
+    # Вставка одного рядка: наявність батьківських рядків перевіряють зовнішні ключі.
+    # Суму платежу (число або рядок на кшталт '$12.50') приводимо до money через text
+    'booking.insert': '''
+        INSERT INTO "booking" ("booking_id", "user_id", "facility_id", "booking_date",
+                               "start_time", "end_time", "status")
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ''',
+    'facility.insert': '''
+        INSERT INTO "facility" ("facility_id", "facility_name", "facility_type", "venue_id")
+        VALUES (%s, %s, %s, %s)
+    ''',
+    'payment.insert': '''
+        INSERT INTO "payment" ("payment_id", "booking_id", "amount", "payment_date", "payment_status")
+        VALUES (%s, %s, %s::text::money, %s, %s)
+    ''',
+    'users.insert': '''
+        INSERT INTO "users" ("user_id", "first_name", "last_name", "email",
+                             "phone_number", "date_of_registration")
+        VALUES (%s, %s, %s, %s, %s, %s)
+    ''',
+    'venue.insert': '''
+        INSERT INTO "venue" ("venue_id", "name", "address", "city", "capacity")
+        VALUES (%s, %s, %s, %s, %s)
+    ''',
+
+    'booking.delete': 'DELETE FROM "booking" WHERE "booking_id" = %s RETURNING "booking_id"',
+    'facility.delete': 'DELETE FROM "facility" WHERE "facility_id" = %s RETURNING "venue_id"',
+    'payment.delete': 'DELETE FROM "payment" WHERE "payment_id" = %s RETURNING "payment_id"',
+    'users.delete': 'DELETE FROM "users" WHERE "user_id" = %s RETURNING "user_id"',
+    'venue.delete': 'DELETE FROM "venue" WHERE "venue_id" = %s RETURNING "venue_id"',
+
+    # Пакетні операції (model.execute_batch): рядки приходять одним jsonb-масивом і
+    # розгортаються jsonb_to_recordset. Рядок, що не пройшов умову (дублікат ключа,
+    # відсутній батьківський рядок), не потрапляє в RETURNING і отримує False.
+    # Первинний ключ секціонованих booking і payment містить дату, тому ON CONFLICT
+    # не ловить повтор ідентифікатора з іншою датою - його відсіює NOT EXISTS
+    'booking.add_many': '''
+        INSERT INTO "booking" ("booking_id", "user_id", "facility_id", "booking_date",
+                               "start_time", "end_time", "status")
+        SELECT r.booking_id, r.user_id, r.facility_id, r.booking_date, r.start_time, r.end_time, r.status
+        FROM jsonb_to_recordset(%s) AS r(booking_id INTEGER, user_id INTEGER, facility_id INTEGER,
+                                          booking_date TIMESTAMP, start_time TIME, end_time TIME,
+                                          status BOOLEAN)
+        WHERE EXISTS (SELECT 1 FROM "users" u WHERE u."user_id" = r.user_id)
+          AND EXISTS (SELECT 1 FROM "facility" f WHERE f."facility_id" = r.facility_id)
+          AND NOT EXISTS (SELECT 1 FROM "booking" b WHERE b."booking_id" = r.booking_id)
+        ON CONFLICT DO NOTHING
+        RETURNING "booking_id"
+    ''',
+    'booking.update_many': '''
+        UPDATE "booking" b
+        SET "user_id" = r.user_id, "facility_id" = r.facility_id, "booking_date" = r.booking_date,
+            "start_time" = r.start_time, "end_time" = r.end_time, "status" = r.status
+        FROM jsonb_to_recordset(%s) AS r(booking_id INTEGER, user_id INTEGER, facility_id INTEGER,
+                                          booking_date TIMESTAMP, start_time TIME, end_time TIME,
+                                          status BOOLEAN)
+        WHERE b."booking_id" = r.booking_id
+          AND EXISTS (SELECT 1 FROM "users" u WHERE u."user_id" = r.user_id)
+          AND EXISTS (SELECT 1 FROM "facility" f WHERE f."facility_id" = r.facility_id)
+        RETURNING b."booking_id"
+    ''',
+    'facility.add_many': '''
+        INSERT INTO "facility" ("facility_id", "facility_name", "facility_type", "venue_id")
+        SELECT r.facility_id, r.facility_name, r.facility_type, r.venue_id
+        FROM jsonb_to_recordset(%s) AS r(facility_id INTEGER, facility_name TEXT,
+                                          facility_type TEXT, venue_id INTEGER)
+        WHERE EXISTS (SELECT 1 FROM "venue" v WHERE v."venue_id" = r.venue_id)
+        ON CONFLICT DO NOTHING
+        RETURNING "facility_id"
+    ''',
+    'facility.update_many': '''
+        UPDATE "facility" f
+        SET "facility_name" = r.facility_name, "facility_type" = r.facility_type, "venue_id" = r.venue_id
+        FROM jsonb_to_recordset(%s) AS r(facility_id INTEGER, facility_name TEXT,
+                                          facility_type TEXT, venue_id INTEGER)
+        WHERE f."facility_id" = r.facility_id
+          AND EXISTS (SELECT 1 FROM "venue" v WHERE v."venue_id" = r.venue_id)
+        RETURNING f."facility_id"
+    ''',
+    'payment.add_many': '''
+        INSERT INTO "payment" ("payment_id", "booking_id", "amount", "payment_date", "payment_status")
+        SELECT r.payment_id, r.booking_id, r.amount::money, r.payment_date, r.payment_status
+        FROM jsonb_to_recordset(%s) AS r(payment_id INTEGER, booking_id INTEGER, amount TEXT,
+                                          payment_date TIMESTAMP, payment_status BOOLEAN)
+        WHERE EXISTS (SELECT 1 FROM "booking" b WHERE b."booking_id" = r.booking_id)
+          AND NOT EXISTS (SELECT 1 FROM "payment" p WHERE p."payment_id" = r.payment_id)
+        ON CONFLICT DO NOTHING
+        RETURNING "payment_id"
+    ''',
+    'payment.update_many': '''
+        UPDATE "payment" p
+        SET "booking_id" = r.booking_id, "amount" = r.amount::money,
+            "payment_date" = r.payment_date, "payment_status" = r.payment_status
+        FROM jsonb_to_recordset(%s) AS r(payment_id INTEGER, booking_id INTEGER, amount TEXT,
+                                          payment_date TIMESTAMP, payment_status BOOLEAN)
+        WHERE p."payment_id" = r.payment_id
+          AND EXISTS (SELECT 1 FROM "booking" b WHERE b."booking_id" = r.booking_id)
+        RETURNING p."payment_id"
+    ''',
+    'users.add_many': '''
+        INSERT INTO "users" ("user_id", "first_name", "last_name", "email",
+                             "phone_number", "date_of_registration")
+        SELECT * FROM jsonb_to_recordset(%s) AS r(user_id INTEGER, first_name TEXT, last_name TEXT,
+                                                   email TEXT, phone_number TEXT,
+                                                   date_of_registration DATE)
+        ON CONFLICT DO NOTHING
+        RETURNING "user_id"
+    ''',
+    # Усі колонки users і venue NOT NULL, тому відсутнє в рядку значення означає "не змінювати"
+    'users.update_many': '''
+        UPDATE "users" u
+        SET "first_name" = COALESCE(r.first_name, u."first_name"),
+            "last_name" = COALESCE(r.last_name, u."last_name"),
+            "email" = COALESCE(r.email, u."email"),
+            "phone_number" = COALESCE(r.phone_number, u."phone_number"),
+            "date_of_registration" = COALESCE(r.date_of_registration, u."date_of_registration")
+        FROM jsonb_to_recordset(%s) AS r(user_id INTEGER, first_name TEXT, last_name TEXT,
+                                          email TEXT, phone_number TEXT, date_of_registration DATE)
+        WHERE u."user_id" = r.user_id
+        RETURNING u."user_id"
+    ''',
+    'venue.add_many': '''
+        INSERT INTO "venue" ("venue_id", "name", "address", "city", "capacity")
+        SELECT * FROM jsonb_to_recordset(%s) AS r(venue_id INTEGER, name TEXT, address TEXT,
+                                                   city TEXT, capacity INTEGER)
+        ON CONFLICT DO NOTHING
+        RETURNING "venue_id"
+    ''',
+    'venue.update_many': '''
+        UPDATE "venue" v
+        SET "name" = COALESCE(r.name, v."name"),
+            "address" = COALESCE(r.address, v."address"),
+            "city" = COALESCE(r.city, v."city"),
+            "capacity" = COALESCE(r.capacity, v."capacity")
+        FROM jsonb_to_recordset(%s) AS r(venue_id INTEGER, name TEXT, address TEXT,
+                                          city TEXT, capacity INTEGER)
+        WHERE v."venue_id" = r.venue_id
+        RETURNING v."venue_id"
+    ''',
+    'booking.delete_many': 'DELETE FROM "booking" WHERE "booking_id" = ANY(%s) RETURNING "booking_id"',
+    'facility.delete_many': 'DELETE FROM "facility" WHERE "facility_id" = ANY(%s) RETURNING "facility_id"',
+    'payment.delete_many': 'DELETE FROM "payment" WHERE "payment_id" = ANY(%s) RETURNING "payment_id"',
+    'users.delete_many': 'DELETE FROM "users" WHERE "user_id" = ANY(%s) RETURNING "user_id"',
+    'venue.delete_many': 'DELETE FROM "venue" WHERE "venue_id" = ANY(%s) RETURNING "venue_id"',
+
+    'booking.user_bookings': _USER_BOOKINGS_FIRST,
+    'booking.user_bookings_after': _USER_BOOKINGS_AFTER,
+    'booking.user_bookings_details': _USER_BOOKING_DETAILS.format(page=_USER_BOOKINGS_FIRST),
+    'booking.user_bookings_details_after': _USER_BOOKING_DETAILS.format(page=_USER_BOOKINGS_AFTER),
+
+    'venue.get': '''
+        SELECT "venue_id", "name", "address", "city", "capacity"
+        FROM "venue" WHERE "venue_id" = %s
+    ''',
+    'facility.get': '''
+        SELECT "facility_id", "venue_id", "facility_name", "facility_type"
+        FROM "facility" WHERE "facility_id" = %s
+    ''',
+    'venue.facilities': '''
+        SELECT "facility_id", "venue_id", "facility_name", "facility_type"
+        FROM "facility" WHERE "venue_id" = %s ORDER BY "facility_id"
+    ''',
+
+    # Кандидатів (об'єкти закладу) дає кеш довідкових таблиць, база перевіряє лише бронювання.
+    # Вираз int4range збігається з обмеженням booking_no_overlap, тому перевірка
+    # йде по його GiST-індексу навіть для об'єктів з десятками тисяч бронювань
+    'facility.find_free': '''
+        SELECT f."facility_id"
+        FROM unnest(%s::integer[]) AS f("facility_id")
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "booking" b
+            WHERE int4range(b."facility_id", b."facility_id", '[]')
+                  = int4range(f."facility_id", f."facility_id", '[]')
+              AND b."during" && tsrange(%s, %s)
+              AND b."status"
+        )
+    ''',
+
+    # Кількості бронювань і платежів підтримуються тригерами у зведених таблицях
+    'analytics.most_booked_venue': '''
+        SELECT v."venue_id", v."name" AS venue_name, s."total_bookings"
+        FROM "venue_booking_summary" s
+        JOIN "venue" v ON v."venue_id" = s."venue_id"
+        WHERE s."total_bookings" > 0
+        ORDER BY s."total_bookings" DESC
+        LIMIT 1 -- Найпопулярніше місце
+    ''',
+    'analytics.user_activity': '''
+        SELECT u."user_id", u."first_name", u."last_name", s."total_bookings"
+        FROM "user_booking_summary" s
+        JOIN "users" u ON u."user_id" = s."user_id"
+        WHERE s."total_bookings" > 0
+        ORDER BY s."total_bookings" DESC
+        LIMIT 5 -- П'ять найактивніших користувачів
+    ''',
+    'analytics.payment_analysis': '''
+        SELECT s."payment_status", s."total_payments", s."total_revenue"
+        FROM "payment_status_summary" s
+        WHERE s."total_payments" > 0
+        ORDER BY s."total_revenue" DESC
+    ''',
+
+    # Аналітика за періодом [початок, кінець): умова по даті відбирається BRIN-індексами
+    # booking_date і payment_date. Виручка - сума успішних платежів
+    'analytics.revenue_by_period': '''
+        SELECT date_trunc(%s, p."payment_date") AS period, COUNT(*), SUM(p."amount")
+        FROM "payment" p
+        WHERE p."payment_date" >= %s AND p."payment_date" < %s AND p."payment_status"
+        GROUP BY period
+        ORDER BY period
+    ''',
+    'analytics.revenue_by_venue': '''
+        SELECT v."venue_id", v."name", COUNT(*), SUM(p."amount") AS revenue
+        FROM "payment" p
+        JOIN "booking" b ON b."booking_id" = p."booking_id"
+        JOIN "facility" f ON f."facility_id" = b."facility_id"
+        JOIN "venue" v ON v."venue_id" = f."venue_id"
+        WHERE p."payment_date" >= %s AND p."payment_date" < %s AND p."payment_status"
+        GROUP BY v."venue_id", v."name"
+        ORDER BY revenue DESC, v."venue_id"
+        LIMIT %s
+    ''',
+    'analytics.revenue_by_status': '''
+        SELECT p."payment_status", COUNT(*), SUM(p."amount") AS revenue
+        FROM "payment" p
+        WHERE p."payment_date" >= %s AND p."payment_date" < %s
+        GROUP BY p."payment_status"
+        ORDER BY revenue DESC
+    ''',
+    'analytics.facility_bookings': '''
+        SELECT f."facility_id", f."facility_name", f."venue_id", COUNT(*) AS bookings
+        FROM "booking" b
+        JOIN "facility" f ON f."facility_id" = b."facility_id"
+        WHERE b."booking_date" >= %s AND b."booking_date" < %s
+        GROUP BY f."facility_id"
+        ORDER BY bookings DESC, f."facility_id"
+        LIMIT %s
+    '''
+}
+
+# PostgreSQL планує перші п'ять виконань запиту з параметрами окремо для кожних
+# значень (custom plan) і лише потім може перейти на збережений загальний план;
+# запит без параметрів одразу виконується за загальним планом
+CUSTOM_PLAN_EXECUTIONS = 5
+
+# З'єднання -> {назва: кількість виконань на цьому з'єднанні}
+_executions = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _count_execution(conn, name):
+    with _lock:
+        counts = _executions.setdefault(conn, {})
+        counts[name] = counts.get(name, 0) + 1
+        return counts[name]
+
+
+def _record(name, params, executions, planning_ms):
+    threshold = CUSTOM_PLAN_EXECUTIONS if params else 0
+    prepared_stats.record(name, prepared=executions == 1, planning_ms=planning_ms,
+                          saved=executions > max(threshold, 1))
+
+
+def execute(conn, name, params=None):
+    """
+    Виконує зареєстрований запит name на з'єднанні conn як prepared statement
+    і повертає курсор з результатом.
+    """
+    query = PREPARED_QUERIES[name]
+    c = conn.cursor()
+    c.execute(query, params, prepare=True)
+    executions = _count_execution(conn, name)
+    planning_ms = None
+    if executions == 1 and prepared_stats.planning_ms(name) is None:
+        planning_ms = planning_time(conn, query, params)
+    _record(name, params, executions, planning_ms)
+    return c
+
+
+def fetch_one(conn, name, params=None):
+    return execute(conn, name, params).fetchone()
+
+
+def fetch_all(conn, name, params=None):
+    return execute(conn, name, params).fetchall()
+
+
+async def execute_async(conn, name, params=None):
+    """
+    Асинхронний варіант execute для з'єднань AsyncConnection.
+    """
+    query = PREPARED_QUERIES[name]
+    c = conn.cursor()
+    await c.execute(query, params, prepare=True)
+    executions = _count_execution(conn, name)
+    planning_ms = None
+    if executions == 1 and prepared_stats.planning_ms(name) is None:
+        planning_ms = await planning_time_async(conn, query, params)
+    _record(name, params, executions, planning_ms)
+    return c
@@ -0,0 +1,214 @@
+import collections
+import os
+import threading
+
+import psycopg
+
+import alch
+import prepared
+
+# Максимальна кількість закешованих закладів, об'єктів і списків об'єктів закладу
+REFERENCE_CACHE_SIZE = int(os.environ.get('DB_REFERENCE_CACHE_SIZE', 10000))
+REFERENCE_CHANNEL = 'reference_changed'
+
+# Інструкція, що змінила більше рядків, надсилає одне повідомлення про всю таблицю
+NOTIFY_ROW_LIMIT = 100
+
+
+def _notify_trigger(table, payload):
+    """
+    Тригери на рівні інструкції з таблицями переходу, що повідомляють про зміни через NOTIFY.
+    Формат повідомлення: "<таблиця>:<операція>:<payload рядка>", "<таблиця>:<операція>:*"
+    (змінено понад NOTIFY_ROW_LIMIT рядків) або "<таблиця>:TRUNCATE".
+    """
+    def notify(rows):
+        return f"""
+            IF (SELECT count(*) FROM {rows}) > {NOTIFY_ROW_LIMIT} THEN
+                PERFORM pg_notify('{REFERENCE_CHANNEL}', '{table}:' || TG_OP || ':*');
+            ELSE
+                PERFORM pg_notify('{REFERENCE_CHANNEL}', '{table}:' || TG_OP || ':' || {payload}) FROM {rows};
+            END IF;"""
+
+    return f"""
+        CREATE OR REPLACE FUNCTION "{table}_notify"() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('{REFERENCE_CHANNEL}', '{table}:TRUNCATE');
+            ELSIF TG_OP = 'INSERT' THEN{notify('new_rows')}
+            ELSIF TG_OP = 'UPDATE' THEN{notify('(SELECT * FROM old_rows UNION SELECT * FROM new_rows) AS changed')}
+            ELSE{notify('old_rows')}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER "{table}_notify_insert" AFTER INSERT ON "{table}"
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "{table}_notify"();
+        CREATE OR REPLACE TRIGGER "{table}_notify_update" AFTER UPDATE ON "{table}"
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION "{table}_notify"();
+        CREATE OR REPLACE TRIGGER "{table}_notify_delete" AFTER DELETE ON "{table}"
+            REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION "{table}_notify"();
+        CREATE OR REPLACE TRIGGER "{table}_notify_truncate" AFTER TRUNCATE ON "{table}"
+            FOR EACH STATEMENT EXECUTE FUNCTION "{table}_notify"();
+    """
+
+
+# Об'єкт повідомляє і свій заклад, щоб скинути закешований список об'єктів закладу
+REFERENCE_NOTIFY_SQL = (_notify_trigger('venue', '"venue_id"')
+                        + _notify_trigger('facility', '"facility_id" || \':\' || "venue_id"'))
+
+# Тригери повідомлень: (назва, таблиця)
+REFERENCE_TRIGGERS = [(f"{table}_notify_{op}", table)
+                      for table in ('venue', 'facility') for op in ('insert', 'update', 'delete', 'truncate')]
+
+
+class _LRU:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+        return False, None
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key):
+        self.entries.pop(key, None)
+
+
+class ReferenceCache:
+    """
+    Кеш закладів (за venue_id), об'єктів (за facility_id) і списків об'єктів закладу.
+    Дані читаються з бази при першому зверненні, а скидаються за повідомленнями
+    тригерів, які отримує фоновий потік через LISTEN - тому процеси застосунку
+    бачать зміни один одного без опитування. Якщо з'єднання слухача обірвалось,
+    повідомлення могли загубитися, тому кеш очищується повністю.
+    """
+
+    def __init__(self, db_model, existence=None, max_size=REFERENCE_CACHE_SIZE, url=alch.DATABASE_URL):
+        self.db_model = db_model
+        self.existence = existence
+        self.url = url
+        self.venues = _LRU(max_size)
+        self.facilities = _LRU(max_size)
+        self.venue_facilities = _LRU(max_size)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Збільшується при кожному скиданні: завантажене до скидання не потрапляє в кеш
+        self._generation = 0
+        self._stopping = threading.Event()
+        self._listener = None
+
+    def start(self):
+        with self._lock:
+            if self._listener is None:
+                self._stopping.clear()
+                self._listener = threading.Thread(target=self._listen, name='reference-cache-listener',
+                                                  daemon=True)
+                self._listener.start()
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.join(timeout=5)
+
+    def get_venue(self, venue_id):
+        return self._read_through(self.venues, venue_id, 'venue.get', False)
+
+    def get_facility(self, facility_id):
+        return self._read_through(self.facilities, facility_id, 'facility.get', False)
+
+    def get_venue_facilities(self, venue_id):
+        return self._read_through(self.venue_facilities, venue_id, 'venue.facilities', True)
+
+    def _read_through(self, lru, key, query_name, many):
+        # Слухач (і його окреме з'єднання) потрібен лише процесам, що читають через кеш.
+        # Рядки, прочитані до LISTEN, скидаються очищенням кешу після підключення слухача
+        if self._listener is None:
+            self.start()
+        with self._lock:
+            found, value = lru.get(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation
+
+        if many:
+            value = tuple(self.db_model.read(prepared.fetch_all, query_name, (key,)))
+        else:
+            value = self.db_model.read(prepared.fetch_one, query_name, (key,))
+
+        with self._lock:
+            if generation == self._generation:
+                lru.put(key, value)
+        return value
+
+    def invalidate(self, table, row_id=None, venue_id=None):
+        """
+        Скидає заклад або об'єкт (row_id=None - усю таблицю).
+        """
+        with self._lock:
+            self._generation += 1
+            if table == 'venue':
+                if row_id is None:
+                    self.venues.entries.clear()
+                    self.venue_facilities.entries.clear()
+                else:
+                    self.venues.pop(row_id)
+                    self.venue_facilities.pop(row_id)
+            elif row_id is None:
+                self.facilities.entries.clear()
+                self.venue_facilities.entries.clear()
+            else:
+                self.facilities.pop(row_id)
+                if venue_id is None:
+                    self.venue_facilities.entries.clear()
+                else:
+                    self.venue_facilities.pop(venue_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for lru in (self.venues, self.facilities, self.venue_facilities):
+                lru.entries.clear()
+
+    def _handle(self, payload):
+        parts = payload.split(':')
+        table, op = parts[0], parts[1]
+        # Після видалення каскад міг прибрати дочірні рядки з кешу існування
+        cascade = op in ('DELETE', 'TRUNCATE')
+        if op == 'TRUNCATE' or parts[2] == '*':
+            self.invalidate(table)
+            if self.existence is not None:
+                self.existence.invalidate(table, cascade=cascade)
+            return
+        row_id = int(parts[2])
+        self.invalidate(table, row_id, int(parts[3]) if len(parts) > 3 else None)
+        if self.existence is not None:
+            self.existence.invalidate(table, row_id, cascade=cascade)
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            try:
+                with psycopg.connect(alch.conninfo(self.url), autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{REFERENCE_CHANNEL}"')
+                    # Поки слухача не було, зміни могли пройти непоміченими
+                    self.clear()
+                    while not self._stopping.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except psycopg.OperationalError:
+                self.clear()
+                self._stopping.wait(1.0)
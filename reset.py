@@ -0,0 +1,106 @@
+import os
+import re
+
+import psycopg
+from psycopg import sql
+from sqlalchemy.engine import make_url
+
+import alch
+
+# База, до якої підключаємось для CREATE/DROP DATABASE (сама робоча база має бути вільною)
+ADMIN_DATABASE = os.environ.get('DB_ADMIN_DATABASE', 'template1')
+
+SNAPSHOT_NAME_RE = re.compile(r'^[a-z0-9_]{1,30}$')
+
+
+class DatabaseReset:
+    """
+    Знімки робочої бази у вигляді окремих баз-шаблонів і відновлення з них.
+    CREATE DATABASE ... TEMPLATE копіює файли бази цілком, тому відновлення
+    засіяної бази займає секунди замість повторної генерації даних.
+
+    Перед знімком і відновленням усі з'єднання з робочою базою закриваються:
+    пули alch звільняються, а сторонні сеанси примусово завершуються.
+    """
+
+    def __init__(self, url=alch.DATABASE_URL, admin_database=ADMIN_DATABASE):
+        self.url = url
+        self.database = make_url(url).database
+        self.admin_database = admin_database
+
+    def snapshot_database(self, name):
+        if not SNAPSHOT_NAME_RE.match(name):
+            raise ValueError("snapshot name must be 1-30 characters of a-z, 0-9 and _")
+        return f"{self.database}_snapshot_{name}"
+
+    def _admin_connection(self):
+        # CREATE/DROP DATABASE не виконуються всередині транзакції
+        return psycopg.connect(alch.conninfo(self.url, self.admin_database), autocommit=True)
+
+    def _file_copy(self, conn):
+        # FILE_COPY (PostgreSQL 15+) копіює файли без запису кожної сторінки у WAL
+        return sql.SQL(" STRATEGY = FILE_COPY") if conn.info.server_version >= 150000 else sql.SQL("")
+
+    def _disconnect(self, conn, database):
+        alch.dispose_engines()
+        conn.execute("""
+            SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+            WHERE datname = %s AND pid <> pg_backend_pid()
+        """, (database,))
+
+    def _clone(self, conn, source, target):
+        """
+        Копіює базу source в target. Копія створюється під тимчасовою назвою і замінює target
+        лише після успішного CREATE DATABASE: якщо копіювання не вдалося (зайнятий шаблон,
+        немає місця на диску), target лишається без змін.
+        """
+        staging = f"{target}_new"
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(staging)))
+        try:
+            conn.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}{}").format(
+                sql.Identifier(staging), sql.Identifier(source), self._file_copy(conn)))
+        except psycopg.Error:
+            conn.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(staging)))
+            raise
+        # Сеанси, що встигли підключитися до target під час копіювання, завершує FORCE
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(target)))
+        conn.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+            sql.Identifier(staging), sql.Identifier(target)))
+
+    def list_snapshots(self):
+        prefix = f"{self.database}_snapshot_"
+        with self._admin_connection() as conn:
+            rows = conn.execute("""
+                SELECT datname, pg_size_pretty(pg_database_size(datname))
+                FROM pg_database WHERE starts_with(datname, %s) ORDER BY datname
+            """, (prefix,)).fetchall()
+        return [(name[len(prefix):], size) for name, size in rows]
+
+    def create_snapshot(self, name):
+        """
+        Зберігає поточний стан робочої бази як знімок name (наявний знімок замінюється).
+        """
+        snapshot = self.snapshot_database(name)
+        with self._admin_connection() as conn:
+            self._disconnect(conn, self.database)
+            self._clone(conn, self.database, snapshot)
+            # Знімок лише для копіювання: підключатися до нього не потрібно
+            conn.execute(sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false").format(
+                sql.Identifier(snapshot)))
+
+    def restore_snapshot(self, name):
+        """
+        Замінює робочу базу копією знімка name. Робоча база видаляється лише після того,
+        як копія знімка створена.
+        """
+        snapshot = self.snapshot_database(name)
+        with self._admin_connection() as conn:
+            if not conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (snapshot,)).fetchone():
+                raise ValueError(f"snapshot {name!r} does not exist")
+            self._disconnect(conn, self.database)
+            self._clone(conn, snapshot, self.database)
+
+    def drop_snapshot(self, name):
+        with self._admin_connection() as conn:
+            conn.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(
+                sql.Identifier(self.snapshot_database(name))))
@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+
+import psycopg
+from psycopg import pq
+from psycopg.pq import TransactionStatus
+
+import alch
+
+# Скільки разів повторювати читання, перерване обривом з'єднання
+RETRY_ATTEMPTS = int(os.environ.get('DB_RETRY_ATTEMPTS', 3))
+# Затримка перед повтором: випадкова в межах [0, base * 2^спроба], але не більше max (секунди)
+RETRY_BASE_DELAY = float(os.environ.get('DB_RETRY_BASE_DELAY', 0.1))
+RETRY_MAX_DELAY = float(os.environ.get('DB_RETRY_MAX_DELAY', 2.0))
+# Після стількох невдалих підключень поспіль запобіжник розмикається на BREAKER_RESET_SECONDS
+BREAKER_THRESHOLD = int(os.environ.get('DB_BREAKER_THRESHOLD', 5))
+BREAKER_RESET_SECONDS = float(os.environ.get('DB_BREAKER_RESET_SECONDS', 30))
+# З'єднання, що простоювало довше (секунди), перевіряється перед використанням
+HEALTH_CHECK_IDLE = float(os.environ.get('DB_HEALTH_CHECK_IDLE', 30))
+
+
+class DatabaseUnavailable(psycopg.OperationalError):
+    """
+    Запобіжник розімкнено: після серії невдалих підключень запити не надсилаються,
+    доки не мине BREAKER_RESET_SECONDS.
+    """
+
+
+class ConnectionSupervisor:
+    """
+    Тримає з'єднання моделей і замінює його, коли воно обірвалось: після перезапуску
+    бази чи розриву з'єднання, що довго простоювало, наступна операція отримує нове
+    з'єднання з пулу alch замість помилки до перезапуску програми.
+
+    - conn перевіряє з'єднання порожнім запитом, якщо воно простоювало довше за
+      HEALTH_CHECK_IDLE, і перепідключається, якщо з'єднання втрачене.
+    - read виконує ідемпотентне читання і після обриву повторює його на новому
+      з'єднанні з випадковою експоненційною затримкою. Записи не повторюються:
+      невідомо, чи встиг сервер зафіксувати транзакцію.
+    - Після BREAKER_THRESHOLD невдалих підключень поспіль запобіжник розмикається:
+      conn одразу кидає DatabaseUnavailable, а через BREAKER_RESET_SECONDS
+      пропускає одну пробну спробу підключення.
+    """
+
+    def __init__(self, url=alch.DATABASE_URL, retry_attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_reset=BREAKER_RESET_SECONDS, health_check_idle=HEALTH_CHECK_IDLE):
+        self.url = url
+        self.retry_attempts = retry_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.health_check_idle = health_check_idle
+        # Лічильники для stats(): підключення, перепідключення, невдалі підключення,
+        # перевірки простою, повтори читання, розмикання запобіжника
+        self.metrics = dict.fromkeys(
+            ('connects', 'reconnects', 'connect_failures', 'health_checks', 'retries', 'breaker_opens'), 0)
+        self._raw_conn = None
+        self._last_used = 0.0
+        self._failures = 0
+        self._open_until = None
+        self._lock = threading.RLock()
+        self._connect()
+
+    @property
+    def conn(self):
+        """
+        Поточне з'єднання psycopg; обірване з'єднання замінюється новим.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._raw_conn is None or self._raw_conn.driver_connection.closed:
+                self._reconnect()
+            elif now - self._last_used > self.health_check_idle and not self._alive():
+                self._reconnect()
+            self._last_used = time.monotonic()
+            return self._raw_conn.driver_connection
+
+    def read(self, query, *args, **kwargs):
+        """
+        Виконує читання query(conn, *args, **kwargs) і повертає його результат.
+        Якщо з'єднання було вільне, транзакція читання фіксується, а обрив з'єднання
+        під час читання веде до повтору (до retry_attempts разів) на новому з'єднанні.
+        Читання всередині відкритої транзакції не повторюється - її зміни вже втрачено.
+        """
+        attempt = 0
+        while True:
+            conn = self.conn
+            idle = conn.info.transaction_status == TransactionStatus.IDLE
+            try:
+                result = query(conn, *args, **kwargs)
+                if idle and conn.info.transaction_status != TransactionStatus.IDLE:
+                    conn.commit()
+                return result
+            except psycopg.OperationalError:
+                if not (idle and conn.broken) or attempt >= self.retry_attempts:
+                    raise
+            attempt += 1
+            self._count('retries')
+            time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def rollback(self):
+        """
+        Відкочує транзакцію поточного з'єднання. Обірване з'єднання не замінюється:
+        його транзакцію вже скасовано сервером, тож виклик в обробнику помилки
+        не кидає нового винятку, навіть коли база недоступна.
+        """
+        with self._lock:
+            if self._raw_conn is not None and not self._raw_conn.driver_connection.closed:
+                self._raw_conn.driver_connection.rollback()
+
+    def state(self):
+        """
+        Стан запобіжника: closed (працює), open (запити відхиляються) або half-open
+        (наступне звернення зробить пробне підключення).
+        """
+        with self._lock:
+            if self._open_until is None:
+                return 'closed'
+            return 'open' if time.monotonic() < self._open_until else 'half-open'
+
+    def stats(self):
+        with self._lock:
+            return {**self.metrics, 'breaker': self.state()}
+
+    def close(self):
+        with self._lock:
+            if self._raw_conn is not None:
+                self._raw_conn.close()
+                self._raw_conn = None
+
+    def _alive(self):
+        # Порожній запит - найдешевший обмін із сервером; не потрапляє в статистику запитів
+        conn = self._raw_conn.driver_connection
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            return True
+        self._count('health_checks')
+        try:
+            result = conn.pgconn.exec_(b'')
+        except psycopg.OperationalError:
+            return False
+        return conn.pgconn.status == pq.ConnStatus.OK and result.status == pq.ExecStatus.EMPTY_QUERY
+
+    def _reconnect(self):
+        if self._raw_conn is not None:
+            # Обірване з'єднання не повертається в пул
+            self._raw_conn.invalidate()
+            self._raw_conn.close()
+            self._raw_conn = None
+            self._count('reconnects')
+        self._connect()
+
+    def _connect(self):
+        if self._open_until is not None and time.monotonic() < self._open_until:
+            raise DatabaseUnavailable(
+                f"database unavailable after {self._failures} failed connection attempts; "
+                f"retrying in {self._open_until - time.monotonic():.0f} s")
+        try:
+            self._raw_conn = alch.raw_connection(self.url)
+        except Exception:
+            self._failures += 1
+            self._count('connect_failures')
+            if self._failures >= self.breaker_threshold or self._open_until is not None:
+                # Пробна спроба напіввідкритого запобіжника теж невдала - знову розмикаємо
+                self._open_until = time.monotonic() + self.breaker_reset
+                self._count('breaker_opens')
+            raise
+        self._failures = 0
+        self._open_until = None
+        self._last_used = time.monotonic()
+        self._count('connects')
+
+    def _count(self, name):
+        with self._lock:
+            self.metrics[name] += 1